@@ -0,0 +1,337 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs the benchmarks and writes their results as JSON, e.g.::
+
+    $ python -m benchmarks.run --output results-1.1.2.json
+    $ python -m benchmarks.run --compare results-1.1.2.json
+
+Every benchmark reports the time taken by one operation, in seconds (the
+minimum, median and maximum of several rounds), except ``memory.*`` which
+report bytes.
+"""
+
+import argparse
+import datetime
+import fnmatch
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+
+from gpclient import GPClient, GPFakeServer, GPTranslations
+
+BUNDLE_ID = 'benchmark'
+SOURCE_LANGUAGE = 'en'
+TARGET_LANGUAGES = ['fr', 'de', 'es', 'it', 'ja', 'pt-BR', 'zh-Hans',
+                    'ko']
+FALLBACK_DEPTHS = (1, 2, 4, 8)
+
+
+def get_keys_map(size, languageId):
+    return dict(('key.%05d' % i, '%s value %d' % (languageId, i))
+                for i in range(size))
+
+
+def create_server(bundleSize, http=False):
+    """Returns a ``GPFakeServer`` holding a bundle with ``bundleSize`` keys
+    in every language
+    """
+    server = GPFakeServer()
+    server.add_bundle(BUNDLE_ID, SOURCE_LANGUAGE, dict(
+        (languageId, get_keys_map(bundleSize, languageId)) for languageId in
+        [SOURCE_LANGUAGE] + TARGET_LANGUAGES))
+    if http:
+        server.start()
+    return server
+
+
+def create_client(server, http=False, **kwargs):
+    if http:
+        return GPClient(server.get_service_account(), **kwargs)
+    return GPClient(server.get_service_account(),
+                    transport=server.get_transport(), **kwargs)
+
+
+def selected(options, name):
+    """Returns ``True`` if the result ``name`` matches ``--filter``"""
+    return fnmatch.fnmatch(name, options.filter)
+
+
+def measure(function, iterations, rounds):
+    """Returns the time taken by one call of ``function``, measured over
+    ``rounds`` rounds of ``iterations`` calls
+    """
+    function()
+
+    times = []
+    for _r in range(rounds):
+        startTime = time.perf_counter()
+        for _i in range(iterations):
+            function()
+        times.append((time.perf_counter() - startTime) / iterations)
+
+    times.sort()
+    return {'unit': 's', 'iterations': iterations, 'rounds': rounds,
+            'min': times[0], 'median': times[len(times) // 2],
+            'max': times[-1]}
+
+
+def measure_memory(function):
+    """Returns the memory allocated, and still held, by ``function``"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        startSize = tracemalloc.get_traced_memory()[0]
+        result = function()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - startSize
+    finally:
+        tracemalloc.stop()
+
+    # keep the result alive until it is measured
+    del result
+    return size
+
+
+def bench_gettext(options):
+    """``GPTranslations.gettext`` with a cache hit, a miss, and values
+    found at the end of fallback chains of increasing depth
+    """
+    server = create_server(options.bundle_size, options.http)
+    client = create_client(server, options.http)
+
+    t = client.translation(bundleId=BUNDLE_ID, languages=['fr'])
+    t.gettext('key.00000')
+
+    results = {}
+    if selected(options, 'gettext.hit'):
+        results['gettext.hit'] = measure(lambda: t.gettext('key.00001'),
+            options.iterations, options.rounds)
+    if selected(options, 'gettext.miss'):
+        results['gettext.miss'] = measure(lambda: t.gettext('unknown.key'),
+            options.iterations, options.rounds)
+
+    for depth in FALLBACK_DEPTHS:
+        name = 'gettext.fallback_depth_%d' % depth
+        if not selected(options, name):
+            continue
+
+        chain = None
+        for languageId in TARGET_LANGUAGES[:depth]:
+            gpTranslations = GPTranslations(client=client,
+                bundleId=BUNDLE_ID, languageId=languageId, cacheTimeout=10)
+            # only the last language of the chain has the key
+            gpTranslations._GPTranslations__set_cached_map(
+                {} if languageId != TARGET_LANGUAGES[depth - 1] else
+                {'key.fallback': 'value'})
+            if chain is None:
+                chain = gpTranslations
+            else:
+                chain.add_fallback(gpTranslations)
+
+        results[name] = measure(lambda: chain.gettext('key.fallback'),
+            options.iterations, options.rounds)
+
+    client.close()
+    server.stop()
+    return results
+
+
+def bench_translation(options):
+    """``GPClient.translation`` construction, with a client that already
+    has the bundle languages (warm) and with a new client (cold)
+    """
+    server = create_server(options.bundle_size, options.http)
+    client = create_client(server, options.http)
+    client.translation(bundleId=BUNDLE_ID, languages=['fr', 'de'])
+
+    results = {}
+    if selected(options, 'translation.warm'):
+        results['translation.warm'] = measure(lambda: client.translation(
+            bundleId=BUNDLE_ID, languages=['fr', 'de']), options.iterations,
+            options.rounds)
+
+    def cold():
+        coldClient = create_client(server, options.http)
+        coldClient.translation(bundleId=BUNDLE_ID,
+                               languages=['fr', 'de']).gettext('key.00000')
+        coldClient.close()
+
+    if selected(options, 'translation.cold'):
+        results['translation.cold'] = measure(cold,
+            max(1, options.iterations // 1000), options.rounds)
+
+    client.close()
+    server.stop()
+    return results
+
+
+def bench_hmac(options):
+    """Signing of a REST call with HMAC"""
+    server = create_server(1, False)
+    client = create_client(server)
+    url = server.get_url() + '/' + server.get_instance_id() + \
+        '/v2/bundles/' + BUNDLE_ID + '/fr'
+    body = json.dumps(get_keys_map(100, 'fr'))
+
+    sign = client._GPClient__get_gaas_hmac_headers
+    results = {}
+    if selected(options, 'hmac.get'):
+        results['hmac.get'] = measure(lambda: sign(method='GET', url=url),
+            options.iterations // 10, options.rounds)
+    if selected(options, 'hmac.post_100_keys'):
+        results['hmac.post_100_keys'] = measure(lambda: sign(method='POST',
+            url=url, body=body), options.iterations // 10, options.rounds)
+
+    client.close()
+    return results
+
+
+def bench_language_data(options):
+    """Fetching and decoding the JSON of a language with ``bundleSize``
+    keys, and refreshing it when it was not modified
+    """
+    server = create_server(options.bundle_size, options.http)
+    iterations = max(1, options.iterations // 1000)
+
+    languageContent = json.dumps({'status': 'SUCCESS',
+        'resourceStrings': get_keys_map(options.bundle_size, 'fr')})
+
+    results = {}
+    if selected(options, 'json.decode_language'):
+        results['json.decode_language'] = measure(
+            lambda: json.loads(languageContent), iterations, options.rounds)
+        results['json.decode_language']['bytes'] = len(languageContent)
+
+    def fetch():
+        client = create_client(server, options.http)
+        client._GPClient__get_language_data(BUNDLE_ID, 'fr')
+        client.close()
+
+    if selected(options, 'fetch.language'):
+        results['fetch.language'] = measure(fetch, iterations,
+                                            options.rounds)
+
+    if selected(options, 'fetch.language_not_modified'):
+        client = create_client(server, options.http)
+        client.warm(bundles=[BUNDLE_ID], languages=['fr'], fallback=False)
+        results['fetch.language_not_modified'] = measure(
+            lambda: client._GPClient__get_keys_map(BUNDLE_ID, 'fr'),
+            iterations, options.rounds)
+        client.close()
+
+    server.stop()
+    return results
+
+
+def bench_memory(options):
+    """Memory held by the client's cache per cached language"""
+    server = create_server(options.bundle_size, options.http)
+    client = create_client(server, options.http)
+
+    def load():
+        return [client.translation(bundleId=BUNDLE_ID, languages=[languageId])
+                .gettext('key.00000') for languageId in TARGET_LANGUAGES]
+
+    # the bundle languages and HTTP machinery are not part of the cache
+    client.translation(bundleId=BUNDLE_ID, languages=['fr'])
+    client.close()
+    client = create_client(server, options.http)
+    client._GPClient__get_cached_avaliable_languages(BUNDLE_ID)
+
+    size = measure_memory(load)
+    cache = client._GPClient__cache
+
+    client.close()
+    server.stop()
+    return {'memory.per_language': {'unit': 'bytes',
+        'keys': options.bundle_size,
+        'value': size // len(TARGET_LANGUAGES),
+        'estimated': cache.get_size() // len(TARGET_LANGUAGES)}}
+
+
+# each benchmark, with the names of its results
+BENCHMARKS = [
+    (bench_gettext, ['gettext.hit', 'gettext.miss'] +
+        ['gettext.fallback_depth_%d' % depth for depth in FALLBACK_DEPTHS]),
+    (bench_translation, ['translation.warm', 'translation.cold']),
+    (bench_hmac, ['hmac.get', 'hmac.post_100_keys']),
+    (bench_language_data, ['json.decode_language', 'fetch.language',
+                           'fetch.language_not_modified']),
+    (bench_memory, ['memory.per_language'])]
+
+
+def compare(previous, current):
+    """Prints the ratio of the current results to the previous ones"""
+    for name in sorted(current):
+        result = current[name]
+        previousResult = previous.get(name)
+        key = 'median' if 'median' in result else 'value'
+        if not previousResult or not previousResult.get(key):
+            print('%-40s %12s' % (name, 'new'))
+            continue
+        print('%-40s %12.3g %12.3g %8.2fx' % (name, previousResult[key],
+            result[key], result[key] / float(previousResult[key])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+        description='Runs the gpclient benchmarks against a fake GP server')
+    parser.add_argument('--output', help='file to write the results to')
+    parser.add_argument('--compare',
+        help='results of a previous run to compare with')
+    parser.add_argument('--filter', default='*',
+        help='only run the benchmarks matching this pattern, e.g. '
+             'gettext.*')
+    parser.add_argument('--iterations', type=int, default=100000,
+        help='number of calls per round for the fastest benchmarks')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--bundle-size', type=int, default=10000,
+        help='number of keys in each language of the bundle')
+    parser.add_argument('--http', action='store_true',
+        help='go through HTTP on the local host instead of in-process')
+    options = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+
+    results = {}
+    for benchmark, names in BENCHMARKS:
+        # the benchmarks with no selected result are not set up either
+        if any(selected(options, name) for name in names):
+            results.update(benchmark(options))
+
+    report = {'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'options': vars(options),
+              'results': results}
+
+    if options.output:
+        with open(options.output, 'w') as outputFile:
+            json.dump(report, outputFile, indent=2, sort_keys=True)
+
+    if options.compare:
+        with open(options.compare) as previousFile:
+            compare(json.load(previousFile)['results'], results)
+    elif not options.output:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print('')
+
+
+if __name__ == '__main__':
+    main()
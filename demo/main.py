@@ -18,24 +18,34 @@ from flask import Flask, render_template
 
 app = Flask(__name__)
 
+# the client is created once and reused for every request, so that the
+# translated values it caches are shared by all the requests
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        # 1 - create GPServiceAccount
+        # if the app is running on Bluemix, the credentials will be obtained
+        # from the VCAP environment variable
+        acc = GPServiceAccount()
+
+        # 2 - create Globalization Pipeline client
+        # the client is responsible for communication with the service
+        client = GPClient(acc)
+        logging.info('GP Client setup complete')
+    return client
+
 @app.route('/')
 @app.route('/index.html')
 def root():
     logging.info('Processing request')
-    # 1 - create GPServiceAccount
-    # if the app is running on Bluemix, the credentials will be obtained
-    # from the VCAP environment variable
-    acc = None
     try:
-        acc = GPServiceAccount()
+        client = get_client()
     except AssertionError:
         logging.error('Unable to create GPServiceAccount', exc_info=True)
         return
 
-    # 2 - create Globalization Pipeline client
-    # the client is responsible for communication with the service
-    client = GPClient(acc)
-    logging.info('GP Client setup complete')
     bundleId='demo'
 
     # for the demo, get all avalible languages in the bundle
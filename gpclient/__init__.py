@@ -15,3 +15,23 @@
 from .gpclient           import GPClient
 from .gptranslations     import GPTranslations
 from .gpserviceaccount   import GPServiceAccount
+from .gpcache            import GPTranslationCache
+from .gplanguageindex    import GPLanguageIndex
+from .gpflattranslations import GPFlatTranslations
+from .gpsnapshotstore    import GPSnapshotStore
+from .gpmocatalogs       import GPMoCatalogs
+from .gpsharedcache      import GPSharedTranslationCache
+from .gptransport        import GPTransport, GPRequestsTransport
+from .gpfakeserver       import GPFakeServer
+from .gphmacsigner       import GPHmacSigner
+from .gpiamtokenprovider import GPIamTokenProvider
+from .gpretrypolicy      import GPRetryPolicy
+from .gpcircuitbreaker   import GPCircuitBreaker, GPCircuitOpenError
+from .gpresourcewriter   import GPResourceWriter
+from .gpbundleexporter   import GPBundleExporter
+
+try:
+    from .gpasyncclient import AsyncGPClient
+except SyntaxError:
+    # AsyncGPClient requires Python 3.5+
+    pass
@@ -0,0 +1,417 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import logging
+
+import requests
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+
+from .gpclient import GPClient
+from .gpflattranslations import GPFlatTranslations
+from .gptranslations import GPTranslations
+
+
+class _AsyncGPResponse():
+    """Minimal stand-in for ``requests.Response`` so that the response
+    handling of ``GPClient`` can be reused for ``aiohttp`` responses
+    """
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncGPClient():
+    """asyncio version of ``GPClient``; its REST operations and
+    ``translation`` are offered here as coroutines, e.g.
+    ``await client.get_bundles()``. Requires the ``aiohttp`` package.
+
+    ``warm``, ``refresh_cache``, ``publish_bundle``, ``sync_bundle`` and
+    ``upload_resource_entries_in_chunks`` are not; they can be called on the
+    backing ``GPClient`` (see ``get_client``) in a thread, e.g. with
+    ``loop.run_in_executor``. Only ``translation`` has a ``deadline``; the
+    other coroutines can be bounded with ``asyncio.wait_for``.
+
+    ``serviceAccount``, ``auth``, ``cacheTimeout``, ``bundleCacheTimeout``,
+    ``connectTimeout`` and ``readTimeout`` have the same meaning as in
+    ``GPClient``, and the same authentication headers (HMAC, Basic or IAM)
+    are used. ``poolMaxsize`` is the maximum number of concurrent
+    connections kept per host; the default value is ``100``.
+
+    The ``GPTranslations`` instances returned by ``translation`` have all of
+    their language maps obtained before being returned: the ones held in
+    the backing ``GPClient``'s cache are used unless they expired, and the
+    others are fetched concurrently, once for all the concurrent calls. They
+    can be refreshed without blocking the event loop by awaiting
+    ``refresh`` more often than ``cacheTimeout``, e.g. from a periodic task.
+    The languages avaliable in the bundle are cached, as they are by
+    ``GPClient``, and the previously obtained ones are used if they can not
+    be obtained again.
+
+    The REST calls are sent with ``aiohttp``, so the ``transport``,
+    ``tokenProvider``, ``retryPolicy``, ``circuitBreaker`` and
+    ``snapshotStore`` of ``GPClient`` are not supported: each call is
+    attempted once, with the API key of IAM credentials, and the language
+    maps are always downloaded again rather than revalidated.
+
+    The client must be closed with ``await client.close()`` (or used with
+    ``async with``) once it is no longer needed.
+    """
+
+    __client = None
+    __session = None
+    __poolMaxsize = 100
+    __keysMapFlights = None
+
+    def __init__(self, serviceAccount, auth=GPClient.HMAC_AUTH,
+                 cacheTimeout=10, poolMaxsize=100, connectTimeout=10,
+                 readTimeout=60, bundleCacheTimeout=None):
+        if aiohttp is None:
+            raise ImportError('AsyncGPClient requires the aiohttp package')
+
+        # the synchronous client provides the authentication headers and
+        # response handling, and backs the GPTranslations instances
+        self.__client = GPClient(serviceAccount, auth=auth,
+                                 cacheTimeout=cacheTimeout,
+                                 bundleCacheTimeout=bundleCacheTimeout,
+                                 connectTimeout=connectTimeout,
+                                 readTimeout=readTimeout)
+        self.__poolMaxsize = poolMaxsize
+
+        # (bundleId, languageId, fallback) -> task fetching the language
+        # map, shared by the concurrent calls
+        self.__keysMapFlights = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
+
+    def get_client(self):
+        """Return the ``GPClient`` backing this ``AsyncGPClient``"""
+        return self.__client
+
+    def __get_session(self):
+        """Returns the ``aiohttp.ClientSession``, creating it on first use so
+        that it is bound to the running event loop
+        """
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.__poolMaxsize)
+            self.__session = aiohttp.ClientSession(connector=connector)
+        return self.__session
+
+    async def close(self):
+        """Closes the pooled connections held by this client"""
+        if self.__session is not None:
+            await self.__session.close()
+        self.__client.close()
+
+    async def __perform_rest_call(self, requestURL, params=None, headers=None,
+                                  restType='GET', body=None):
+        """Returns the JSON representation of the response if the response
+        status was ok, returns ``None`` otherwise.
+        """
+        auth, headers = self.__client._GPClient__prepare_gprest_call(
+            requestURL, params=params, headers=headers, restType=restType,
+            body=body)
+        if auth:
+            auth = aiohttp.BasicAuth(*auth)
+
+        # send the url exactly as it was signed
+        preparedRequest = requests.PreparedRequest()
+        preparedRequest.prepare_url(requestURL, params=params)
+        url = yarl.URL(preparedRequest.url, encoded=True)
+
+        (connectTimeout, readTimeout) = \
+            self.__client._GPClient__get_timeout()
+        timeout = aiohttp.ClientTimeout(total=None,
+            sock_connect=connectTimeout, sock_read=readTimeout)
+
+        session = self.__get_session()
+        async with session.request(restType, url, data=body, auth=auth,
+                                   headers=headers, timeout=timeout) as r:
+            text = await r.text()
+
+        return self.__client._GPClient__process_gprest_response(
+            _AsyncGPResponse(r.status, text), restType=restType)
+
+    def __get_base_bundle_url(self):
+        return self.__client._GPClient__get_base_bundle_url()
+
+    async def __get_keys_map(self, bundleId, languageId, fallback=False):
+        """Returns key-value pairs for the specified language.
+        If fallback is ``True``, source language value is used if translated
+        value is not available.
+
+        Concurrent calls for the same language share the fetch in progress.
+        """
+        key = (bundleId, languageId, fallback)
+        task = self.__keysMapFlights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.__fetch_keys_map(bundleId,
+                languageId, fallback=fallback))
+            self.__keysMapFlights[key] = task
+            task.add_done_callback(
+                lambda _task: self.__keysMapFlights.pop(key, None))
+
+        # a cancelled caller does not cancel the fetch of the others
+        return await asyncio.shield(task)
+
+    async def __fetch_keys_map(self, bundleId, languageId, fallback=False):
+        url = self.__get_base_bundle_url() + '/' + bundleId + '/' + languageId
+        params = {'fallback': 'true'} if fallback else None
+        response = await self.__perform_rest_call(requestURL=url,
+                                                  params=params)
+
+        if not response:
+            return None
+
+        return response.get(
+            self.__client._GPClient__RESPONSE_RESOURCE_STRINGS_KEY)
+
+    async def createReaderUser(self, accessibleBundles=None):
+        """Coroutine version of ``GPClient.createReaderUser``"""
+        serviceAccount = self.__client._GPClient__serviceAccount
+        url = serviceAccount.get_url() + '/' + \
+              serviceAccount.get_instance_id() + '/v2/users/new'
+
+        headers = {'content-type': 'application/json'}
+        data = {}
+        data['type'] = 'READER'
+        if accessibleBundles is not None:
+            data['bundles'] = accessibleBundles
+        json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url,
+            restType='POST', body=json_data, headers=headers)
+
+    async def get_bundles(self):
+        """Coroutine version of ``GPClient.get_bundles``"""
+        response = await self.__perform_rest_call(
+            requestURL=self.__get_base_bundle_url())
+
+        if not response:
+            return []
+
+        bundleIds = response.get(self.__client._GPClient__RESPONSE_BUNDLES_KEY)
+
+        return bundleIds if bundleIds else []
+
+    async def get_avaliable_languages(self, bundleId):
+        """Coroutine version of ``GPClient.get_avaliable_languages``"""
+        url = self.__get_base_bundle_url() + '/' + bundleId
+        response = await self.__perform_rest_call(requestURL=url)
+
+        if not response:
+            return []
+
+        bundleData = response.get(self.__client._GPClient__RESPONSE_BUNDLE_KEY)
+
+        if not bundleData:
+            return []
+
+        sourceLanguage = bundleData.get(
+            self.__client._GPClient__RESPONSE_SRC_LANGUAGE_KEY)
+        languages = bundleData.get(
+            self.__client._GPClient__RESPONSE_TARGET_LANGUAGES_KEY)
+        languages.append(sourceLanguage)
+
+        return languages if languages else []
+
+    async def create_bundle(self, bundleId, data=None):
+        """Coroutine version of ``GPClient.create_bundle``"""
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + "/" + bundleId
+        if data is None:
+            data = {}
+            data['sourceLanguage'] = 'en'
+            data['targetLanguages'] = []
+            data['notes'] = []
+            data['metadata'] = {}
+            data['partner'] = ''
+            data['segmentSeparatorPattern'] = ''
+            data['noTranslationPattern'] = ''
+        json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url, restType='PUT',
+            body=json_data, headers=headers)
+
+    async def delete_bundle(self, bundleId):
+        """Coroutine version of ``GPClient.delete_bundle``"""
+        if not bundleId:
+            return None
+        url = self.__get_base_bundle_url() + "/" + bundleId
+        return await self.__perform_rest_call(requestURL=url,
+                                              restType='DELETE')
+
+    async def update_bundle_info(self, bundleId, data=None):
+        """Coroutine version of ``GPClient.update_bundle_info``"""
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + "/" + bundleId
+        if data is None:
+            data = {}
+            data['sourceLanguage'] = 'en'
+            data['targetLanguages'] = []
+            data['notes'] = []
+            data['readOnly'] = 'true'
+            data['metadata'] = {}
+            data['partner'] = ''
+            data['segmentSeparatorPattern'] = ''
+            data['noTranslationPattern'] = ''
+        json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url, restType='POST',
+            body=json_data, headers=headers)
+
+    async def update_resource_entry(self, bundleId, languageId, resourceKey,
+                                    data=None):
+        """Coroutine version of ``GPClient.update_resource_entry``"""
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + "/" + bundleId + "/" + \
+            languageId + "/" + resourceKey
+        json_data = {}
+        if not data is None:
+            json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url, restType='POST',
+            body=json_data, headers=headers)
+
+    async def update_resource_entries(self, bundleId, languageId, data=None):
+        """Coroutine version of ``GPClient.update_resource_entries``"""
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + "/" + bundleId + "/" + languageId
+        json_data = {}
+        if not data is None:
+            json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url, restType='POST',
+            body=json_data, headers=headers)
+
+    async def upload_resource_entries(self, bundleId, languageId, data=None):
+        """Coroutine version of ``GPClient.upload_resource_entries``"""
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + "/" + bundleId + "/" + languageId
+        json_data = {}
+        if not data is None:
+            json_data = json.dumps(data)
+        return await self.__perform_rest_call(requestURL=url, restType='PUT',
+            body=json_data, headers=headers)
+
+    async def gp_translation(self, bundleId, languages):
+        """Coroutine version of ``GPClient.gp_translation``"""
+        return await self.translation(bundleId=bundleId, languages=languages)
+
+    async def translation(self, bundleId, languages, priority='gp',
+        domain=None, localedir=None, class_=None, codeset=None,
+        flatten=False, deadline=None):
+        """Coroutine version of ``GPClient.translation``. The language maps
+        of all the ``GPTranslations`` in the returned fallback chain are
+        obtained before it is returned, so the first ``gettext`` calls do not
+        block: the ones held in the client's cache are used, unless they
+        expired, and the others are fetched concurrently.
+
+        If a ``deadline`` is provided, ``requests.exceptions.Timeout`` is
+        raised if the chain is not ready within ``deadline`` seconds.
+        """
+        try:
+            return await asyncio.wait_for(self.__translation(bundleId,
+                languages, priority=priority, domain=domain,
+                localedir=localedir, class_=class_, codeset=codeset,
+                flatten=flatten), deadline)
+        except asyncio.TimeoutError:
+            raise requests.exceptions.Timeout('deadline exceeded')
+
+    async def __translation(self, bundleId, languages, priority, domain,
+                            localedir, class_, codeset, flatten):
+        availableLangs = await self.__get_cached_avaliable_languages(bundleId)
+
+        translations = self.__client._GPClient__build_translation(
+            bundleId=bundleId, languages=languages,
+            availableLangs=availableLangs, priority=priority, domain=domain,
+            localedir=localedir, class_=class_, codeset=codeset)
+
+        await self.__load(translations, reload=False)
+
+        if flatten:
+            translations = GPFlatTranslations(translations)
+
+        return translations
+
+    async def __get_cached_avaliable_languages(self, bundleId):
+        """Returns the avaliable languages in the bundle, cached by the
+        backing ``GPClient`` for ``bundleCacheTimeout`` minutes. If they can
+        not be obtained, the previously cached languages are returned.
+        """
+        (languages, cached) = \
+            self.__client._GPClient__get_cached_bundle_languages(bundleId)
+        if languages is not None:
+            return languages
+
+        try:
+            languages = tuple(await self.get_avaliable_languages(bundleId))
+        except Exception:
+            if not cached:
+                raise
+            logging.warning('Unable to get the avaliable languages for '
+                'bundle <%s>', bundleId, exc_info=True)
+            languages = ()
+
+        return self.__client._GPClient__put_bundle_languages(bundleId,
+            languages, cached)
+
+    async def refresh(self, translations):
+        """Concurrently fetches the language maps of every ``GPTranslations``
+        in the fallback chain of ``translations`` and replaces their cached
+        values with them, even if they have not expired.
+        """
+        await self.__load(translations, reload=True)
+
+    async def __load(self, translations, reload):
+        """Concurrently fetches the language maps of the ``GPTranslations``
+        in the fallback chain of ``translations`` and replaces their cached
+        values with them. Unless ``reload`` is ``True``, the ones held in the
+        client's cache are used instead, if they have not expired.
+        """
+        if isinstance(translations, GPFlatTranslations):
+            translations = translations._GPFlatTranslations__translations
+
+        gpTranslations = []
+        t = translations
+        while t is not None:
+            if isinstance(t, GPTranslations) and \
+                (reload or not t._GPTranslations__is_cached()):
+                gpTranslations.append(t)
+            t = t._fallback
+
+        keysMaps = await asyncio.gather(*[self.__get_keys_map(
+            t._GPTranslations__bundleId, t._GPTranslations__languageId,
+            fallback=t._GPTranslations__get_source_fallback())
+            for t in gpTranslations], return_exceptions=True)
+
+        for t, keysMap in zip(gpTranslations, keysMaps):
+            if isinstance(keysMap, BaseException):
+                logging.warning('Unable to get bundle <%s> language <%s>',
+                    t._GPTranslations__bundleId,
+                    t._GPTranslations__languageId, exc_info=keysMap)
+                keysMap = None
+
+            # keep the previously obtained values if GP could not be reached
+            if keysMap is not None or not t._GPTranslations__cachedMap:
+                t._GPTranslations__set_cached_map(keysMap)
@@ -0,0 +1,239 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+from .gpsnapshotstore import replace
+
+
+class GPBundleExporter():
+    """Exports the languages of Globalization Pipeline (GP) bundles to
+    files, e.g. for backups or offline translation review::
+
+        exporter = GPBundleExporter('backup', GPBundleExporter.XLIFF)
+        report = exporter.export(client, bundles=['messages'])
+
+    Each language is written to ``{directory}/{bundleId}/{languageId}`` with
+    the extension of ``format``:
+
+    * ``GPBundleExporter.JSON``, the key-value pairs as a JSON object
+    * ``GPBundleExporter.PO``, a gettext ``po`` file with, for each key, the
+      key as ``msgctxt``, the source value as ``msgid`` and the value as
+      ``msgstr``
+    * ``GPBundleExporter.XLIFF``, an XLIFF 1.2 document with a ``trans-unit``
+      for each key, with the source value and the value as ``target``
+
+    The languages of a bundle are fetched ``concurrency`` at a time, and each
+    one is written entry by entry, in key order, as soon as it is obtained
+    and then released, so that the memory used does not depend on the
+    number of languages or bundles. A file is replaced only once it is
+    completely written.
+    """
+
+    JSON = 'json'
+    PO = 'po'
+    XLIFF = 'xliff'
+
+    __EXTENSIONS = {JSON: '.json', PO: '.po', XLIFF: '.xlf'}
+
+    __directory = None
+    __format = JSON
+
+    def __init__(self, directory, format=JSON):
+        assert format in self.__EXTENSIONS, 'unsupported format: %s' % format
+
+        self.__directory = directory
+        self.__format = format
+
+    def get_directory(self):
+        """Return the directory the bundles are exported to"""
+        return self.__directory
+
+    def get_format(self):
+        return self.__format
+
+    def get_path(self, bundleId, languageId):
+        """Returns the path of the file of a bundle language"""
+        return os.path.join(self.__directory, quote(bundleId, safe=''),
+            quote(languageId, safe='') + self.__EXTENSIONS[self.__format])
+
+    def export(self, client, bundles=None, languages=None, concurrency=4):
+        """Fetches the languages of ``bundles`` (by default all the bundles
+        returned by ``client.get_bundles``) from the GP service using
+        ``client`` (a ``GPClient``) and writes them to files.
+
+        ``languages`` is the list of bundle languages to export; by default
+        all the languages of each bundle are exported. The source language
+        is always exported.
+
+        Returns a list with, for each bundle language, a dictionary with the
+        ``bundleId``, the ``languageId``, the ``path`` of the file written,
+        the ``seconds`` it took and the ``error`` that prevented it from
+        being exported, if any. If the languages of a bundle can not be
+        obtained, its ``languageId`` is ``None``.
+        """
+        if bundles is None:
+            bundles = client.get_bundles()
+
+        report = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for bundleId in bundles:
+                report.extend(self.__export_bundle(client, executor,
+                                                   bundleId, languages))
+        return report
+
+    def __export_bundle(self, client, executor, bundleId, languages):
+        startTime = time.time()
+        bundleData = client._GPClient__get_bundle_data(bundleId)
+        if not bundleData:
+            logging.warning('Unable to get bundle <%s>', bundleId)
+            return [{'bundleId': bundleId, 'languageId': None, 'path': None,
+                     'seconds': time.time() - startTime,
+                     'error': 'unable to get bundle <%s>' % bundleId}]
+
+        sourceLanguage = bundleData.get(
+            client._GPClient__RESPONSE_SRC_LANGUAGE_KEY)
+        targetLanguages = bundleData.get(
+            client._GPClient__RESPONSE_TARGET_LANGUAGES_KEY) or []
+        if languages is not None:
+            targetLanguages = [languageId for languageId in targetLanguages
+                               if languageId in languages]
+
+        # the source values are part of the po and XLIFF files
+        sourceMap = None
+        if self.__format != self.JSON:
+            sourceMap = client._GPClient__get_language_data(bundleId,
+                                                            sourceLanguage)
+            if sourceMap is None:
+                logging.warning('Unable to get the source language of '
+                                'bundle <%s>', bundleId)
+                return [{'bundleId': bundleId, 'languageId': None,
+                         'path': None, 'seconds': time.time() - startTime,
+                         'error': 'unable to get language <%s>' %
+                             sourceLanguage}]
+
+        languageIds = [sourceLanguage] + list(targetLanguages)
+        return list(executor.map(lambda languageId: self.__export_language(
+            client, bundleId, languageId, sourceLanguage, sourceMap),
+            languageIds))
+
+    def __export_language(self, client, bundleId, languageId, sourceLanguage,
+                          sourceMap):
+        startTime = time.time()
+        path = self.get_path(bundleId, languageId)
+        try:
+            if languageId == sourceLanguage and sourceMap is not None:
+                keysMap = sourceMap
+            else:
+                keysMap = client._GPClient__get_language_data(bundleId,
+                                                              languageId)
+            if keysMap is None:
+                raise ValueError('unable to get bundle <%s> language <%s>' %
+                                 (bundleId, languageId))
+
+            self.__write(path, lambda stream: self.__write_entries(stream,
+                bundleId, languageId, sourceLanguage, keysMap, sourceMap))
+            error = None
+        except Exception as e:
+            logging.warning('Unable to export bundle <%s> language <%s>',
+                            bundleId, languageId, exc_info=True)
+            (path, error) = (None, repr(e))
+
+        return {'bundleId': bundleId, 'languageId': languageId, 'path': path,
+                'seconds': time.time() - startTime, 'error': error}
+
+    def __write(self, path, writeEntries):
+        """Writes the file at ``path`` with ``writeEntries(stream)``,
+        replacing the previous one only once it is complete
+        """
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # created by another thread
+                if not os.path.isdir(directory):
+                    raise
+
+        (fd, tmpPath) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with io.open(fd, 'w', encoding='utf-8', newline='\n') as stream:
+                writeEntries(stream)
+            replace(tmpPath, path)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+
+    def __write_entries(self, stream, bundleId, languageId, sourceLanguage,
+                        keysMap, sourceMap):
+        keys = sorted(keysMap) if sourceMap is None else \
+            sorted(set(sourceMap) | set(keysMap))
+
+        if self.__format == self.JSON:
+            stream.write(u'{')
+            for index, key in enumerate(keys):
+                stream.write((u',\n  ' if index else u'\n  ') +
+                             json.dumps(key) + u': ' +
+                             json.dumps(keysMap[key]))
+            stream.write(u'\n}\n')
+
+        elif self.__format == self.PO:
+            stream.write(u'# Bundle %s, language %s\n' % (bundleId,
+                                                          languageId))
+            stream.write(u'msgid ""\nmsgstr ""\n'
+                         u'"Content-Type: text/plain; charset=UTF-8\\n"\n'
+                         u'"Language: %s\\n"\n' % languageId)
+            for key in keys:
+                stream.write(u'\nmsgctxt %s\nmsgid %s\nmsgstr %s\n' % (
+                    self.__quote_po(key),
+                    self.__quote_po(sourceMap.get(key)),
+                    self.__quote_po(keysMap.get(key))))
+
+        else:
+            stream.write(u'<?xml version="1.0" encoding="UTF-8"?>\n'
+                u'<xliff version="1.2" '
+                u'xmlns="urn:oasis:names:tc:xliff:document:1.2">\n'
+                u'  <file original=%s source-language=%s '
+                u'target-language=%s datatype="plaintext">\n'
+                u'    <body>\n' % (quoteattr(bundleId),
+                                   quoteattr(sourceLanguage),
+                                   quoteattr(languageId)))
+            for key in keys:
+                value = keysMap.get(key)
+                stream.write(u'      <trans-unit id=%s>\n'
+                    u'        <source>%s</source>\n' % (quoteattr(key),
+                        escape(sourceMap.get(key) or u'')))
+                if value is not None:
+                    stream.write(u'        <target>%s</target>\n' %
+                                 escape(value))
+                stream.write(u'      </trans-unit>\n')
+            stream.write(u'    </body>\n  </file>\n</xliff>\n')
+
+    def __quote_po(self, value):
+        """Returns ``value`` as a po string literal"""
+        return u'"' + (value or u'').replace(u'\\', u'\\\\') \
+            .replace(u'"', u'\\"').replace(u'\n', u'\\n') \
+            .replace(u'\r', u'\\r').replace(u'\t', u'\\t') + u'"'
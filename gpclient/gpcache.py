@@ -0,0 +1,144 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+
+class GPTranslationCache():
+    """Holds the key-value pairs of the languages fetched from the
+    Globalization Pipeline (GP) service, so that they can be shared by all the
+    ``GPTranslations`` instances instead of each instance starting with an
+    empty cache.
+
+    Entries are keyed by ``(instanceId, bundleId, languageId, fallback)``,
+    which allows a single ``GPTranslationCache`` to be shared by several
+    ``GPClient`` instances, e.g. to have a single cache per process::
+
+        cache = GPTranslationCache(maxSize=64 * 1024 * 1024)
+        client = GPClient(acc, cache=cache)
+
+    ``maxSize`` is the approximate maximum memory, in bytes, used by the
+    cached key-value pairs. When it is exceeded, the least recently used
+    entries are evicted. If ``maxSize`` is ``None`` (the default), the cache
+    is not bounded.
+
+    Each entry also holds the validators (``ETag``, ``Last-Modified`` and
+    digest) of the response the key-value pairs were obtained from, if any,
+    so that they are revalidated rather than downloaded again, and are
+    evicted along with them.
+    """
+
+    __maxSize = None
+    __size = 0
+    __entries = None
+    __lock = None
+
+    def __init__(self, maxSize=None):
+        self.__maxSize = maxSize
+        self.__size = 0
+        # key -> (keysMap, timestamp, size, validators), least recently
+        # used first
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the ``(keysMap, timestamp)`` cached for ``key``, or
+        ``None`` if it is not cached
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            # most recently used last (OrderedDict.move_to_end is not
+            # available in Python 2)
+            self.__entries[key] = self.__entries.pop(key)
+            return (entry[0], entry[1])
+
+    def get_entry(self, key):
+        """Returns the ``(keysMap, timestamp, validators)`` cached for
+        ``key``, or ``None`` if it is not cached
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            self.__entries[key] = self.__entries.pop(key)
+            return (entry[0], entry[1], entry[3])
+
+    def put(self, key, keysMap, timestamp, validators=None):
+        """Caches ``keysMap`` for ``key``; ``timestamp`` is the time at which
+        ``keysMap`` was obtained from the GP service, and ``validators`` the
+        ``(etag, lastModified, digest)`` of the response it came from
+        """
+        with self.__lock:
+            previous = self.__entries.get(key)
+        # the size of revalidated key-value pairs is already known
+        size = previous[2] if previous is not None and \
+            previous[0] is keysMap else self.__get_size(keysMap)
+        with self.__lock:
+            previous = self.__entries.pop(key, None)
+            if previous is not None:
+                self.__size -= previous[2]
+
+            self.__entries[key] = (keysMap, timestamp, size, validators)
+            self.__size += size
+
+            # evict the least recently used entries, but always keep the
+            # entry that was just added
+            while self.__maxSize is not None and \
+                self.__size > self.__maxSize and len(self.__entries) > 1:
+                (evictedKey, evicted) = self.__entries.popitem(last=False)
+                self.__size -= evicted[2]
+                logging.info('Evicted <%s> from the translation cache',
+                             evictedKey)
+
+    def remove(self, key):
+        """Removes the entry cached for ``key``, if any"""
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is not None:
+                self.__size -= entry[2]
+
+    def clear(self):
+        """Removes all the cached entries"""
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def keys(self):
+        """Returns the keys of the cached entries"""
+        with self.__lock:
+            return list(self.__entries.keys())
+
+    def get_size(self):
+        """Returns the approximate memory, in bytes, used by the cached
+        key-value pairs
+        """
+        return self.__size
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __get_size(self, keysMap):
+        """Returns the approximate memory used by ``keysMap``"""
+        if not keysMap:
+            return sys.getsizeof(keysMap)
+
+        size = sys.getsizeof(keysMap)
+        for key, value in keysMap.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
@@ -0,0 +1,177 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+
+import requests
+
+
+class GPCircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of making a REST call while the circuit of its
+    endpoint is open
+    """
+    pass
+
+
+class _GPCircuit():
+    """State of the circuit of one endpoint"""
+    def __init__(self):
+        self.state = GPCircuitBreaker.CLOSED
+        self.failures = 0
+        self.openedAt = None
+        self.probing = False
+
+
+class GPCircuitBreaker():
+    """Stops ``GPClient`` from calling an endpoint of the GP service that is
+    failing, so that callers fail fast instead of each waiting for the
+    network::
+
+        breaker = GPCircuitBreaker(failureThreshold=5, resetTimeout=30)
+        client = GPClient(acc, circuitBreaker=breaker)
+
+    The circuit of an endpoint (the scheme, host and port of the url) opens
+    after ``failureThreshold`` consecutive failed calls: connection errors,
+    ``429`` or ``5xx`` responses, and responses taking longer than
+    ``slowCallSeconds`` if it is set. While it is open, calls raise
+    ``GPCircuitOpenError`` immediately and the ``GPTranslations`` instances
+    keep using the last values they obtained. ``resetTimeout`` seconds after
+    opening, the circuit is half-open: a single call is let through as a
+    probe, closing the circuit if it succeeds and opening it again otherwise.
+
+    ``get_state`` and ``get_states`` report the circuits, e.g. for
+    monitoring.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    __failureThreshold = 5
+    __resetTimeout = 30
+    __slowCallSeconds = None
+    __circuits = None
+    __lock = None
+
+    def __init__(self, failureThreshold=5, resetTimeout=30,
+                 slowCallSeconds=None):
+        assert failureThreshold >= 1, 'failureThreshold is less than 1: %s' \
+            % failureThreshold
+
+        self.__failureThreshold = failureThreshold
+        self.__resetTimeout = resetTimeout
+        self.__slowCallSeconds = slowCallSeconds
+        # endpoint -> _GPCircuit
+        self.__circuits = {}
+        self.__lock = threading.Lock()
+
+    def get_state(self, endpoint):
+        """Returns the state of the circuit of ``endpoint``: ``CLOSED``,
+        ``OPEN`` or ``HALF_OPEN``
+        """
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None:
+                return self.CLOSED
+            return self.__get_current_state(circuit)
+
+    def get_states(self):
+        """Returns the state of every circuit, as a dict of endpoint to
+        ``{'state', 'failures', 'openedAt'}``, ``openedAt`` being the time
+        (in seconds since the epoch) the circuit last opened
+        """
+        with self.__lock:
+            return dict((endpoint, {
+                'state': self.__get_current_state(circuit),
+                'failures': circuit.failures,
+                'openedAt': circuit.openedAt})
+                for endpoint, circuit in self.__circuits.items())
+
+    def reset(self, endpoint=None):
+        """Closes the circuit of ``endpoint``, or every circuit"""
+        with self.__lock:
+            if endpoint is None:
+                self.__circuits.clear()
+            else:
+                self.__circuits.pop(endpoint, None)
+
+    def __get_current_state(self, circuit):
+        if circuit.state == self.OPEN and \
+            time.time() - circuit.openedAt >= self.__resetTimeout:
+            return self.HALF_OPEN
+        return circuit.state
+
+    def __acquire(self, endpoint):
+        """Returns ``True`` if a call may be made to ``endpoint``"""
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if circuit is None:
+                return True
+
+            state = self.__get_current_state(circuit)
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not circuit.probing:
+                circuit.state = self.HALF_OPEN
+                circuit.probing = True
+                return True
+            return False
+
+    def __record(self, endpoint, failed):
+        with self.__lock:
+            circuit = self.__circuits.get(endpoint)
+            if not failed:
+                if circuit is not None:
+                    if circuit.state != self.CLOSED:
+                        logging.info('Circuit of <%s> closed', endpoint)
+                    del self.__circuits[endpoint]
+                return
+
+            if circuit is None:
+                circuit = _GPCircuit()
+                self.__circuits[endpoint] = circuit
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == self.HALF_OPEN or \
+                circuit.failures >= self.__failureThreshold:
+                if circuit.state != self.OPEN:
+                    logging.warning('Circuit of <%s> opened after %d '
+                                    'failures', endpoint, circuit.failures)
+                circuit.state = self.OPEN
+                circuit.openedAt = time.time()
+
+    def __is_failure(self, response):
+        return response.status_code == 429 or response.status_code >= 500
+
+    def call(self, endpoint, send):
+        """Returns the response of ``send()``, a call to ``endpoint``, unless
+        its circuit is open, in which case ``GPCircuitOpenError`` is raised
+        """
+        if not self.__acquire(endpoint):
+            raise GPCircuitOpenError('the circuit of <%s> is open' %
+                                     endpoint)
+
+        startTime = time.time()
+        try:
+            response = send()
+        except Exception:
+            self.__record(endpoint, True)
+            raise
+
+        slow = self.__slowCallSeconds is not None and \
+            time.time() - startTime > self.__slowCallSeconds
+        self.__record(endpoint, slow or self.__is_failure(response))
+        return response
@@ -12,21 +12,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
+import contextlib
+import copy
 import datetime
-import hmac
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from gettext import NullTranslations, \
     translation as local_translation
 from hashlib import sha1
 
-import requests
-from babel import Locale, negotiate_locale
-from babel.dates import format_datetime
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
 
+import requests
+from babel import UnknownLocaleError
+
+from .gpcache import GPTranslationCache
+from .gpcircuitbreaker import GPCircuitBreaker
+from .gpflattranslations import GPFlatTranslations
+from .gphmacsigner import GPHmacSigner
+from .gpiamtokenprovider import GPIamTokenProvider
+from .gplanguageindex import GPLanguageIndex
+from .gpmocatalogs import GPMoCatalogs
+from .gpretrypolicy import GPRetryPolicy
 from .gpserviceaccount import GPServiceAccount
+from .gpsingleflight import GPSingleFlight
+from .gpsnapshotstore import GPSnapshotStore
 from .gptranslations import GPTranslations
+from .gptransport import GPRequestsTransport, GPTransport
 
 
 class GPClient():
@@ -47,6 +65,49 @@ class GPClient():
 
     The default ``cacheTimeout`` value is ``10`` minutes
 
+    The cached values are held by a ``GPTranslationCache`` shared by all the
+    ``GPTranslations`` instances created by the client, so creating a new
+    translation (e.g. for every web request) does not start with an empty
+    cache. A ``cache`` may be provided to bound the memory used by the cached
+    values, or to share them between several clients, or between processes
+    with a ``GPSharedTranslationCache``. ``refresh_cache`` fetches again all
+    the values held in the cache.
+
+    The languages avaliable in a bundle, which ``translation`` needs in order
+    to find the bundle languages matching the requested ones, are cached for
+    ``bundleCacheTimeout`` minutes (same values as ``cacheTimeout``, which is
+    also its default value), and the resolved fallback chains are memoized,
+    so creating a translation usually does not contact the GP service.
+
+    If ``staleWhileRevalidate`` is ``True``, expired cache values continue to
+    be used while they are refreshed in the background, so that translation
+    lookups never wait for the GP service once the cache has been initialized.
+    ``maxStaleness`` is the maximum number of minutes a cache value may be
+    used after it expired (defaults to ``cacheTimeout``); past that,
+    lookups wait for the cache to be refreshed. The default
+    ``staleWhileRevalidate`` value is ``False``.
+
+    When a cached value expires, the client revalidates it instead of
+    downloading it again: the ``ETag`` and ``Last-Modified`` validators of the
+    previous response are sent with the request, and if the service does not
+    answer with ``304 Not Modified``, the content of the response is compared
+    to the previous one before it is parsed. The validators are held by the
+    cache along with the values, and evicted with them.
+
+    If a ``snapshotStore`` (a ``GPSnapshotStore``) is provided, the values
+    obtained from the GP service, and the languages avaliable in each bundle,
+    are also saved to disk. A new process then starts with the saved values
+    instead of waiting for the GP service: they are used immediately, even if
+    they expired, and are revalidated in the background. Whether or not a
+    ``snapshotStore`` is provided, the last values successfully obtained are
+    kept when the GP service can not be reached.
+
+    If ``moCatalogs`` (a ``GPMoCatalogs``) is provided, ``translation`` looks
+    up the values of the bundle it exported in its ``mo`` files first, and
+    only falls back on the GP service for the keys missing from them, e.g.
+    keys added after the export. The translations of other bundles are not
+    affected.
+
     The type of Globalization Pipeline authentication mechanism to use for requests can
     also be specified. Currently, the following are supported:
 
@@ -54,23 +115,73 @@ class GPClient():
     * HTTP Basic Access authentication: ``auth=GPClient.BASIC_AUTH``
 
     If the ``serviceAccount`` is initialized with IAM credentials, the client
-    will use IAM authentication and ignore the ``auth`` specified.
+    will use IAM authentication and ignore the ``auth`` specified. The API key
+    is then sent with every call, unless a ``tokenProvider`` (a
+    ``GPIamTokenProvider``) is provided to exchange it for bearer tokens that
+    are sent instead.
 
     The default ``auth`` value is ``GPClient.HMAC_AUTH`` for client initialized
     with Globalization Pipeline Authentication credentials. Note, at this
     time, only Reader-type accounts are allowed to use Basic authentication.
+
+    All REST calls made by the client, including those made by the
+    ``GPTranslations`` instances it creates, go through a single
+    `requests.Session
+    <https://requests.readthedocs.io/en/latest/user/advanced/#session-objects>`_
+    so that connections to the GP service are kept alive and reused instead
+    of performing a new TCP and TLS handshake for every call. The connection
+    pool can be configured with:
+
+    * ``poolConnections``, the number of per host connection pools to keep
+    * ``poolMaxsize``, the maximum number of connections kept per host
+
+    The default value for both is ``10``. ``close()`` should be called (or the
+    client used as a context manager) to release the pooled connections once
+    the client is no longer needed.
+
+    A ``transport`` (a ``GPTransport``) may be provided to deliver the REST
+    calls instead, in which case the connection pool settings are not used;
+    e.g. ``GPFakeServer.get_transport()`` answers them in-process, for tests
+    and benchmarks that can not reach the GP service.
+
+    Each REST call is attempted once, unless a ``retryPolicy`` (a
+    ``GPRetryPolicy``) is provided, in which case calls failing with a
+    transient error (e.g. ``503`` or a reset connection) are attempted again
+    after a backoff delay.
+
+    Connections to the GP service time out after ``connectTimeout`` seconds,
+    and responses after ``readTimeout`` seconds without receiving data
+    (``None`` waits forever). The public methods making REST calls also
+    accept a ``deadline``, the number of seconds the whole operation may
+    take, including nested calls; e.g. with
+    ``translation(bundleId, languages, deadline=2)`` the bundle languages and
+    every language of the chain are obtained within 2 seconds, or
+    ``requests.exceptions.Timeout`` is raised.
+
+    A ``circuitBreaker`` (a ``GPCircuitBreaker``) makes calls fail fast,
+    without reaching the GP service, while it is failing; the
+    ``GPTranslations`` instances keep the last values they obtained until it
+    recovers.
     """
 
     BASIC_AUTH = 'basic'
     HMAC_AUTH = 'HMAC'
 
-    __RFC1123_FORMAT = 'EEE, dd LLL yyyy HH:mm:ss'
-    __ENCODINGFORMAT = 'utf-8'
 
     __BUNDLES_PATH = '/v2/bundles'
 
+    __TRANSLATION_PLANS_MAX = 1024
+    # minimum number of seconds between background refreshes of a language,
+    # after one failed
+    __REFRESH_RETRY_SECONDS = 30
+    __LANGUAGE_INDEXES_MAX = 256
+
     __AUTHORIZATION_HEADER_KEY = 'Authorization'
-    __DATE_HEADER_KEY = 'GP-Date'
+    __BEARER_PREFIX = 'Bearer '
+    __ETAG_HEADER_KEY = 'ETag'
+    __LAST_MODIFIED_HEADER_KEY = 'Last-Modified'
+    __IF_NONE_MATCH_HEADER_KEY = 'If-None-Match'
+    __IF_MODIFIED_SINCE_HEADER_KEY = 'If-Modified-Since'
 
     __RESPONSE_STATUS_KEY = 'status'
     __RESPONSE_STATUS_SUCCESS = 'success'
@@ -87,16 +198,125 @@ class GPClient():
 
     __serviceAccount = None
     __cacheTimeout = 10
+    __staleWhileRevalidate = False
+    __maxStaleness = None
+    __cache = None
+    __snapshotStore = None
+    __snapshotKeys = None
+    __bundleCacheTimeout = 10
     __auth = None
-
-    def __init__(self, serviceAccount, auth=HMAC_AUTH, cacheTimeout=10):
+    __hmacSigner = None
+    __tokenProvider = None
+    __retryPolicy = None
+    __circuitBreaker = None
+    __connectTimeout = 10
+    __readTimeout = 60
+    __deadlines = None
+    __transport = None
+    __validators = None
+    __keysMapFlights = None
+    __refreshLock = None
+    __refreshing = None
+    __refreshFailures = None
+    __bundleLanguages = None
+    __bundleFlights = None
+    __languageIndexes = None
+    __languageIndexesLock = None
+    __translationPlans = None
+    __translationPlansLock = None
+
+    def __init__(self, serviceAccount, auth=HMAC_AUTH, cacheTimeout=10,
+                 poolConnections=10, poolMaxsize=10,
+                 staleWhileRevalidate=False, maxStaleness=None, cache=None,
+                 bundleCacheTimeout=None, snapshotStore=None, transport=None,
+                 tokenProvider=None, retryPolicy=None, circuitBreaker=None,
+                 connectTimeout=10, readTimeout=60, moCatalogs=None):
         assert isinstance(serviceAccount, GPServiceAccount), """serviceAccount
             is not of type GPServiceAccount: %s""" % serviceAccount
+        assert snapshotStore is None or \
+            isinstance(snapshotStore, GPSnapshotStore), """snapshotStore
+            is not of type GPSnapshotStore: %s""" % snapshotStore
+        assert moCatalogs is None or \
+            isinstance(moCatalogs, GPMoCatalogs), """moCatalogs
+            is not of type GPMoCatalogs: %s""" % moCatalogs
+        assert transport is None or isinstance(transport, GPTransport), \
+            """transport is not of type GPTransport: %s""" % transport
+        assert tokenProvider is None or \
+            isinstance(tokenProvider, GPIamTokenProvider), """tokenProvider
+            is not of type GPIamTokenProvider: %s""" % tokenProvider
+        assert retryPolicy is None or \
+            isinstance(retryPolicy, GPRetryPolicy), """retryPolicy
+            is not of type GPRetryPolicy: %s""" % retryPolicy
+        assert circuitBreaker is None or \
+            isinstance(circuitBreaker, GPCircuitBreaker), """circuitBreaker
+            is not of type GPCircuitBreaker: %s""" % circuitBreaker
 
         self.__serviceAccount = serviceAccount
         self.__cacheTimeout = cacheTimeout
+        self.__staleWhileRevalidate = staleWhileRevalidate
+        self.__maxStaleness = maxStaleness
+        self.__cache = cache if cache is not None else GPTranslationCache()
+        self.__snapshotStore = snapshotStore
+        self.__moCatalogs = moCatalogs
+        # cache keys whose values were loaded from the snapshot store and
+        # have not been revalidated yet
+        self.__snapshotKeys = set()
+        self.__bundleCacheTimeout = cacheTimeout if bundleCacheTimeout is None \
+            else bundleCacheTimeout
         self.__schemaUrl = serviceAccount.get_url()+"/swagger.json"
         self.__auth = auth
+        self.__tokenProvider = tokenProvider
+        self.__retryPolicy = retryPolicy
+        self.__circuitBreaker = circuitBreaker
+        self.__connectTimeout = connectTimeout
+        self.__readTimeout = readTimeout
+        # deadline, in seconds since the epoch, of the current thread's calls
+        self.__deadlines = threading.local()
+        self.__transport = transport if transport is not None else \
+            GPRequestsTransport(poolConnections=poolConnections,
+                                poolMaxsize=poolMaxsize)
+
+        # (etag, last modified, content digest, id of the resource strings)
+        # of the responses whose resource strings have not been put in the
+        # cache yet, for each (bundleId, languageId, fallback); once they
+        # are, the validators are held, and evicted, along with them
+        self.__validators = {}
+
+        # concurrent fetches of the same language map share one REST call
+        self.__keysMapFlights = GPSingleFlight()
+
+        # (bundleId, languageId, fallback) of the language maps being
+        # refreshed in the background, and the time at which the last
+        # background refresh of each failed
+        self.__refreshLock = threading.Lock()
+        self.__refreshing = set()
+        self.__refreshFailures = {}
+
+        # bundleId -> (avaliable languages, timestamp)
+        self.__bundleLanguages = {}
+        self.__bundleFlights = GPSingleFlight()
+
+        # GPLanguageIndex for each list of bundle languages
+        self.__languageIndexes = OrderedDict()
+        self.__languageIndexesLock = threading.Lock()
+
+        # memoized results of __get_translation_plan
+        self.__translationPlans = OrderedDict()
+        self.__translationPlansLock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def get_circuit_breaker(self):
+        """Return the ``GPCircuitBreaker`` used by this client, if any"""
+        return self.__circuitBreaker
+
+    def close(self):
+        """Closes the pooled connections held by this client"""
+        self.__transport.close()
 
     def __get_language_match(self, languageCode, languageIds):
         """Compares ``languageCode`` to the provided ``languageIds`` to find
@@ -106,53 +326,54 @@ class GPClient():
         e.g. if ``languageCode`` is ``en_CA`` and ``languageIds`` contains
         ``en``, the return value will be ``en``
         """
-        # special case
-        if languageCode == 'zh':
-            return 'zh-Hans'
-
-        # this will take care of cases such as mapping en_CA to en
-        if '-' in languageCode:
-            match = negotiate_locale([languageCode], languageIds, sep='-')
-        else:
-            match = negotiate_locale([languageCode], languageIds)
-
-        if match:
-            return match
-
-        # handle other cases
-        if '-' in languageCode:
-            locale = Locale.parse(languageCode, sep='-')
-        else:
-            locale = Locale.parse(languageCode)
-
-        for languageId in languageIds:
-            if '-' not in languageId:
-                continue
-
-            # normalize the languageId
-            nLanguageId = Locale.parse(languageId, sep='-')
+        return self.__get_language_index(languageIds).match(languageCode)
 
-            # 1. lang subtag must match
-            # 2. either script or territory subtag must match AND
-            #    one of them must not be None, i.e. do not allow None == None
-            if locale.language == nLanguageId.language and \
-                (((locale.script or nLanguageId.script) and
-                 (locale.script == nLanguageId.script)) or \
-                 (locale.territory or nLanguageId.territory) and
-                 (locale.territory == nLanguageId.territory)):
-                    return languageId
+    def __get_language_index(self, languageIds):
+        """Returns the ``GPLanguageIndex`` for ``languageIds``, building it
+        the first time it is needed
+        """
+        indexKey = tuple(languageIds)
+        with self.__languageIndexesLock:
+            languageIndex = self.__languageIndexes.get(indexKey)
+            if languageIndex is not None:
+                self.__languageIndexes[indexKey] = \
+                    self.__languageIndexes.pop(indexKey)
+                return languageIndex
+
+        languageIndex = GPLanguageIndex(languageIds)
+
+        with self.__languageIndexesLock:
+            self.__languageIndexes[indexKey] = languageIndex
+            if len(self.__languageIndexes) > self.__LANGUAGE_INDEXES_MAX:
+                self.__languageIndexes.popitem(last=False)
+
+        return languageIndex
+
+    def negotiate_language(self, bundleId, acceptLanguage):
+        """Returns the language avaliable in the bundle that best matches
+        ``acceptLanguage``, either a list of language codes in order of
+        preference or the value of an HTTP ``Accept-Language`` header (e.g.
+        ``fr-CA,fr;q=0.9,en;q=0.8``). Returns ``None`` if there is no match.
+        """
+        availableLangs = self.__get_cached_avaliable_languages(bundleId)
 
-        return None
+        return self.__get_language_index(availableLangs).negotiate(
+            acceptLanguage)
 
     def __get_base_bundle_url(self):
         """Returns ``{rest api url}/{serviceInstanceId}/v2/bundles`` """
         return self.__serviceAccount.get_url() + '/' + \
             self.__serviceAccount.get_instance_id() + self.__BUNDLES_PATH
 
-    def __get_RFC1123_date(self):
-        now = datetime.datetime.utcnow()
-        return format_datetime(now, self.__RFC1123_FORMAT, locale='en') \
-            + ' GMT'
+    def __get_hmac_signer(self, userId, secret):
+        """Returns the ``GPHmacSigner`` for ``userId`` and ``secret``; the
+        last one used is kept, so that its keyed HMAC state is reused
+        """
+        hmacSigner = self.__hmacSigner
+        if hmacSigner is None or not hmacSigner.is_for(userId, secret):
+            hmacSigner = GPHmacSigner(userId, secret)
+            self.__hmacSigner = hmacSigner
+        return hmacSigner
 
     def __get_gaas_hmac_headers(self, method, url, date=None, body=None,
                                 secret=None, userId=None):
@@ -195,41 +416,28 @@ class GPClient():
         authentication code checks the Date header value and if it's too old,
         it rejects the request.
         """
-        if not date:
-            date = self.__get_RFC1123_date()
-
-        message = str(method) + '\n' + \
-            str(url) + '\n' + \
-            str(date) + '\n'
-        if body:
-            message += str(body)
-
         if not secret:
             secret = self.__serviceAccount.get_password()
-        secret = bytes(secret.encode(self.__ENCODINGFORMAT))
-        message = bytes(message.encode(self.__ENCODINGFORMAT))
-        digest = hmac.new(secret, message, sha1).digest()
-        urlSafeHmac = base64.b64encode(digest).strip()
-
         if not userId:
             userId = self.__serviceAccount.get_user_id()
-        urlSafeHmac = urlSafeHmac.strip().decode(self.__ENCODINGFORMAT)
-        authorizationValue = 'GP-HMAC ' + userId + ':' + urlSafeHmac
-
-        headers = {
-            self.__AUTHORIZATION_HEADER_KEY: str(authorizationValue),
-            self.__DATE_HEADER_KEY: str(date)
-        }
 
-        return headers
+        return self.__get_hmac_signer(userId, secret).sign(method=method,
+            url=url, body=body, date=date)
 
     def __prepare_gprest_call(self, requestURL, params=None, headers=None, restType='GET', body=None):
         """Returns Authorization type and GP headers
         """
         if self.__serviceAccount.is_iam_enabled():
             auth = None
+            if self.__tokenProvider is not None:
+                authorizationValue = self.__BEARER_PREFIX + \
+                    self.__tokenProvider.get_token(
+                        deadline=getattr(self.__deadlines, 'value', None))
+            else:
+                authorizationValue = 'API-KEY ' + \
+                    self.__serviceAccount.get_api_key()
             iam_api_key_header = {
-                self.__AUTHORIZATION_HEADER_KEY: str('API-KEY '+self.__serviceAccount.get_api_key())
+                self.__AUTHORIZATION_HEADER_KEY: str(authorizationValue)
             }
             if not headers is None:
                 headers.update(iam_api_key_header)
@@ -284,24 +492,111 @@ class GPClient():
         logging.warning(r.text)
         return r.json()
 
-    def __perform_rest_call(self, requestURL, params=None, headers=None, restType='GET', body=None):
+    def __perform_rest_call(self, requestURL, params=None, headers=None, restType='GET', body=None, deadline=None):
         """Returns the JSON representation of the response if the response
         status was ok, returns ``None`` otherwise.
         """
-        auth, headers = self.__prepare_gprest_call(requestURL, params=params, headers=headers, restType=restType, body=body)
-        if restType == 'GET':
-            r = requests.get(requestURL, auth=auth, headers=headers, params=params)
-        elif restType == 'PUT':
-            r = requests.put(requestURL, data=body, auth=auth, headers=headers, params=params)
-        elif restType == 'POST':
-            r = requests.post(requestURL, data=body, auth=auth, headers=headers, params=params)
-        elif restType == 'DELETE':
-            r = requests.delete(requestURL, auth=auth, headers=headers, params=params)
+        with self.__deadline_scope(deadline):
+            r = self.__send_rest_call(requestURL, params=params, headers=headers, restType=restType, body=body)
         resp = self.__process_gprest_response(r, restType=restType)
         return resp
 
+    def __send_rest_call(self, requestURL, params=None, headers=None, restType='GET', body=None):
+        """Returns the unprocessed response of the rest call"""
+        self.__get_timeout()
+
+        if self.__circuitBreaker is None:
+            return self.__send_rest_attempts(requestURL, params=params,
+                headers=headers, restType=restType, body=body)
+
+        (scheme, netloc, _path, _query, _fragment) = urlsplit(requestURL)
+        return self.__circuitBreaker.call(scheme + '://' + netloc,
+            lambda: self.__send_rest_attempts(requestURL, params=params,
+                headers=headers, restType=restType, body=body))
+
+    def __send_rest_attempts(self, requestURL, params=None, headers=None,
+                             restType='GET', body=None):
+        """Sends the rest call, attempting it again as allowed by the retry
+        policy
+        """
+        if self.__retryPolicy is None:
+            return self.__send_rest_attempt(requestURL, params=params,
+                headers=headers, restType=restType, body=body)
+
+        return self.__retryPolicy.call(restType,
+            lambda: self.__send_rest_attempt(requestURL, params=params,
+                headers=headers, restType=restType, body=body),
+            deadline=getattr(self.__deadlines, 'value', None))
+
+    def __send_rest_attempt(self, requestURL, params=None, headers=None,
+                            restType='GET', body=None):
+        """Signs and sends one attempt of the rest call; ``headers`` are
+        left untouched so that each attempt is signed again
+        """
+        timeout = self.__get_timeout()
+        headers = dict(headers) if headers is not None else None
+        auth, headers = self.__prepare_gprest_call(requestURL, params=params, headers=headers, restType=restType, body=body)
+        r = self.__transport.send(restType, requestURL, params=params,
+                                  headers=headers, auth=auth, data=body,
+                                  timeout=timeout)
+
+        if r.status_code == requests.codes.unauthorized:
+            self.__invalidate_token(headers)
+        return r
+
+    @contextlib.contextmanager
+    def __deadline_scope(self, deadline):
+        """Makes the REST calls of the current thread, within the scope,
+        complete in ``deadline`` seconds, or by the deadline of an enclosing
+        scope if it is earlier
+        """
+        if deadline is None:
+            yield
+            return
+
+        previous = getattr(self.__deadlines, 'value', None)
+        value = time.time() + deadline
+        self.__deadlines.value = value if previous is None else \
+            min(value, previous)
+        try:
+            yield
+        finally:
+            self.__deadlines.value = previous
+
+    def __get_timeout(self):
+        """Returns the ``(connect, read)`` timeout of a REST call, shortened
+        to the time left before the current thread's deadline; raises
+        ``requests.exceptions.Timeout`` if the deadline passed
+        """
+        connectTimeout = self.__connectTimeout
+        readTimeout = self.__readTimeout
+
+        deadline = getattr(self.__deadlines, 'value', None)
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout('deadline exceeded')
+            connectTimeout = remaining if connectTimeout is None else \
+                min(connectTimeout, remaining)
+            readTimeout = remaining if readTimeout is None else \
+                min(readTimeout, remaining)
+
+        return (connectTimeout, readTimeout)
+
+    def __invalidate_token(self, headers):
+        """Discards the bearer token sent in ``headers`` once the GP service
+        rejected it, e.g. because it was revoked, so that the next call
+        obtains a new one
+        """
+        authorization = (headers or {}).get(
+            self.__AUTHORIZATION_HEADER_KEY) or ''
+        if self.__tokenProvider is not None and \
+            authorization.startswith(self.__BEARER_PREFIX):
+            self.__tokenProvider.invalidate(
+                authorization[len(self.__BEARER_PREFIX):])
+
 
-    def createReaderUser(self,accessibleBundles=None):
+    def createReaderUser(self,accessibleBundles=None, deadline=None):
         """Creates a new reader user with access to the specified bundle Ids"""
 
         url = self.__serviceAccount.get_url() + '/' + \
@@ -313,7 +608,7 @@ class GPClient():
         if accessibleBundles is not None:
             data['bundles']=accessibleBundles
         json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers, deadline=deadline)
         return response
 
     def __get_bundles_data(self):
@@ -347,22 +642,68 @@ class GPClient():
 
         return bundleData
 
-    def __get_language_data(self, bundleId, languageId, fallback=False):
+    def __get_language_data(self, bundleId, languageId, fallback=False,
+                            revalidate=False):
         """``GET /{serviceInstanceId}/v2/bundles/{bundleId}/{languageId}``
 
         Gets the resource strings (key/value pairs) for the language. If
         ``fallback`` is ``True``, source language value is used if translated
         value is not available.
+
+        If ``revalidate`` is ``True``, the resource strings held in the
+        client's cache, if any, are revalidated instead of being downloaded
+        again, and returned if they are unchanged. The validators of the
+        response are kept until its resource strings are put in the cache.
         """
         url = self.__get_base_bundle_url() + '/' + bundleId + '/' + languageId
         params = {'fallback': 'true'} if fallback else None
-        response = self.__perform_rest_call(requestURL=url, params=params)
+
+        # revalidate the cached data, if any, instead of downloading and
+        # parsing the same resource strings again
+        validatorsKey = (bundleId, languageId, fallback)
+        validators = None
+        if revalidate:
+            cached = self.__cache.get_entry((
+                self.__serviceAccount.get_instance_id(), bundleId,
+                languageId, fallback))
+            if cached is not None:
+                validators = cached[2]
+        headers = {}
+        if validators:
+            (etag, lastModified, digest) = validators
+            if etag:
+                headers[self.__IF_NONE_MATCH_HEADER_KEY] = etag
+            if lastModified:
+                headers[self.__IF_MODIFIED_SINCE_HEADER_KEY] = lastModified
+
+        r = self.__send_rest_call(requestURL=url, params=params,
+                                  headers=headers)
+
+        if validators and r is not None:
+            notModified = r.status_code == requests.codes.not_modified
+            if not notModified and r.status_code == requests.codes.ok:
+                # the service did not honour the validators, compare the
+                # content instead
+                notModified = sha1(r.content).digest() == digest
+            if notModified:
+                logging.info('Resource strings not modified for bundle '
+                             '<%s> and language <%s>', bundleId, languageId)
+                return cached[0]
+
+        response = self.__process_gprest_response(r)
 
         if not response:
             return None
 
         languageData = response.get(self.__RESPONSE_RESOURCE_STRINGS_KEY)
 
+        if revalidate and languageData is not None and \
+            r.status_code == requests.codes.ok and self.__cacheTimeout != 0:
+            self.__validators[validatorsKey] = (
+                r.headers.get(self.__ETAG_HEADER_KEY),
+                r.headers.get(self.__LAST_MODIFIED_HEADER_KEY),
+                sha1(r.content).digest(), id(languageData))
+
         return languageData
 
     def __get_resource_entry_data(self, bundleId, languageId, resourceKey,
@@ -395,9 +736,236 @@ class GPClient():
         """Returns key-value pairs for the specified language.
         If fallback is ``True``, source language value is used if translated
         value is not available.
+
+        Threads requesting the same key-value pairs while they are being
+        fetched wait for, and share the result of, the fetch in progress, at
+        most until their deadline.
+        """
+        return self.__keysMapFlights.do_until(
+            getattr(self.__deadlines, 'value', None),
+            (bundleId, languageId, fallback),
+            self.__get_language_data, bundleId=bundleId,
+            languageId=languageId, fallback=fallback, revalidate=True)
+
+    def __refresh_in_background(self, bundleId, languageId, fallback,
+                                refresh):
+        """Calls ``refresh``, which refreshes the key-value pairs of the
+        specified language and returns ``True`` if it did, in a background
+        thread, unless they are already being refreshed, for any
+        ``GPTranslations`` of the client, or their last background refresh
+        failed less than ``__REFRESH_RETRY_SECONDS`` ago
+        """
+        key = (bundleId, languageId, fallback)
+        with self.__refreshLock:
+            failedAt = self.__refreshFailures.get(key)
+            if key in self.__refreshing or (failedAt is not None and
+                time.time() - failedAt < self.__REFRESH_RETRY_SECONDS):
+                return
+            self.__refreshing.add(key)
+
+        def run():
+            refreshed = False
+            try:
+                refreshed = refresh()
+            finally:
+                with self.__refreshLock:
+                    self.__refreshing.discard(key)
+                    if refreshed:
+                        self.__refreshFailures.pop(key, None)
+                    else:
+                        self.__refreshFailures[key] = time.time()
+
+        thread = threading.Thread(target=run,
+            name='GPClient-refresh-%s-%s' % (bundleId, languageId))
+        thread.daemon = True
+        thread.start()
+
+    def __get_cached_keys_map(self, bundleId, languageId, fallback=False):
+        """Returns the ``(keysMap, timestamp)`` held in the client's cache for
+        the specified language, or ``None``. If they are not in the cache,
+        they are loaded from the snapshot store, if any.
+        """
+        key = (self.__serviceAccount.get_instance_id(), bundleId, languageId,
+               fallback)
+        cached = self.__cache.get(key)
+        if cached is not None or self.__snapshotStore is None:
+            return cached
+
+        snapshot = self.__snapshotStore.load(key)
+        if snapshot is None:
+            return None
+
+        (keysMap, timestamp, etag, lastModified, digest) = snapshot
+        logging.info('Loaded resource strings for bundle <%s> and language '
+                     '<%s> from snapshot', bundleId, languageId)
+
+        # so that revalidating the snapshot does not download it again
+        validators = (etag, lastModified, digest) \
+            if etag or lastModified else None
+
+        self.__snapshotKeys.add(key)
+        self.__cache.put(key, keysMap, timestamp, validators=validators)
+        return (keysMap, timestamp)
+
+    def __put_cached_keys_map(self, bundleId, languageId, fallback, keysMap,
+                              timestamp):
+        """Stores the key-value pairs of the specified language, obtained at
+        ``timestamp``, in the client's cache and snapshot store
+        """
+        key = (self.__serviceAccount.get_instance_id(), bundleId, languageId,
+               fallback)
+        validators = self.__validators.pop((bundleId, languageId, fallback),
+                                           None)
+        if validators is not None and validators[3] == id(keysMap):
+            # obtained by the last response
+            validators = validators[:3]
+        else:
+            # keep the validators of the revalidated key-value pairs
+            cached = self.__cache.get_entry(key)
+            validators = cached[2] if cached is not None and \
+                cached[0] is keysMap else None
+        self.__cache.put(key, keysMap, timestamp, validators=validators)
+        self.__snapshotKeys.discard(key)
+
+        if self.__snapshotStore is not None:
+            (etag, lastModified, digest) = validators or (None, None, None)
+            self.__snapshotStore.save(key, keysMap, timestamp, etag=etag,
+                lastModified=lastModified, digest=digest)
+
+    def __is_snapshot_keys_map(self, bundleId, languageId, fallback=False):
+        """Returns ``True`` if the cached key-value pairs of the specified
+        language were loaded from the snapshot store and have not been
+        revalidated yet
+        """
+        return (self.__serviceAccount.get_instance_id(), bundleId, languageId,
+                fallback) in self.__snapshotKeys
+
+    def warm(self, bundles=None, languages=None, concurrency=10,
+             fallback=True):
+        """Loads the key-value pairs of the bundle languages into the
+        client's cache, so that the ``GPTranslations`` created afterwards do
+        not have to contact the GP service.
+
+        ``bundles`` is the list of bundles to load; by default all the
+        bundles returned by ``get_bundles``. ``languages`` is the list of
+        languages to load, matched to the closest language of each bundle;
+        by default all the languages of each bundle. At most ``concurrency``
+        REST calls are made at the same time, so it should not be greater
+        than ``poolMaxsize``.
+
+        ``fallback`` is the value used for the key-value pairs, ``True`` if
+        source language values are used for untranslated values (the last
+        ``GPTranslations`` of a fallback chain), ``False`` otherwise.
+
+        Returns a list with, for each bundle language, a dictionary with the
+        ``bundleId``, the ``languageId``, the ``seconds`` it took to load and
+        the ``error`` that prevented it from being loaded, if any. If the
+        languages of a bundle can not be obtained, its ``languageId`` is
+        ``None``.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        startTime = time.time()
+        if bundles is None:
+            bundles = self.get_bundles()
+
+        report = []
+        items = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            bundleLanguages = list(zip(bundles, executor.map(
+                lambda bundleId: self.__timed_call(
+                    self.__refresh_avaliable_languages, bundleId),
+                bundles)))
+
+            for bundleId, (availableLangs, seconds, error) in bundleLanguages:
+                if not availableLangs:
+                    report.append({'bundleId': bundleId, 'languageId': None,
+                        'seconds': seconds,
+                        'error': error or 'no languages avaliable'})
+                    continue
+
+                languageIds = availableLangs
+                if languages is not None:
+                    languageIds = []
+                    for language in languages:
+                        try:
+                            match = self.__get_language_match(language,
+                                list(availableLangs))
+                        except (ValueError, UnknownLocaleError):
+                            logging.warning('Invalid language code <%s>',
+                                            language)
+                            continue
+                        if match and match not in languageIds:
+                            languageIds.append(match)
+
+                items.extend((bundleId, languageId)
+                             for languageId in languageIds)
+
+            results = executor.map(lambda item: self.__timed_call(
+                self.__warm_keys_map, item[0], item[1], fallback), items)
+
+            for (bundleId, languageId), (_, seconds, error) in zip(items,
+                                                                  results):
+                report.append({'bundleId': bundleId,
+                    'languageId': languageId, 'seconds': seconds,
+                    'error': error})
+
+        logging.info('Warmed %d bundle languages in %.2f seconds, %d failed',
+            len(report), time.time() - startTime,
+            len([item for item in report if item['error']]))
+
+        return report
+
+    def __timed_call(self, function, *args):
+        """Returns the result of ``function``, the seconds it took, and the
+        error that occurred, if any
         """
-        return self.__get_language_data(bundleId=bundleId,
-            languageId=languageId, fallback=fallback)
+        startTime = time.time()
+        try:
+            result = function(*args)
+            error = None
+        except Exception as e:
+            logging.warning('Call failed for <%s>', args, exc_info=True)
+            (result, error) = (None, repr(e))
+        return (result, time.time() - startTime, error)
+
+    def __warm_keys_map(self, bundleId, languageId, fallback):
+        """Loads the key-value pairs of the language into the cache"""
+        keysMap = self.__get_keys_map(bundleId, languageId, fallback=fallback)
+        if keysMap is None:
+            raise ValueError('unable to get bundle <%s> language <%s>' %
+                             (bundleId, languageId))
+        self.__put_cached_keys_map(bundleId, languageId, fallback, keysMap,
+                                   datetime.datetime.now())
+        return keysMap
+
+    def refresh_cache(self):
+        """Fetches again, from the GP service, the key-value pairs of every
+        language held in the client's cache, e.g. so that a single process
+        refreshes a ``GPSharedTranslationCache`` for all the processes
+        sharing it. Returns the number of languages refreshed.
+        """
+        instanceId = self.__serviceAccount.get_instance_id()
+        refreshed = 0
+        for key in self.__cache.keys():
+            (keyInstanceId, bundleId, languageId, fallback) = key
+            if keyInstanceId != instanceId:
+                continue
+
+            try:
+                keysMap = self.__get_keys_map(bundleId, languageId,
+                                              fallback=fallback)
+            except Exception:
+                logging.warning('Unable to refresh bundle <%s> and language '
+                    '<%s>', bundleId, languageId, exc_info=True)
+                continue
+
+            if keysMap is not None:
+                self.__put_cached_keys_map(bundleId, languageId, fallback,
+                    keysMap, datetime.datetime.now())
+                refreshed += 1
+
+        return refreshed
 
     def __get_value(self, bundleId, languageId, resourceKey, fallback=False):
         """Returns the value for the key. If fallback is ``True``, source
@@ -414,15 +982,17 @@ class GPClient():
 
         return value
 
-    def get_bundles(self):
+    def get_bundles(self, deadline=None):
         """Returns list of avaliable bundles """
-        bundleIds = self.__get_bundles_data()
+        with self.__deadline_scope(deadline):
+            bundleIds = self.__get_bundles_data()
 
         return bundleIds if bundleIds else []
 
-    def get_avaliable_languages(self, bundleId):
+    def get_avaliable_languages(self, bundleId, deadline=None):
         """Returns a list of avaliable languages in the bundle"""
-        bundleData = self.__get_bundle_data(bundleId)
+        with self.__deadline_scope(deadline):
+            bundleData = self.__get_bundle_data(bundleId)
 
         if not bundleData:
             return []
@@ -433,7 +1003,7 @@ class GPClient():
 
         return languages if languages else []
 
-    def create_bundle(self, bundleId, data=None):
+    def create_bundle(self, bundleId, data=None, deadline=None):
         """Creates a bundle using Globalization Pipeline service"""
         headers={'content-type':'application/json'}
         url = self.__get_base_bundle_url() + "/" + bundleId
@@ -447,19 +1017,19 @@ class GPClient():
             data['segmentSeparatorPattern']=''
             data['noTranslationPattern']=''
         json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='PUT', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='PUT', body=json_data, headers=headers, deadline=deadline)
         return response
 
-    def delete_bundle(self, bundleId):
+    def delete_bundle(self, bundleId, deadline=None):
         """Returns success(True) or failure(False) on deleting
            a specific bundle present in the Globalization pipeline"""
         if not bundleId:
             return None
         url = self.__get_base_bundle_url() + "/" + bundleId
-        response = self.__perform_rest_call(requestURL=url, restType='DELETE')
+        response = self.__perform_rest_call(requestURL=url, restType='DELETE', deadline=deadline)
         return response
 
-    def update_bundle_info(self, bundleId, data=None):
+    def update_bundle_info(self, bundleId, data=None, deadline=None):
         """Updates the bundle config info on globalization pipeline instance"""
         headers={'content-type':'application/json'}
         url = self.__get_base_bundle_url() + "/" + bundleId
@@ -474,10 +1044,10 @@ class GPClient():
             data['segmentSeparatorPattern']=''
             data['noTranslationPattern']=''
         json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers, deadline=deadline)
         return response
 
-    def update_resource_entry(self, bundleId, languageId, resourceKey, data=None):
+    def update_resource_entry(self, bundleId, languageId, resourceKey, data=None, deadline=None):
         """Updates the resource entry for a particular key in a target language
            for a specific bundle in the globalization pipeline"""
         headers={'content-type':'application/json'}
@@ -485,10 +1055,10 @@ class GPClient():
         json_data = {}
         if not data is None:
             json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers, deadline=deadline)
         return response
 
-    def update_resource_entries(self, bundleId, languageId, data=None):
+    def update_resource_entries(self, bundleId, languageId, data=None, deadline=None):
         """Updates a bunch of resource entries to be in sync
            with the key/value pairs in the globalization pipeline instance"""
         headers={'content-type':'application/json'}
@@ -496,10 +1066,10 @@ class GPClient():
         json_data = {}
         if not data is None:
             json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='POST', body=json_data, headers=headers, deadline=deadline)
         return response
 
-    def upload_resource_entries(self, bundleId, languageId, data=None):
+    def upload_resource_entries(self, bundleId, languageId, data=None, deadline=None):
         """Uploads resource entries onto the globalization pipeline.
            Replaces all existing entries with new entries if languageId is source language
            Updates existing matching entries if languageId is target language"""
@@ -508,10 +1078,300 @@ class GPClient():
         json_data = {}
         if not data is None:
             json_data = json.dumps(data)
-        response = self.__perform_rest_call(requestURL=url, restType='PUT', body=json_data, headers=headers)
+        response = self.__perform_rest_call(requestURL=url, restType='PUT', body=json_data, headers=headers, deadline=deadline)
         return response
 
-    def gp_translation(self, bundleId, languages):
+    def upload_resource_entries_in_chunks(self, bundleId, languageId, data,
+                                          chunkSize=1000, startChunk=0,
+                                          deadline=None):
+        """Uploads resource entries, as ``upload_resource_entries`` does,
+        in chunks of ``chunkSize`` entries so that very large bundles do not
+        have to be sent, or held in memory as JSON, in a single request.
+
+        The entries are sorted by key and split into chunks; the first chunk
+        is uploaded with ``PUT`` (replacing the existing entries of a source
+        language), the following ones with ``POST`` (merged with the
+        uploaded ones). Each chunk is serialized only when it is sent.
+
+        Returns a dictionary with the ``bundleId``, the ``languageId``, the
+        number of ``chunks``, the number of ``uploadedChunks``, and the
+        ``failedChunk`` and ``error`` if a chunk could not be uploaded. The
+        upload can then be resumed, with the same ``data`` and ``chunkSize``,
+        by calling this method again with ``startChunk=failedChunk``.
+        """
+        assert chunkSize >= 1, 'chunkSize is less than 1: %s' % chunkSize
+
+        headers = {'content-type': 'application/json'}
+        url = self.__get_base_bundle_url() + '/' + bundleId + '/' + languageId
+        keys = sorted(data)
+        chunks = max(1, (len(keys) + chunkSize - 1) // chunkSize)
+        result = {'bundleId': bundleId, 'languageId': languageId,
+                  'chunks': chunks, 'uploadedChunks': 0, 'failedChunk': None,
+                  'error': None}
+
+        with self.__deadline_scope(deadline):
+            for chunk in range(startChunk, chunks):
+                chunkKeys = keys[chunk * chunkSize:(chunk + 1) * chunkSize]
+                body = json.dumps(OrderedDict((key, data[key])
+                                              for key in chunkKeys))
+                try:
+                    response = self.__perform_rest_call(requestURL=url,
+                        restType='PUT' if chunk == 0 else 'POST', body=body,
+                        headers=headers)
+                    self.__check_response(response, 'upload chunk %d of '
+                        'bundle <%s> language <%s>' % (chunk, bundleId,
+                                                       languageId))
+                except Exception as e:
+                    logging.warning('Unable to upload chunk %d of %d',
+                                    chunk, chunks, exc_info=True)
+                    result['failedChunk'] = chunk
+                    result['error'] = repr(e)
+                    return result
+                result['uploadedChunks'] += 1
+
+        return result
+
+    def publish_bundle(self, bundleId, resources, sourceLanguage=None,
+                       concurrency=10, progress=None, chunkSize=None,
+                       deadline=None):
+        """Publishes the resource entries of a bundle, ``resources`` holding
+        the key-value pairs (or resource entries, as in
+        ``upload_resource_entries``) of each language.
+
+        The bundle is created if it does not exist, with ``sourceLanguage``
+        (``en`` by default) as its source language, and the languages of
+        ``resources`` missing from its target languages are added. The source
+        language entries are uploaded first, then those of the target
+        languages, ``concurrency`` languages at a time.
+
+        ``progress``, if provided, is called with the result of each language
+        (see below), the number of languages done and the total number of
+        languages, once it is uploaded or failed to. If ``chunkSize`` is
+        provided, each language is uploaded in chunks of ``chunkSize``
+        entries (see ``upload_resource_entries_in_chunks``).
+
+        Returns a list with, for each language of ``resources``, a dictionary
+        with the ``bundleId``, the ``languageId``, the ``seconds`` its upload
+        took and the ``error`` that prevented it, if any. The target
+        languages are not uploaded if the bundle or its source language can
+        not be; they are reported with an error.
+        """
+        publish = lambda bundleId, languageId, entries, isSource, isNew: \
+            self.__publish_language(bundleId, languageId, entries, chunkSize)
+        return self.__update_bundle_languages(bundleId, resources,
+            sourceLanguage, concurrency, progress, deadline, publish,
+            'Published')
+
+    def sync_bundle(self, bundleId, resources, sourceLanguage=None,
+                    deleteMissing=False, dryRun=False, concurrency=10,
+                    progress=None, deadline=None):
+        """Synchronizes a bundle with ``resources``, holding the key-value
+        pairs (or resource entries) of each language, or the path of a JSON
+        file holding them, uploading only the differences.
+
+        The resource strings of each language are obtained from the GP
+        service and compared with ``resources``; the added and changed keys
+        are sent with ``update_resource_entries``. Keys that are no longer
+        in the source language of ``resources`` are only removed if
+        ``deleteMissing`` is ``True``, by replacing the source language
+        entries (see ``upload_resource_entries``), which removes them from
+        the target languages too. Keys missing from a target language only
+        are never removed, even if ``deleteMissing`` is ``True``, since the
+        GP service keeps a target language entry for every source language
+        key. The bundle, and its missing target languages, are
+        created as in ``publish_bundle``, and the languages are synchronized
+        in the same order, with the same ``concurrency`` and ``progress``.
+
+        Returns the same report as ``publish_bundle``, with the number of
+        ``added``, ``changed``, ``deleted`` and ``unchanged`` keys of each
+        language. ``deleted`` counts the keys missing from ``resources``;
+        they are removed, or would be if ``deleteMissing`` were ``True``,
+        for the source language only. If ``dryRun`` is ``True``
+        the differences are reported but nothing is changed.
+        """
+        if not isinstance(resources, dict):
+            with open(resources, 'rb') as resourcesFile:
+                resources = json.loads(
+                    resourcesFile.read().decode('utf-8'))
+
+        sync = lambda bundleId, languageId, entries, isSource, isNew: \
+            self.__sync_language(bundleId, languageId, entries,
+                                 isSource and deleteMissing, dryRun, isNew)
+        return self.__update_bundle_languages(bundleId, resources,
+            sourceLanguage, concurrency, progress, deadline, sync,
+            'Synchronized', prepare=not dryRun)
+
+    def __update_bundle_languages(self, bundleId, resources, sourceLanguage,
+                                  concurrency, progress, deadline, function,
+                                  action, prepare=True):
+        """Prepares the bundle (see ``__prepare_bundle_for_publish``), then
+        calls ``function(bundleId, languageId, entries, isSource, isNew)``
+        for the source language and, ``concurrency`` at a time, the target
+        languages of ``resources``, ``isNew`` being ``True`` for the
+        languages that were not in the bundle; returns the report of ``publish_bundle``, updated
+        with the dictionary returned by ``function``, if any
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        startTime = time.time()
+        total = len(resources)
+        report = []
+
+        def done(languageId, result, seconds, error):
+            item = {'bundleId': bundleId, 'languageId': languageId,
+                    'seconds': seconds, 'error': error}
+            item.update(result or {})
+            report.append(item)
+            if progress is not None:
+                progress(item, len(report), total)
+
+        with self.__deadline_scope(deadline):
+            (bundleData, seconds, error) = self.__timed_call(
+                self.__get_bundle_data, bundleId)
+            if bundleData:
+                sourceLanguage = bundleData.get(
+                    self.__RESPONSE_SRC_LANGUAGE_KEY)
+            elif sourceLanguage is None:
+                sourceLanguage = 'en'
+            targetLanguages = [languageId for languageId in resources
+                               if languageId != sourceLanguage]
+            existingLanguages = [sourceLanguage] + (bundleData.get(
+                self.__RESPONSE_TARGET_LANGUAGES_KEY) or []) \
+                if bundleData else []
+
+            if error is None and prepare:
+                (_, seconds, error) = self.__timed_call(
+                    self.__prepare_bundle_for_publish, bundleId, bundleData,
+                    sourceLanguage, targetLanguages)
+            if error is None and sourceLanguage in resources:
+                (result, seconds, error) = self.__timed_call(function,
+                    bundleId, sourceLanguage, resources[sourceLanguage],
+                    True, not bundleData)
+                done(sourceLanguage, result, seconds, error)
+
+            if error is not None:
+                for languageId in resources:
+                    if languageId not in [item['languageId'] for item in
+                                          report]:
+                        done(languageId, None, 0, 'not uploaded: ' + error)
+                return report
+
+            # the deadline of the current thread applies to the uploads
+            deadlineTime = getattr(self.__deadlines, 'value', None)
+
+        def update(languageId):
+            remaining = None if deadlineTime is None else \
+                deadlineTime - time.time()
+            with self.__deadline_scope(remaining):
+                return self.__timed_call(function, bundleId, languageId,
+                    resources[languageId], False,
+                    languageId not in existingLanguages)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = dict((executor.submit(update, languageId), languageId)
+                           for languageId in targetLanguages)
+            for future in as_completed(futures):
+                (result, seconds, error) = future.result()
+                done(futures[future], result, seconds, error)
+
+        logging.info('%s %d languages of bundle <%s> in %.2f seconds, '
+            '%d failed', action, len(report), bundleId,
+            time.time() - startTime,
+            len([item for item in report if item['error']]))
+
+        return report
+
+    def __prepare_bundle_for_publish(self, bundleId, bundleData,
+                                     sourceLanguage, targetLanguages):
+        """Creates the bundle, or adds the missing ``targetLanguages`` to
+        it
+        """
+        if not bundleData:
+            data = {'sourceLanguage': sourceLanguage,
+                    'targetLanguages': targetLanguages, 'notes': [],
+                    'metadata': {}, 'partner': '',
+                    'segmentSeparatorPattern': '',
+                    'noTranslationPattern': ''}
+            self.__check_response(self.create_bundle(bundleId, data=data),
+                                  'create bundle <%s>' % bundleId)
+            return
+
+        existingLanguages = bundleData.get(
+            self.__RESPONSE_TARGET_LANGUAGES_KEY) or []
+        missingLanguages = [languageId for languageId in targetLanguages
+                            if languageId not in existingLanguages]
+        if missingLanguages:
+            data = {'targetLanguages': existingLanguages + missingLanguages}
+            self.__check_response(self.update_bundle_info(bundleId,
+                data=data), 'add the target languages of bundle <%s>' %
+                bundleId)
+
+    def __publish_language(self, bundleId, languageId, entries, chunkSize):
+        if chunkSize is not None:
+            result = self.upload_resource_entries_in_chunks(bundleId,
+                languageId, entries, chunkSize=chunkSize)
+            if result['error'] is not None:
+                raise ValueError('unable to upload bundle <%s> language <%s>, '
+                    'chunk %d of %d: %s' % (bundleId, languageId,
+                    result['failedChunk'], result['chunks'], result['error']))
+            return
+
+        self.__check_response(self.upload_resource_entries(bundleId,
+            languageId, data=entries), 'upload bundle <%s> language <%s>' %
+            (bundleId, languageId))
+
+    def __sync_language(self, bundleId, languageId, entries, deleteMissing,
+                        dryRun, isNew):
+        """Uploads the entries of the language that differ from the ones in
+        the GP service; returns the number of keys of each kind. Raises
+        ``ValueError`` if the entries of the language can not be obtained,
+        unless it is new (it may not exist yet in a dry run)
+        """
+        remoteEntries = self.__get_language_data(bundleId, languageId)
+        if remoteEntries is None:
+            if not isNew:
+                raise ValueError('unable to get bundle <%s> language <%s>' %
+                                 (bundleId, languageId))
+            remoteEntries = {}
+
+        changedEntries = OrderedDict()
+        added = 0
+        for key in sorted(entries):
+            entry = entries[key]
+            value = entry.get(self.__RESPONSE_TRANSLATION_KEY) \
+                if isinstance(entry, dict) else entry
+            if key not in remoteEntries:
+                added += 1
+            elif remoteEntries[key] == value:
+                continue
+            changedEntries[key] = entry
+        deleted = len([key for key in remoteEntries if key not in entries])
+
+        if not dryRun:
+            if deleteMissing and deleted:
+                # only a replacement of the entries removes keys
+                self.__check_response(self.upload_resource_entries(bundleId,
+                    languageId, data=entries),
+                    'replace bundle <%s> language <%s>' % (bundleId,
+                                                           languageId))
+            elif changedEntries:
+                self.__check_response(self.update_resource_entries(bundleId,
+                    languageId, data=changedEntries),
+                    'update bundle <%s> language <%s>' % (bundleId,
+                                                          languageId))
+
+        return {'added': added, 'changed': len(changedEntries) - added,
+                'deleted': deleted,
+                'unchanged': len(entries) - len(changedEntries)}
+
+    def __check_response(self, response, action):
+        """Raises ``ValueError`` if ``response`` is not successful"""
+        if not response or str(response.get(self.__RESPONSE_STATUS_KEY))\
+            .lower() != self.__RESPONSE_STATUS_SUCCESS:
+            raise ValueError('unable to %s: %s' % (action,
+                (response or {}).get(self.__RESPONSE_MESSAGE_KEY)))
+
+    def gp_translation(self, bundleId, languages, deadline=None):
         """Returns an instance of ``GPTranslations`` to be used for obtaining
         translations.
 
@@ -520,10 +1380,12 @@ class GPClient():
         For example, to fallback to Spanish if French translated values are not
         found, ``languages=['fr', 'es']``.
         """
-        return self.translation(bundleId=bundleId, languages=languages)
+        return self.translation(bundleId=bundleId, languages=languages,
+                                deadline=deadline)
 
     def translation(self, bundleId, languages, priority='gp', domain=None,
-        localedir=None, class_=None, codeset=None):
+        localedir=None, class_=None, codeset=None, flatten=False,
+        deadline=None):
         """Returns the ``Translations`` instance to be used for obtaining
         translations.
 
@@ -547,12 +1409,172 @@ class GPClient():
         In order to search for local translated values, the optional parameters
         must be provided according to `gettext.translation
         <https://docs.python.org/2/library/gettext.html#gettext.translation>`_
+
+        If ``flatten`` is ``True``, the fallback chain is merged into a single
+        dictionary (see ``GPFlatTranslations``), so that looking up a value
+        does not require walking down the chain.
+
+        If a ``deadline`` is provided, the values of every language of the
+        chain are obtained before returning, instead of on first use, so that
+        the whole chain is ready within ``deadline`` seconds.
+
+        If the client has ``moCatalogs`` exported from the bundle, its ``mo``
+        files are used before the chain (see ``GPMoCatalogs.translation``).
         """
+        with self.__deadline_scope(deadline):
+            availableLangs = self.__get_cached_avaliable_languages(bundleId)
 
-        availableLangs = self.get_avaliable_languages(bundleId)
+            translations = self.__build_translation(bundleId=bundleId,
+                languages=languages, availableLangs=availableLangs,
+                priority=priority, domain=domain, localedir=localedir,
+                class_=class_, codeset=codeset)
 
-        translations = None
+            if deadline is not None:
+                self.__load_translations(translations)
+
+            if self.__moCatalogs is not None and \
+                self.__moCatalogs.get_bundle_id() == bundleId:
+                translations = self.__moCatalogs.translation(languages,
+                    fallback=translations)
+
+            if flatten:
+                translations = GPFlatTranslations(translations)
+
+        return translations
+
+    def __load_translations(self, translations):
+        """Obtains the values of every ``GPTranslations`` of the
+        ``translations`` fallback chain
+        """
+        while translations is not None:
+            if isinstance(translations, GPTranslations):
+                translations._GPTranslations__get_cached_map()
+            translations = translations._fallback
+
+    def __get_cached_avaliable_languages(self, bundleId):
+        """Returns the avaliable languages in the bundle, cached for
+        ``bundleCacheTimeout`` minutes. If they can not be obtained, the
+        previously cached languages are returned.
+        """
+        if self.__bundleCacheTimeout == 0:
+            return self.get_avaliable_languages(bundleId)
+
+        (languages, cached) = self.__get_cached_bundle_languages(bundleId)
+        if languages is not None:
+            return languages
+
+        return self.__refresh_avaliable_languages(bundleId, cached)
+
+    def __get_cached_bundle_languages(self, bundleId):
+        """Returns the avaliable languages in the bundle if they are cached
+        and have not expired, ``None`` otherwise, along with the cached
+        ``(languages, timestamp)``, if any, to fall back on if they can not
+        be obtained again (see ``__put_bundle_languages``)
+        """
+        if self.__bundleCacheTimeout == 0:
+            return (None, None)
+
+        cached = self.__bundleLanguages.get(bundleId)
+        if not cached and self.__snapshotStore is not None:
+            cached = self.__load_snapshot_languages(bundleId)
+            if cached:
+                return (cached[0], cached)
+
+        if cached:
+            (languages, timestamp) = cached
+            minutesPassed = (datetime.datetime.now() -
+                timestamp).total_seconds() / 60
+            if self.__bundleCacheTimeout == -1 or \
+                minutesPassed < self.__bundleCacheTimeout:
+                return (languages, cached)
+
+        return (None, cached)
+
+    def __refresh_avaliable_languages(self, bundleId, cached=None):
+        """Gets the avaliable languages in the bundle from the GP service and
+        caches them. If they can not be obtained, the previously cached
+        languages, ``cached``, are returned.
+        """
+        try:
+            languages = tuple(self.__bundleFlights.do_until(
+                getattr(self.__deadlines, 'value', None), bundleId,
+                self.get_avaliable_languages, bundleId))
+        except Exception:
+            # e.g. GPCircuitOpenError while the GP service is failing
+            if not cached:
+                raise
+            logging.warning('Unable to get the avaliable languages for '
+                'bundle <%s>', bundleId, exc_info=True)
+            languages = ()
+
+        return self.__put_bundle_languages(bundleId, languages, cached)
+
+    def __put_bundle_languages(self, bundleId, languages, cached=None):
+        """Caches the avaliable ``languages`` in the bundle, just obtained
+        from the GP service, and returns them. If there are none, the
+        previously cached languages, ``cached``, are returned instead.
+        """
+        if languages:
+            timestamp = datetime.datetime.now()
+            self.__bundleLanguages[bundleId] = (languages, timestamp)
+            if self.__snapshotStore is not None:
+                self.__snapshotStore.save_languages(
+                    (self.__serviceAccount.get_instance_id(), bundleId),
+                    languages, timestamp)
+        elif cached:
+            logging.warning('Unable to get the avaliable languages for '
+                'bundle <%s>, using the previously obtained ones', bundleId)
+            languages = cached[0]
+
+        return languages
+
+    def __load_snapshot_languages(self, bundleId):
+        """Loads the avaliable languages in the bundle from the snapshot
+        store and revalidates them in the background. Returns the
+        ``(languages, timestamp)`` that were loaded, or ``None``.
+        """
+        snapshot = self.__snapshotStore.load_languages(
+            (self.__serviceAccount.get_instance_id(), bundleId))
+        if not snapshot:
+            return None
+
+        cached = (tuple(snapshot[0]), snapshot[1])
+        self.__bundleLanguages[bundleId] = cached
+
+        def revalidate():
+            try:
+                self.__refresh_avaliable_languages(bundleId, cached)
+            except Exception:
+                logging.warning('Unable to get the avaliable languages for '
+                    'bundle <%s>', bundleId, exc_info=True)
+
+        thread = threading.Thread(target=revalidate,
+            name='GPClient-languages-%s' % bundleId)
+        thread.daemon = True
+        thread.start()
+
+        return cached
+
+    def __get_translation_plan(self, bundleId, languages, availableLangs,
+        domain=None, localedir=None, class_=None, codeset=None):
+        """Returns, for each language in ``languages``, the local translations
+        found for it (or ``None``) and the matching language avaliable in the
+        bundle (or ``None``).
 
+        Plans are memoized until the avaliable languages in the bundle change.
+        """
+        availableLangs = tuple(availableLangs)
+        planKey = (bundleId, tuple(languages), domain, localedir, class_,
+                   codeset)
+
+        with self.__translationPlansLock:
+            cached = self.__translationPlans.get(planKey)
+            if cached and cached[0] == availableLangs:
+                self.__translationPlans[planKey] = \
+                    self.__translationPlans.pop(planKey)
+                return cached[1]
+
+        plan = []
         for language in languages:
             # get local translation
             localTranslations = None
@@ -566,15 +1588,43 @@ class GPClient():
                 if t is not NullTranslations:
                     localTranslations = t
 
-            gpTranslations = None
-
             # get gp translation if the bundle has the language
             match = self.__get_language_match(languageCode=language,
-                languageIds=availableLangs)
+                languageIds=list(availableLangs))
+
+            plan.append((localTranslations, match))
+
+        with self.__translationPlansLock:
+            self.__translationPlans[planKey] = (availableLangs, plan)
+            if len(self.__translationPlans) > self.__TRANSLATION_PLANS_MAX:
+                self.__translationPlans.popitem(last=False)
+
+        return plan
+
+    def __build_translation(self, bundleId, languages, availableLangs,
+        priority='gp', domain=None, localedir=None, class_=None, codeset=None):
+        """Creates the fallback chain described in ``translation`` using the
+        languages ``availableLangs`` avaliable in the bundle
+        """
+        plan = self.__get_translation_plan(bundleId=bundleId,
+            languages=languages, availableLangs=availableLangs, domain=domain,
+            localedir=localedir, class_=class_, codeset=codeset)
+
+        translations = None
+
+        for (localTranslations, match) in plan:
+            # the memoized local translations are copied, since adding
+            # fallbacks modifies them
+            if localTranslations:
+                localTranslations = copy.copy(localTranslations)
+
+            gpTranslations = None
             if match:
                 gpTranslations = GPTranslations(bundleId=bundleId,
                     languageId=match, client=self,
-                    cacheTimeout=self.__cacheTimeout)
+                    cacheTimeout=self.__cacheTimeout,
+                    staleWhileRevalidate=self.__staleWhileRevalidate,
+                    maxStaleness=self.__maxStaleness)
 
             # create the fallback chain
             if not translations:
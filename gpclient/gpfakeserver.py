@@ -0,0 +1,591 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from hashlib import sha1
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, unquote, urlsplit
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+    from urlparse import parse_qs, urlsplit
+
+from .gpserviceaccount import GPServiceAccount
+from .gptransport import GPTransport
+
+
+class _GPFakeTransport(GPTransport):
+    """Delivers the REST calls to a ``GPFakeServer`` without going through
+    the network
+    """
+    def __init__(self, server):
+        self.__server = server
+
+    def send(self, method, url, params=None, headers=None, auth=None,
+             data=None, timeout=None):
+        request = requests.Request(method, url, params=params,
+            headers=headers, auth=auth, data=data).prepare()
+
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+
+        if isinstance(timeout, tuple):
+            timeout = timeout[1]
+        (status, responseHeaders, content) = self.__server.handle(method,
+            request.url, request.headers, body, timeout=timeout)
+        if status is None:
+            raise requests.exceptions.ConnectionError(
+                'connection failure injected by GPFakeServer')
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(responseHeaders)
+        response._content = content
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+
+class _GPFakeHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class GPFakeServer():
+    """Stand-in for a Globalization Pipeline (GP) service instance, for tests
+    and benchmarks that can not, or should not, reach the GP service.
+
+    It implements the ``/v2/bundles`` REST endpoints used by ``GPClient``
+    (bundles, languages, resource entries and ``/v2/users/new``) on data
+    held in memory, verifies the HMAC and Basic (reader users only)
+    authentication and the permissions of each call, answers conditional
+    ``GET`` requests with ``304 Not Modified``, and can inject latency and
+    failures::
+
+        server = GPFakeServer(latency=0.05)
+        server.add_bundle('messages', 'en', {'en': {'greet': 'Hello'},
+                                             'fr': {'greet': 'Salut'}})
+        client = GPClient(server.get_service_account(),
+                          transport=server.get_transport())
+
+    The transport returned by ``get_transport`` answers the calls in-process.
+    ``start`` serves them over HTTP on the local host instead, e.g. for
+    ``AsyncGPClient`` or to include the network stack in benchmarks; the
+    service account must be obtained once the server is started.
+
+    ``latency`` is the number of seconds each call takes, or a function
+    returning it. A ``failureRate`` proportion of the calls, chosen with a
+    random generator seeded with ``seed``, fail with the ``failureStatus``
+    HTTP status; a ``failureStatus`` of ``None`` closes the connection
+    without answering. ``fail_next`` makes the next calls fail.
+
+    It also stands in for the IAM token endpoint, at ``get_iam_url``:
+    ``apiKey`` is exchanged for bearer tokens valid for ``tokenLifetime``
+    seconds, and both the API key and the tokens authenticate the
+    administrator user (see ``get_iam_service_account``).
+    """
+
+    URL = 'http://gp.fake.invalid/translate/rest'
+    IAM_PATH = '/identity/token'
+
+    __ENCODINGFORMAT = 'utf-8'
+    __BUNDLE_FIELDS = ('sourceLanguage', 'targetLanguages', 'notes',
+        'readOnly', 'metadata', 'partner', 'segmentSeparatorPattern',
+        'noTranslationPattern')
+
+    def __init__(self, instanceId='fake-instance', userId='fake-user',
+                 password='fake-password', latency=0, failureRate=0,
+                 failureStatus=503, seed=None, apiKey='fake-api-key',
+                 tokenLifetime=3600):
+        self.__instanceId = instanceId
+        # userId -> (password, bundles accessible to a reader or None)
+        self.__users = {userId: (password, None)}
+        self.__adminUserId = userId
+        self.__apiKey = apiKey
+        self.__tokenLifetime = tokenLifetime
+        # IAM access token -> time it expires
+        self.__tokens = {}
+        self.__latency = latency
+        self.__failureRate = failureRate
+        self.__failureStatus = failureStatus
+        self.__random = random.Random(seed)
+        self.__failures = []
+        self.__requests = []
+        self.__lock = threading.Lock()
+
+        # bundleId -> bundle information, with the resource strings of each
+        # language under 'resources'
+        self.__bundles = {}
+
+        self.__httpServer = None
+        self.__httpThread = None
+        self.__httpUrl = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+    def get_url(self):
+        """Return the url of the fake service, an HTTP url on the local host
+        if the server was started
+        """
+        return self.__httpUrl or self.URL
+
+    def get_instance_id(self):
+        return self.__instanceId
+
+    def get_service_account(self, userId=None):
+        """Returns a ``GPServiceAccount`` for the fake service instance, for
+        the administrator user or ``userId``
+        """
+        if userId is None:
+            userId = self.__adminUserId
+        return GPServiceAccount(url=self.get_url(),
+            instanceId=self.__instanceId, userId=userId,
+            password=self.__users[userId][0])
+
+    def get_iam_url(self):
+        """Return the url of the fake IAM token endpoint"""
+        (scheme, netloc, _path, _query, _fragment) = urlsplit(self.get_url())
+        return scheme + '://' + netloc + self.IAM_PATH
+
+    def get_iam_service_account(self):
+        """Returns a ``GPServiceAccount`` for the fake service instance,
+        using IAM authentication with ``apiKey``
+        """
+        return GPServiceAccount(url=self.get_url(),
+            instanceId=self.__instanceId, apiKey=self.__apiKey)
+
+    def set_token_lifetime(self, tokenLifetime):
+        self.__tokenLifetime = tokenLifetime
+
+    def get_transport(self):
+        """Returns a ``GPTransport`` answering the calls in-process"""
+        return _GPFakeTransport(self)
+
+    def add_bundle(self, bundleId, sourceLanguage='en', resources=None,
+                   **info):
+        """Adds a bundle; ``resources`` holds the key-value pairs of each
+        language, its target languages are the languages other than the
+        source language
+        """
+        bundle = self.__new_bundle(sourceLanguage, resources, info)
+        with self.__lock:
+            self.__bundles[bundleId] = bundle
+
+    def __new_bundle(self, sourceLanguage, resources, info):
+        resources = dict((languageId, dict(keysMap)) for languageId, keysMap
+                         in (resources or {}).items())
+        resources.setdefault(sourceLanguage, {})
+
+        bundle = {'sourceLanguage': sourceLanguage,
+                  'targetLanguages': sorted(languageId for languageId in
+                      resources if languageId != sourceLanguage),
+                  'notes': [], 'readOnly': False, 'metadata': {},
+                  'partner': '', 'segmentSeparatorPattern': '',
+                  'noTranslationPattern': ''}
+        bundle.update(info)
+        bundle['resources'] = resources
+        return bundle
+
+    def set_latency(self, latency):
+        self.__latency = latency
+
+    def set_failure_rate(self, failureRate, failureStatus=503):
+        self.__failureRate = failureRate
+        self.__failureStatus = failureStatus
+
+    def fail_next(self, count=1, status=503, retryAfter=None):
+        """Makes the next ``count`` calls fail with the ``status`` HTTP
+        status, or without answering if ``status`` is ``None``; the
+        failures include a ``Retry-After`` header if ``retryAfter`` is set
+        """
+        with self.__lock:
+            self.__failures.extend([(status, retryAfter)] * count)
+
+    def get_requests(self, headers=False):
+        """Returns the ``(method, path)`` of every call received, or the
+        ``(method, path, headers)`` if ``headers`` is ``True``
+        """
+        with self.__lock:
+            return list(self.__requests) if headers else \
+                [request[:2] for request in self.__requests]
+
+    def clear_requests(self):
+        with self.__lock:
+            del self.__requests[:]
+
+    def start(self, port=0):
+        """Serves the calls over HTTP on ``127.0.0.1:port``, a free port by
+        default
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_method(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8') \
+                    if length else None
+                url = 'http://%s%s' % (self.headers.get('Host'), self.path)
+
+                (status, headers, content) = server.handle(self.command,
+                    url, self.headers, body)
+                if status is None:
+                    self.close_connection = True
+                    return
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_PUT = do_POST = do_DELETE = handle_method
+
+            def log_message(self, format, *args):
+                logging.debug('GPFakeServer: ' + format, *args)
+
+        self.__httpServer = _GPFakeHTTPServer(('127.0.0.1', port), Handler)
+        self.__httpUrl = 'http://127.0.0.1:%d/translate/rest' % \
+            self.__httpServer.server_address[1]
+        self.__httpThread = threading.Thread(
+            target=self.__httpServer.serve_forever, name='GPFakeServer')
+        self.__httpThread.daemon = True
+        self.__httpThread.start()
+
+    def stop(self):
+        """Stops serving the calls over HTTP"""
+        if self.__httpServer is not None:
+            self.__httpServer.shutdown()
+            self.__httpServer.server_close()
+            self.__httpThread.join()
+            self.__httpServer = None
+            self.__httpUrl = None
+
+    def handle(self, method, url, headers, body=None, timeout=None):
+        """Answers a call; returns the ``(status, headers, content)`` of the
+        response, with a ``None`` status if the connection must be closed
+        without answering. ``requests.exceptions.ReadTimeout`` is raised if
+        the latency exceeds ``timeout`` seconds.
+        """
+        (scheme, netloc, path, query, _fragment) = urlsplit(url)
+        with self.__lock:
+            self.__requests.append((method, path,
+                                    CaseInsensitiveDict(headers.items())))
+
+        latency = self.__latency() if callable(self.__latency) \
+            else self.__latency
+        if timeout is not None and latency and latency > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.ReadTimeout(
+                'read timeout of %s seconds exceeded' % timeout)
+        if latency:
+            time.sleep(latency)
+
+        with self.__lock:
+            if self.__failures:
+                return self.__failure(*self.__failures.pop(0))
+        if self.__failureRate and \
+            self.__random.random() < self.__failureRate:
+            return self.__failure(self.__failureStatus)
+
+        if path == self.IAM_PATH:
+            return self.__handle_iam_token(method, body)
+
+        userId = self.__get_authorized_user(method, url, headers, body)
+        if userId is None:
+            return self.__error(401, 'Unauthorized')
+
+        basePath = urlsplit(self.get_url()).path
+        if not path.startswith(basePath + '/'):
+            return self.__error(404, 'Not Found')
+        segments = [unquote(segment) for segment in
+                    path[len(basePath) + 1:].split('/')]
+        params = parse_qs(query)
+        fallback = params.get('fallback', ['false'])[0] == 'true'
+
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return self.__error(400, 'Invalid JSON body')
+
+        if len(segments) < 3 or segments[0] != self.__instanceId or \
+            segments[1] != 'v2':
+            return self.__error(404, 'Not Found')
+
+        with self.__lock:
+            readerBundles = self.__users[userId][1]
+            if readerBundles is not None and (method != 'GET' or
+                len(segments) < 4 or not ('*' in readerBundles or
+                                          segments[3] in readerBundles)):
+                return self.__error(403, 'Forbidden')
+
+            if segments[2:] == ['users', 'new'] and method == 'POST':
+                return self.__create_user(data)
+            if segments[2] != 'bundles':
+                return self.__error(404, 'Not Found')
+
+            route = segments[3:]
+            if len(route) == 0 and method == 'GET':
+                return self.__ok({'bundleIds': sorted(self.__bundles)})
+            if len(route) == 1:
+                return self.__handle_bundle(method, route[0], data)
+            if len(route) == 2:
+                return self.__handle_language(method, route[0], route[1],
+                    data, fallback, headers)
+            if len(route) == 3:
+                return self.__handle_entry(method, route[0], route[1],
+                    route[2], data, fallback)
+
+        return self.__error(404, 'Not Found')
+
+    def __get_authorized_user(self, method, url, headers, body):
+        """Verifies the HMAC or Basic authentication of the call; returns
+        the user making it, or ``None`` if it is not authorized
+        """
+        authorization = headers.get('Authorization') or ''
+
+        if authorization.startswith('GP-HMAC '):
+            (userId, _sep, signature) = \
+                authorization[len('GP-HMAC '):].partition(':')
+            date = headers.get('GP-Date')
+            user = self.__users.get(userId)
+            if not date or user is None:
+                return None
+
+            message = method + '\n' + url + '\n' + date + '\n' + (body or '')
+            expected = base64.b64encode(hmac.new(
+                user[0].encode(self.__ENCODINGFORMAT),
+                message.encode(self.__ENCODINGFORMAT), sha1).digest())
+            if hmac.compare_digest(expected,
+                                   signature.encode(self.__ENCODINGFORMAT)):
+                return userId
+            return None
+
+        if authorization.startswith('API-KEY '):
+            if authorization[len('API-KEY '):] == self.__apiKey:
+                return self.__adminUserId
+            return None
+
+        if authorization.startswith('Bearer '):
+            with self.__lock:
+                expiresAt = self.__tokens.get(authorization[len('Bearer '):])
+            if expiresAt is not None and time.time() < expiresAt:
+                return self.__adminUserId
+            return None
+
+        if authorization.startswith('Basic '):
+            try:
+                credentials = base64.b64decode(
+                    authorization[len('Basic '):]).decode('utf-8')
+            except (TypeError, ValueError):
+                return None
+            (userId, _sep, password) = credentials.partition(':')
+            user = self.__users.get(userId)
+            # only readers may use Basic authentication
+            if user is not None and user[0] == password and \
+                user[1] is not None:
+                return userId
+
+        return None
+
+    def __handle_bundle(self, method, bundleId, data):
+        bundle = self.__bundles.get(bundleId)
+
+        if method == 'PUT':
+            if bundle is not None:
+                return self.__error(409, 'Bundle already exists')
+            info = dict((key, value) for key, value in data.items()
+                        if key in self.__BUNDLE_FIELDS)
+            sourceLanguage = info.pop('sourceLanguage', 'en')
+            targetLanguages = info.pop('targetLanguages', None) or []
+            resources = dict((languageId, {})
+                             for languageId in targetLanguages)
+            self.__bundles[bundleId] = self.__new_bundle(sourceLanguage,
+                                                         resources, info)
+            return self.__ok({}, status=201)
+
+        if bundle is None:
+            # deleting a bundle that does not exist succeeds
+            if method == 'DELETE':
+                return self.__ok({})
+            return self.__error(404, 'Bundle not found')
+
+        if method == 'GET':
+            return self.__ok({'bundle': dict((key, value) for key, value
+                in bundle.items() if key != 'resources')})
+        if method == 'POST':
+            for key, value in data.items():
+                if key == 'targetLanguages':
+                    for languageId in value or []:
+                        bundle['resources'].setdefault(languageId, {})
+                    bundle[key] = sorted(set(value or []))
+                elif key in self.__BUNDLE_FIELDS and \
+                    key != 'sourceLanguage':
+                    bundle[key] = value
+            return self.__ok({})
+        if method == 'DELETE':
+            del self.__bundles[bundleId]
+            return self.__ok({})
+
+        return self.__error(405, 'Method Not Allowed')
+
+    def __handle_language(self, method, bundleId, languageId, data, fallback,
+                          headers):
+        bundle = self.__bundles.get(bundleId)
+        if bundle is None:
+            return self.__error(404, 'Bundle not found')
+
+        resources = bundle['resources']
+        if method in ('PUT', 'POST'):
+            if bundle.get('readOnly') in (True, 'true'):
+                return self.__error(403, 'Bundle is read only')
+            values = dict((key, self.__get_value(value))
+                          for key, value in data.items())
+            if method == 'PUT' or languageId not in resources:
+                resources[languageId] = values
+            else:
+                resources[languageId].update(values)
+            self.__add_target_language(bundle, languageId)
+            return self.__ok({})
+
+        if languageId not in resources:
+            return self.__error(404, 'Language not found')
+        if method != 'GET':
+            return self.__error(405, 'Method Not Allowed')
+
+        keysMap = dict((key, value) for key, value in
+                       resources[languageId].items() if value)
+        if fallback:
+            for key, value in resources[bundle['sourceLanguage']].items():
+                keysMap.setdefault(key, value)
+
+        content = self.__to_json({'status': 'SUCCESS',
+                                  'resourceStrings': keysMap})
+        etag = '"%s"' % sha1(content).hexdigest()
+        if headers.get('If-None-Match') == etag:
+            return (304, {'ETag': etag}, b'')
+        return (200, {'Content-Type': 'application/json', 'ETag': etag},
+                content)
+
+    def __handle_entry(self, method, bundleId, languageId, resourceKey, data,
+                       fallback):
+        bundle = self.__bundles.get(bundleId)
+        if bundle is None or languageId not in bundle['resources']:
+            return self.__error(404, 'Language not found')
+
+        resources = bundle['resources']
+        if method == 'POST':
+            resources[languageId][resourceKey] = self.__get_value(data)
+            return self.__ok({})
+        if method != 'GET':
+            return self.__error(405, 'Method Not Allowed')
+
+        sourceValue = resources[bundle['sourceLanguage']].get(resourceKey)
+        value = resources[languageId].get(resourceKey)
+        if not value and fallback:
+            value = sourceValue
+        if value is None and sourceValue is None:
+            return self.__error(404, 'Resource entry not found')
+
+        return self.__ok({'resourceEntry': {'value': value,
+            'sourceValue': sourceValue, 'bundleId': bundleId,
+            'languageId': languageId, 'resourceKey': resourceKey}})
+
+    def __handle_iam_token(self, method, body):
+        """``POST {IAM_PATH}``; exchanges an API key for a bearer token"""
+        if method != 'POST':
+            return self.__error(405, 'Method Not Allowed')
+
+        form = parse_qs(body or '')
+        if form.get('grant_type') != \
+            ['urn:ibm:params:oauth:grant-type:apikey'] or \
+            form.get('apikey') != [self.__apiKey]:
+            return (400, {'Content-Type': 'application/json'},
+                    self.__to_json({'errorCode': 'BXNIM0415E',
+                                    'errorMessage': 'Provided API key could '
+                                    'not be found'}))
+
+        now = time.time()
+        accessToken = uuid.uuid4().hex
+        with self.__lock:
+            self.__tokens[accessToken] = now + self.__tokenLifetime
+        return (200, {'Content-Type': 'application/json'},
+                self.__to_json({'access_token': accessToken,
+                                'token_type': 'Bearer',
+                                'expires_in': self.__tokenLifetime,
+                                'expiration': int(now +
+                                                  self.__tokenLifetime)}))
+
+    def __create_user(self, data):
+        userId = uuid.uuid4().hex
+        password = uuid.uuid4().hex
+        self.__users[userId] = (password, data.get('bundles') or [])
+        return self.__ok({'user': {'id': userId, 'password': password,
+            'type': data.get('type', 'READER'),
+            'bundles': data.get('bundles', [])}}, status=201)
+
+    def __add_target_language(self, bundle, languageId):
+        if languageId != bundle['sourceLanguage'] and \
+            languageId not in bundle['targetLanguages']:
+            bundle['targetLanguages'] = sorted(
+                bundle['targetLanguages'] + [languageId])
+
+    def __get_value(self, value):
+        """Values may be given as a string, or as a resource entry"""
+        if isinstance(value, dict):
+            return value.get('value')
+        return value
+
+    def __to_json(self, data):
+        return json.dumps(data).encode(self.__ENCODINGFORMAT)
+
+    def __ok(self, data, status=200):
+        data = dict(data)
+        data['status'] = 'SUCCESS'
+        return (status, {'Content-Type': 'application/json'},
+                self.__to_json(data))
+
+    def __error(self, status, message):
+        return (status, {'Content-Type': 'application/json'},
+                self.__to_json({'status': 'ERROR', 'message': message}))
+
+    def __failure(self, status, retryAfter=None):
+        if status is None:
+            return (None, {}, b'')
+        failure = self.__error(status, 'Failure injected by GPFakeServer')
+        if retryAfter is not None:
+            failure[1]['Retry-After'] = str(retryAfter)
+        return failure
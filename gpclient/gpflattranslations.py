@@ -0,0 +1,150 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from gettext import GNUTranslations, NullTranslations
+
+from .gptranslations import GPTranslations
+
+
+class GPFlatTranslations(NullTranslations):
+    """``GPFlatTranslations`` merges a fallback chain of translations (e.g.
+    the one returned by ``GPClient.translation``) into a single dictionary,
+    so that ``gettext`` is a single lookup instead of a walk down the chain.
+
+    The merged dictionary is rebuilt when the cache of one of the
+    ``GPTranslations`` in the chain expires or is refreshed. ``GPTranslations``
+    that do not cache (``cacheTimeout = 0``) and translations other than
+    ``GPTranslations``, ``gettext.GNUTranslations`` and
+    ``gettext.NullTranslations`` can not be merged; they, and the rest of the
+    chain after them, are used as a regular fallback.
+
+    NOTE: It is recommended that the ``GPFlatTranslations`` constructor not be
+    used directly - instead ``GPClient.translation`` should be used with
+    ``flatten=True``.
+    """
+
+    # if a stale cache is being refreshed in the background, check again
+    # for the refreshed values after this many seconds
+    __RECHECK_SECONDS = 1
+
+    __MISSING = object()
+
+    __translations = None
+    __members = None
+    __remainder = None
+    __merged = None
+
+    def __init__(self, translations, fp=None):
+        NullTranslations.__init__(self, fp=fp)
+        self.__translations = translations
+        self.__set_members()
+
+    def __set_members(self):
+        """Splits the chain into the translations that can be merged and the
+        rest of the chain
+        """
+        previousMembers = self.__members or []
+        members = []
+        t = self.__translations
+        while t is not None and self.__is_mergeable(t):
+            members.append(t)
+            if isinstance(t, GPTranslations) and \
+                not any(t is m for m in previousMembers):
+                t._GPTranslations__add_refresh_listener(self.__invalidate)
+            t = t._fallback
+
+        self.__members = members
+        self.__remainder = t
+        self.__invalidate()
+
+    def __is_mergeable(self, t):
+        if isinstance(t, GPTranslations):
+            return t._GPTranslations__cacheTimeout != 0
+        return type(t) in (GNUTranslations, NullTranslations)
+
+    def __invalidate(self):
+        self.__merged = None
+
+    def __get_merged(self):
+        """Returns the merged dictionary, rebuilding it if it was invalidated
+        or if one of the caches it was built from expired
+        """
+        merged = self.__merged
+        if merged is not None and (merged[1] is None or
+                                   datetime.datetime.now() < merged[1]):
+            return merged[0]
+
+        now = datetime.datetime.now()
+        recheck = now + datetime.timedelta(seconds=self.__RECHECK_SECONDS)
+        keysMap = {}
+        expiresAt = None
+
+        # merge from the last fallback to the first translation, so that the
+        # values of the first translations take precedence
+        for t in reversed(self.__members):
+            if isinstance(t, GPTranslations):
+                cachedMap = t._GPTranslations__get_cached_map()
+                if cachedMap:
+                    # GPTranslations fall back on empty values
+                    keysMap.update((key, value) for key, value in
+                                   cachedMap.items() if value)
+
+                expiry = t._GPTranslations__get_cache_expiry()
+                if expiry is not None:
+                    # a stale cache that is being refreshed in the background
+                    if expiry <= now:
+                        expiry = recheck
+                    if expiresAt is None or expiry < expiresAt:
+                        expiresAt = expiry
+            elif isinstance(t, GNUTranslations):
+                # plural forms are keyed by (message, index)
+                keysMap.update((key, value) for key, value in
+                               t._catalog.items()
+                               if not isinstance(key, tuple))
+
+        self.__merged = (keysMap, expiresAt)
+        return keysMap
+
+    def gettext(self, message):
+        """Returns the translated value of ``message`` from the first
+        translation of the chain that has it, the same as calling ``gettext``
+        on the chain itself
+        """
+        value = self.__get_merged().get(message, self.__MISSING)
+        if value is not self.__MISSING:
+            return value
+        if self.__remainder is not None:
+            return self.__remainder.gettext(message)
+        return message
+
+    def ngettext(self, msgid1, msgid2, n):
+        return self.__translations.ngettext(msgid1, msgid2, n)
+
+    def pgettext(self, context, message):
+        return self.__translations.pgettext(context, message)
+
+    def npgettext(self, context, msgid1, msgid2, n):
+        return self.__translations.npgettext(context, msgid1, msgid2, n)
+
+    def info(self):
+        return self.__translations.info()
+
+    def charset(self):
+        return self.__translations.charset()
+
+    def add_fallback(self, fallback):
+        """Adds ``fallback`` at the end of the chain"""
+        self.__translations.add_fallback(fallback)
+        self.__set_members()
@@ -0,0 +1,110 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import hmac
+import time
+from hashlib import sha1
+
+
+class GPHmacSigner():
+    """Signs the REST calls made to the Globalization Pipeline service with
+    the GaaS HMAC scheme (see ``GPClient.__get_gaas_hmac_headers``) for the
+    user ``userId`` whose password is ``secret``.
+
+    The keyed HMAC SHA1 state is prepared once, when the signer is created,
+    and copied for each message; the RFC1123 date is formatted at most once
+    per second, by all the signers.
+    """
+
+    __ENCODINGFORMAT = 'utf-8'
+
+    __AUTHORIZATION_HEADER_KEY = 'Authorization'
+    __DATE_HEADER_KEY = 'GP-Date'
+
+    __DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+    __MONTHS = (None, 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug',
+                'Sep', 'Oct', 'Nov', 'Dec')
+
+    # (second since the epoch, RFC1123 date) of the last formatted date
+    __date = (None, None)
+
+    __userId = None
+    __secret = None
+    __hmac = None
+    __authorizationPrefix = None
+
+    def __init__(self, userId, secret):
+        assert userId, 'userId is not set'
+        assert secret, 'secret is not set'
+
+        self.__userId = userId
+        self.__secret = secret
+        self.__hmac = hmac.new(secret.encode(self.__ENCODINGFORMAT),
+                               digestmod=sha1)
+        self.__authorizationPrefix = 'GP-HMAC ' + userId + ':'
+
+    def get_user_id(self):
+        """Return the user ID used by this signer"""
+        return self.__userId
+
+    def is_for(self, userId, secret):
+        """Returns ``True`` if this signer signs for ``userId`` with
+        ``secret``
+        """
+        return self.__userId == userId and self.__secret == secret
+
+    @classmethod
+    def get_date(cls, seconds=None):
+        """Returns the RFC1123 date (e.g. ``Mon, 30 Jun 2014 00:00:00 GMT``)
+        of ``seconds`` since the epoch, by default the current time
+        """
+        second = int(time.time() if seconds is None else seconds)
+        date = cls.__date
+        if date[0] == second:
+            return date[1]
+
+        t = time.gmtime(second)
+        formatted = '%s, %02d %s %04d %02d:%02d:%02d GMT' % (
+            cls.__DAYS[t.tm_wday], t.tm_mday, cls.__MONTHS[t.tm_mon],
+            t.tm_year, t.tm_hour, t.tm_min, t.tm_sec)
+        # replaced as a whole so that concurrent readers see a consistent
+        # pair
+        cls.__date = (second, formatted)
+        return formatted
+
+    def sign(self, method, url, body=None, date=None):
+        """Returns the ``Authorization`` and ``GP-Date`` headers of the
+        ``method`` call to ``url`` with ``body`` (``str`` or ``bytes``)
+        made at ``date``, by default the current time
+        """
+        if not date:
+            date = self.get_date()
+
+        messageHmac = self.__hmac.copy()
+        messageHmac.update((str(method) + '\n' + str(url) + '\n' +
+                            str(date) + '\n').encode(self.__ENCODINGFORMAT))
+        if body:
+            if not isinstance(body, bytes):
+                body = str(body).encode(self.__ENCODINGFORMAT)
+            messageHmac.update(body)
+
+        signature = base64.b64encode(messageHmac.digest()).decode(
+            self.__ENCODINGFORMAT)
+
+        return {
+            self.__AUTHORIZATION_HEADER_KEY:
+                self.__authorizationPrefix + signature,
+            self.__DATE_HEADER_KEY: str(date)
+        }
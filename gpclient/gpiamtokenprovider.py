@@ -0,0 +1,197 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+
+import requests
+
+from .gpsingleflight import GPSingleFlight
+from .gptransport import GPRequestsTransport, GPTransport
+
+
+class GPIamTokenProvider():
+    """Exchanges an IAM API key for bearer tokens, used by ``GPClient`` to
+    authenticate with IAM instead of sending the API key with every call::
+
+        provider = GPIamTokenProvider(acc.get_api_key())
+        client = GPClient(acc, tokenProvider=provider)
+
+    A token is cached, and reused, until ``expiryMargin`` seconds before it
+    expires. Once ``refreshFraction`` of its lifetime has passed it is
+    refreshed in the background, so that callers do not wait for the
+    exchange; concurrent refreshes share a single exchange.
+
+    ``url`` is the IAM token endpoint, and ``transport`` the ``GPTransport``
+    used to reach it; e.g. ``GPFakeServer.get_iam_url()`` and
+    ``GPFakeServer.get_transport()`` for a local stub. Connections to it time
+    out after ``connectTimeout`` seconds, and responses after
+    ``readTimeout`` seconds without receiving data (``None`` waits forever).
+    """
+
+    DEFAULT_URL = 'https://iam.cloud.ibm.com/identity/token'
+
+    __GRANT_TYPE = 'urn:ibm:params:oauth:grant-type:apikey'
+    __RESPONSE_ACCESS_TOKEN_KEY = 'access_token'
+    __RESPONSE_EXPIRES_IN_KEY = 'expires_in'
+
+    # seconds between background refreshes after one failed
+    __REFRESH_RETRY_SECONDS = 10
+
+    __apiKey = None
+    __url = None
+    __refreshFraction = 0.8
+    __expiryMargin = 60
+    __connectTimeout = 10
+    __readTimeout = 60
+    __transport = None
+    __ownTransport = False
+    __token = None
+    __flights = None
+    __refreshLock = None
+    __refreshing = False
+    __refreshFailedAt = None
+
+    def __init__(self, apiKey, url=DEFAULT_URL, refreshFraction=0.8,
+                 expiryMargin=60, transport=None, connectTimeout=10,
+                 readTimeout=60):
+        assert apiKey, 'apiKey is not set'
+        assert 0 < refreshFraction <= 1, \
+            'refreshFraction is not between 0 and 1: %s' % refreshFraction
+        assert transport is None or isinstance(transport, GPTransport), \
+            """transport is not of type GPTransport: %s""" % transport
+
+        self.__apiKey = apiKey
+        self.__url = url
+        self.__refreshFraction = refreshFraction
+        self.__expiryMargin = expiryMargin
+        self.__connectTimeout = connectTimeout
+        self.__readTimeout = readTimeout
+        self.__ownTransport = transport is None
+        self.__transport = transport if transport is not None else \
+            GPRequestsTransport(poolConnections=1, poolMaxsize=1)
+
+        # (access token, time to refresh it, time it can no longer be used)
+        self.__token = None
+        self.__flights = GPSingleFlight()
+        self.__refreshLock = threading.Lock()
+
+    def get_url(self):
+        """Return the IAM token endpoint"""
+        return self.__url
+
+    def close(self):
+        """Releases the connections held by the provider, unless its
+        transport was provided
+        """
+        if self.__ownTransport:
+            self.__transport.close()
+
+    def get_token(self, deadline=None):
+        """Returns a valid access token, exchanging the API key for a new one
+        if there is none. ``deadline`` is the time, in seconds since the
+        epoch, by which the exchange must complete, or
+        ``requests.exceptions.Timeout`` is raised.
+        """
+        token = self.__token
+        now = time.time()
+        if token is None or now >= token[2]:
+            return self.__flights.do_until(deadline, 'token',
+                                           self.__exchange, deadline)
+
+        if now >= token[1]:
+            self.__refresh_in_background()
+        return token[0]
+
+    def invalidate(self, accessToken=None):
+        """Discards the cached token, e.g. after it was rejected, unless it was
+        already replaced by a token other than ``accessToken``
+        """
+        token = self.__token
+        if token is not None and (accessToken is None or
+                                  token[0] == accessToken):
+            self.__token = None
+
+    def __refresh_in_background(self):
+        with self.__refreshLock:
+            if self.__refreshing or (self.__refreshFailedAt is not None and
+                time.time() - self.__refreshFailedAt <
+                    self.__REFRESH_RETRY_SECONDS):
+                return
+            self.__refreshing = True
+
+        thread = threading.Thread(target=self.__refresh,
+                                  name='GPIamTokenProvider')
+        thread.daemon = True
+        thread.start()
+
+    def __refresh(self):
+        try:
+            self.__flights.do('token', self.__exchange)
+            self.__refreshFailedAt = None
+        except Exception:
+            logging.warning('Unable to refresh the IAM token, the current '
+                            'one is used until it expires', exc_info=True)
+            self.__refreshFailedAt = time.time()
+        finally:
+            with self.__refreshLock:
+                self.__refreshing = False
+
+    def __exchange(self, deadline=None):
+        """``POST {url}``; exchanges the API key for a token, caches it and
+        returns the access token
+        """
+        startTime = time.time()
+        r = self.__transport.send('POST', self.__url,
+            headers={'Accept': 'application/json'},
+            data={'grant_type': self.__GRANT_TYPE,
+                  'apikey': self.__apiKey},
+            timeout=self.__get_timeout(deadline))
+
+        if r.status_code != requests.codes.ok:
+            raise requests.exceptions.HTTPError(
+                'IAM token exchange failed with HTTP status %s: %s' %
+                (r.status_code, r.text), response=r)
+
+        response = r.json()
+        accessToken = response[self.__RESPONSE_ACCESS_TOKEN_KEY]
+        expiresIn = float(response[self.__RESPONSE_EXPIRES_IN_KEY])
+
+        # short lived tokens keep part of their lifetime usable
+        expiryMargin = min(self.__expiryMargin, expiresIn / 10)
+        self.__token = (accessToken,
+                        startTime + expiresIn * self.__refreshFraction,
+                        startTime + expiresIn - expiryMargin)
+        logging.info('IAM token obtained, expires in %s seconds', expiresIn)
+        return accessToken
+
+    def __get_timeout(self, deadline):
+        """Returns the ``(connect, read)`` timeout of the exchange, shortened
+        to the time left before ``deadline``; raises
+        ``requests.exceptions.Timeout`` if the deadline passed
+        """
+        connectTimeout = self.__connectTimeout
+        readTimeout = self.__readTimeout
+
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout('deadline exceeded')
+            connectTimeout = remaining if connectTimeout is None else \
+                min(connectTimeout, remaining)
+            readTimeout = remaining if readTimeout is None else \
+                min(readTimeout, remaining)
+
+        return (connectTimeout, readTimeout)
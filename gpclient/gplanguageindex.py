@@ -0,0 +1,221 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from babel import Locale, UnknownLocaleError, localedata, negotiate_locale
+from babel.core import get_global
+
+try:
+    _STRING_TYPES = basestring
+except NameError:
+    # Python 3
+    _STRING_TYPES = str
+
+
+class GPLanguageIndex():
+    """Maps language codes (e.g. ``en_CA``, ``zh-tw``) to the closest
+    language avaliable in a bundle, ``languageIds``.
+
+    The index is built once per bundle: every CLDR locale sharing a language
+    subtag with one of the ``languageIds`` is resolved up front, so resolving
+    a language code is a dictionary lookup. Codes that are not in the index
+    are resolved on first use and then added to it.
+
+    If a code has no direct match, its CLDR parent locales are tried, e.g.
+    ``pt-AO`` matches ``pt-PT`` and ``en-AU`` matches ``en-001``.
+    """
+
+    # maximum number of codes resolved on first use that are added to the
+    # index, so that arbitrary input can not grow it indefinitely
+    __MAX_RESOLVED = 4096
+
+    __languageIds = None
+    __canonicalIds = None
+    __index = None
+    __resolved = 0
+    __lock = None
+
+    def __init__(self, languageIds):
+        self.__languageIds = list(languageIds)
+        self.__canonicalIds = dict((languageId.lower(), languageId)
+                                   for languageId in self.__languageIds)
+        self.__index = {}
+        self.__lock = threading.Lock()
+
+        languages = set(self.__get_language_subtag(languageId)
+                        for languageId in self.__languageIds)
+
+        candidates = set(self.__languageIds)
+        for identifier in localedata.locale_identifiers():
+            if identifier.split('_')[0] in languages:
+                candidates.add(identifier)
+                candidates.add(identifier.replace('_', '-'))
+
+        for candidate in candidates:
+            try:
+                self.__index[candidate.lower()] = self.__find_match(candidate)
+            except (ValueError, UnknownLocaleError):
+                pass
+
+    def get_language_ids(self):
+        """Return the bundle languages used by this index"""
+        return list(self.__languageIds)
+
+    def match(self, languageCode):
+        """Returns the bundle language closest to ``languageCode``, or
+        ``None`` if there is no match.
+
+        Raises ``ValueError`` if ``languageCode`` is not a valid code.
+        """
+        key = languageCode.lower()
+        try:
+            return self.__index[key]
+        except KeyError:
+            pass
+
+        match = self.__find_match(languageCode)
+
+        with self.__lock:
+            if self.__resolved < self.__MAX_RESOLVED:
+                self.__resolved += 1
+                self.__index[key] = match
+
+        return match
+
+    def negotiate(self, acceptLanguage):
+        """Returns the bundle language that best matches ``acceptLanguage``,
+        a list of language codes in order of preference or a string in the
+        format of the HTTP ``Accept-Language`` header, e.g.
+        ``fr-CA,fr;q=0.9,en;q=0.8``. Returns ``None`` if there is no match.
+        """
+        if isinstance(acceptLanguage, _STRING_TYPES):
+            languageCodes = self.__parse_accept_language(acceptLanguage)
+        else:
+            languageCodes = acceptLanguage
+
+        for languageCode in languageCodes:
+            try:
+                match = self.match(languageCode)
+            except (ValueError, UnknownLocaleError):
+                continue
+            if match:
+                return match
+
+        return None
+
+    def __parse_accept_language(self, acceptLanguage):
+        """Returns the language codes in ``acceptLanguage`` sorted by their
+        quality value
+        """
+        weightedCodes = []
+        for position, item in enumerate(acceptLanguage.split(',')):
+            parts = item.strip().split(';')
+            languageCode = parts[0].strip()
+            if not languageCode or languageCode == '*':
+                continue
+
+            quality = 1.0
+            for param in parts[1:]:
+                param = param.strip()
+                if param.startswith('q='):
+                    try:
+                        quality = float(param[2:])
+                    except ValueError:
+                        quality = 0.0
+
+            if quality > 0:
+                weightedCodes.append((-quality, position, languageCode))
+
+        return [languageCode for (_q, _p, languageCode) in
+                sorted(weightedCodes)]
+
+    def __get_language_subtag(self, languageCode):
+        return languageCode.replace('_', '-').split('-')[0].lower()
+
+    def __find_match(self, languageCode):
+        """Resolves ``languageCode``; tries its CLDR parent locales if it has
+        no direct match
+        """
+        match = self.__get_language_match(languageCode)
+        if match:
+            return self.__canonicalIds.get(match.lower(), match)
+
+        sep = '-' if '-' in languageCode else '_'
+        identifier = str(Locale.parse(languageCode, sep=sep))
+        parentExceptions = get_global('parent_exceptions')
+
+        while True:
+            parent = parentExceptions.get(identifier)
+            if not parent:
+                parent = identifier.rsplit('_', 1)[0]
+
+            # stop before the language only parent, which has already been
+            # tried by __get_language_match
+            if parent == identifier or parent == 'root' or '_' not in parent:
+                return None
+
+            match = self.__get_language_match(parent)
+            if match and match.lower() in self.__canonicalIds:
+                return self.__canonicalIds[match.lower()]
+
+            identifier = parent
+
+    def __get_language_match(self, languageCode):
+        """Compares ``languageCode`` to the bundle languages to find the
+        closest match and returns it, if a match is not found returns
+        ``None``.
+
+        e.g. if ``languageCode`` is ``en_CA`` and the bundle languages contain
+        ``en``, the return value will be ``en``
+        """
+        languageIds = self.__languageIds
+
+        # special case
+        if languageCode == 'zh':
+            return 'zh-Hans'
+
+        # this will take care of cases such as mapping en_CA to en
+        if '-' in languageCode:
+            match = negotiate_locale([languageCode], languageIds, sep='-')
+        else:
+            match = negotiate_locale([languageCode], languageIds)
+
+        if match:
+            return match
+
+        # handle other cases
+        if '-' in languageCode:
+            locale = Locale.parse(languageCode, sep='-')
+        else:
+            locale = Locale.parse(languageCode)
+
+        for languageId in languageIds:
+            if '-' not in languageId:
+                continue
+
+            # normalize the languageId
+            nLanguageId = Locale.parse(languageId, sep='-')
+
+            # 1. lang subtag must match
+            # 2. either script or territory subtag must match AND
+            #    one of them must not be None, i.e. do not allow None == None
+            if locale.language == nLanguageId.language and \
+                (((locale.script or nLanguageId.script) and
+                 (locale.script == nLanguageId.script)) or \
+                 (locale.territory or nLanguageId.territory) and
+                 (locale.territory == nLanguageId.territory)):
+                    return languageId
+
+        return None
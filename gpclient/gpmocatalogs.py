@@ -0,0 +1,300 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import json
+import logging
+import os
+import tempfile
+
+from gettext import GNUTranslations, NullTranslations
+
+from babel import Locale, UnknownLocaleError
+from babel.messages.catalog import Catalog
+from babel.messages.mofile import write_mo
+
+from .gplanguageindex import GPLanguageIndex
+from .gpsnapshotstore import replace
+
+
+class GPMoCatalogs():
+    """Compiles the languages of a Globalization Pipeline (GP) bundle into
+    GNU ``mo`` files, and loads them as ``gettext.GNUTranslations``, so that
+    translations can be obtained without contacting the GP service, e.g.
+    by exporting them when the application is deployed::
+
+        catalogs = GPMoCatalogs(localedir='locale', domain='messages')
+        catalogs.export(client, bundleId)
+
+    and then, at runtime, without a ``GPClient``::
+
+        t = catalogs.translation(languages=['fr_CA'])
+
+    The ``mo`` files are written to
+    ``{localedir}/{locale}/LC_MESSAGES/{domain}.mo``, i.e. the layout used by
+    `gettext.translation
+    <https://docs.python.org/2/library/gettext.html#gettext.translation>`_,
+    along with the ``Plural-Forms`` header of each language. The languages
+    of the bundle, and its source language, are recorded in
+    ``{localedir}/{domain}.gp.json``.
+    """
+
+    __MANIFEST_SUFFIX = '.gp.json'
+    __MANIFEST_BUNDLE_KEY = 'bundleId'
+    __MANIFEST_SRC_LANGUAGE_KEY = 'sourceLanguage'
+    __MANIFEST_LANGUAGES_KEY = 'languages'
+
+    __localedir = None
+    __domain = None
+    __manifest = None
+    __catalogs = None
+    __languageIndex = None
+
+    def __init__(self, localedir, domain):
+        self.__localedir = localedir
+        self.__domain = domain
+        self.__catalogs = {}
+
+    def get_localedir(self):
+        """Return the directory holding the ``mo`` files"""
+        return self.__localedir
+
+    def get_domain(self):
+        """Return the ``gettext`` domain of the ``mo`` files"""
+        return self.__domain
+
+    def get_language_ids(self):
+        """Returns the exported bundle languages"""
+        return list(self.__get_manifest()[self.__MANIFEST_LANGUAGES_KEY])
+
+    def get_bundle_id(self):
+        """Returns the id of the exported bundle, or ``None`` if no bundle
+        has been exported
+        """
+        return self.__get_manifest()[self.__MANIFEST_BUNDLE_KEY]
+
+    def get_source_language(self):
+        """Returns the source language of the exported bundle, or ``None``
+        if no bundle has been exported
+        """
+        return self.__get_manifest()[self.__MANIFEST_SRC_LANGUAGE_KEY]
+
+    def export(self, client, bundleId, languages=None):
+        """Fetches the languages of the bundle from the GP service using
+        ``client`` (a ``GPClient``) and writes them to ``mo`` files.
+
+        ``languages`` is the list of bundle languages to export; by default
+        all the languages of the bundle are exported. The source language is
+        always exported. Target languages only contain translated values,
+        untranslated keys fall back on the source language when loaded.
+
+        Returns a dictionary with the path of the ``mo`` file written for
+        each language.
+        """
+        bundleData = client._GPClient__get_bundle_data(bundleId)
+        if not bundleData:
+            logging.warning('Unable to get bundle <%s>', bundleId)
+            return {}
+
+        sourceLanguage = bundleData.get(
+            client._GPClient__RESPONSE_SRC_LANGUAGE_KEY)
+        targetLanguages = bundleData.get(
+            client._GPClient__RESPONSE_TARGET_LANGUAGES_KEY) or []
+        if languages is not None:
+            targetLanguages = [languageId for languageId in targetLanguages
+                               if languageId in languages]
+
+        paths = {}
+        localeNames = {}
+        for languageId in [sourceLanguage] + list(targetLanguages):
+            keysMap = client._GPClient__get_language_data(bundleId,
+                                                          languageId)
+            if keysMap is None:
+                logging.warning('Unable to get language <%s> of bundle '
+                                '<%s>, not exported', languageId, bundleId)
+                continue
+
+            localeName = self.__get_locale_name(languageId)
+            paths[languageId] = self.__write_mo(localeName, languageId,
+                                                keysMap)
+            localeNames[languageId] = localeName
+
+        self.__write_manifest({
+            self.__MANIFEST_BUNDLE_KEY: bundleId,
+            self.__MANIFEST_SRC_LANGUAGE_KEY: sourceLanguage
+                if sourceLanguage in localeNames else None,
+            self.__MANIFEST_LANGUAGES_KEY: localeNames
+        })
+
+        return paths
+
+    def translation(self, languages, fallback=None):
+        """Returns the ``Translations`` instance to be used for obtaining
+        translations from the exported ``mo`` files.
+
+        ``languages`` is the list of languages to use, with subsequent ones
+        being fallbacks; each one is matched to the closest exported
+        language, e.g. ``fr_CA`` uses ``fr``. The source language is used if
+        a value has not been translated to any of them, and then
+        ``fallback``, if provided, e.g. the ``Translations`` returned by
+        ``GPClient.translation`` for keys added after the export.
+
+        The ``mo`` files are read once; every ``Translations`` returned
+        shares their values.
+        """
+        languageIds = []
+        for language in languages:
+            try:
+                match = self.__get_language_index().match(language)
+            except (ValueError, UnknownLocaleError):
+                logging.warning('Invalid language code <%s>', language)
+                continue
+            if match and match not in languageIds:
+                languageIds.append(match)
+
+        sourceLanguage = self.get_source_language()
+        if sourceLanguage and sourceLanguage not in languageIds:
+            languageIds.append(sourceLanguage)
+
+        translations = None
+        for languageId in languageIds:
+            catalog = self.__get_catalog(languageId)
+            if catalog is None:
+                continue
+
+            # the parsed values are shared, the fallback chain is not
+            catalog = copy.copy(catalog)
+            if translations is None:
+                translations = catalog
+            else:
+                translations.add_fallback(catalog)
+
+        if translations is None:
+            translations = NullTranslations()
+        if fallback is not None:
+            translations.add_fallback(fallback)
+
+        return translations
+
+    def __get_language_index(self):
+        if self.__languageIndex is None:
+            self.__languageIndex = GPLanguageIndex(self.get_language_ids())
+        return self.__languageIndex
+
+    def __get_catalog(self, languageId):
+        """Returns the ``GNUTranslations`` of the language, reading its
+        ``mo`` file on first use
+        """
+        catalog = self.__catalogs.get(languageId)
+        if catalog is not None:
+            return catalog
+
+        localeName = self.__get_manifest()[
+            self.__MANIFEST_LANGUAGES_KEY].get(languageId)
+        if localeName is None:
+            return None
+
+        try:
+            with open(self.__get_mo_path(localeName), 'rb') as moFile:
+                catalog = GNUTranslations(moFile)
+        except (IOError, OSError):
+            logging.warning('Unable to read the mo file of language <%s>',
+                            languageId, exc_info=True)
+            return None
+
+        self.__catalogs[languageId] = catalog
+        return catalog
+
+    def __get_locale_name(self, languageId):
+        """Returns the ``gettext`` locale name of the bundle language, e.g.
+        ``es_MX`` for ``es-mx``
+        """
+        try:
+            return str(Locale.parse(languageId, sep='-'))
+        except (ValueError, UnknownLocaleError):
+            return languageId.replace('-', '_')
+
+    def __get_mo_path(self, localeName):
+        return os.path.join(self.__localedir, localeName, 'LC_MESSAGES',
+                            self.__domain + '.mo')
+
+    def __get_manifest_path(self):
+        return os.path.join(self.__localedir,
+                            self.__domain + self.__MANIFEST_SUFFIX)
+
+    def __get_manifest(self):
+        """Returns the languages recorded by the last export"""
+        if self.__manifest is None:
+            manifest = None
+            try:
+                with open(self.__get_manifest_path(), 'rb') as manifestFile:
+                    manifest = json.loads(manifestFile.read().decode('utf-8'))
+            except (IOError, OSError, ValueError):
+                logging.warning('Unable to read <%s>',
+                                self.__get_manifest_path())
+
+            if not manifest:
+                manifest = {self.__MANIFEST_BUNDLE_KEY: None,
+                            self.__MANIFEST_SRC_LANGUAGE_KEY: None,
+                            self.__MANIFEST_LANGUAGES_KEY: {}}
+            self.__manifest = manifest
+
+        return self.__manifest
+
+    def __write_mo(self, localeName, languageId, keysMap):
+        """Writes the key-value pairs of the language to its ``mo`` file and
+        returns its path
+        """
+        try:
+            locale = Locale.parse(languageId, sep='-')
+        except (ValueError, UnknownLocaleError):
+            locale = None
+
+        catalog = Catalog(locale=locale, domain=self.__domain,
+                          charset='utf-8')
+        for key, value in keysMap.items():
+            # untranslated values fall back on the next translations
+            if value:
+                catalog.add(key, value)
+
+        path = self.__get_mo_path(localeName)
+        self.__write_file(path, lambda f: write_mo(f, catalog))
+        return path
+
+    def __write_manifest(self, manifest):
+        data = json.dumps(manifest, ensure_ascii=False, indent=2,
+                          sort_keys=True).encode('utf-8')
+        self.__write_file(self.__get_manifest_path(), lambda f: f.write(data))
+
+        self.__manifest = manifest
+        self.__catalogs = {}
+        self.__languageIndex = None
+
+    def __write_file(self, path, write):
+        """Writes ``path`` atomically, so that processes reading it never
+        see a partially written file
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        (fd, tmpPath) = tempfile.mkstemp(dir=directory or None,
+                                         suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            replace(tmpPath, path)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
@@ -0,0 +1,198 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class GPResourceWriter():
+    """Buffers the resource entry updates made through
+    ``update_resource_entry`` and sends them, grouped by bundle and language,
+    with ``GPClient.update_resource_entries``, so that importing many keys
+    takes a few REST calls instead of one per key::
+
+        with GPResourceWriter(client) as writer:
+            futures = [writer.update_resource_entry('myBundle', 'fr', key,
+                data={'value': value}) for key, value in values.items()]
+        # the writer was flushed on exit
+        responses = [future.result() for future in futures]
+
+    The updates of a bundle and language are sent once ``maxBatchSize`` of
+    them are buffered, by the thread making the last one, or ``maxDelay``
+    seconds after the first one was buffered, by a background thread.
+    Updates of the same key are coalesced, the last one winning, and the
+    updates of a bundle and language are sent in order.
+
+    ``update_resource_entry`` returns a ``concurrent.futures.Future`` whose
+    result is the response of the grouped call that included the key (the
+    same as ``GPClient.update_resource_entry`` returns, e.g. an error
+    response if the GP service rejected the group), or whose exception is
+    the one raised by the call.
+
+    ``flush`` sends the buffered updates and waits for them; ``close``
+    (or leaving the ``with`` block) flushes and stops the background thread.
+    """
+
+    __client = None
+    __maxBatchSize = 200
+    __maxDelay = 1
+    __batches = None
+    __batchTimes = None
+    __sendLocks = None
+    __condition = None
+    __thread = None
+    __closed = False
+
+    def __init__(self, client, maxBatchSize=200, maxDelay=1):
+        assert maxBatchSize >= 1, 'maxBatchSize is less than 1: %s' % \
+            maxBatchSize
+
+        self.__client = client
+        self.__maxBatchSize = maxBatchSize
+        self.__maxDelay = maxDelay
+        # (bundleId, languageId) -> resourceKey -> (data, futures)
+        self.__batches = {}
+        # (bundleId, languageId) -> time its first update was buffered
+        self.__batchTimes = {}
+        # (bundleId, languageId) -> lock held while its updates are sent
+        self.__sendLocks = {}
+        self.__condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def update_resource_entry(self, bundleId, languageId, resourceKey,
+                              data=None):
+        """Buffers the update of ``resourceKey``, with ``data`` as in
+        ``GPClient.update_resource_entry``; returns the ``Future`` of its
+        response
+        """
+        assert not self.__closed, 'the writer is closed'
+
+        future = Future()
+        batchKey = (bundleId, languageId)
+        with self.__condition:
+            batch = self.__batches.get(batchKey)
+            if batch is None:
+                batch = OrderedDict()
+                self.__batches[batchKey] = batch
+                self.__batchTimes[batchKey] = time.time()
+                self.__sendLocks.setdefault(batchKey, threading.Lock())
+
+            # the previous update of the key, if any, is replaced
+            (_data, futures) = batch.pop(resourceKey, (None, []))
+            futures.append(future)
+            batch[resourceKey] = (data or {}, futures)
+            full = len(batch) >= self.__maxBatchSize
+
+            if self.__thread is None:
+                self.__start()
+            self.__condition.notify()
+
+        if full:
+            self.__flush_batch(batchKey)
+        return future
+
+    def flush(self):
+        """Sends every buffered update and waits for the responses"""
+        with self.__condition:
+            batchKeys = list(self.__batches)
+        for batchKey in batchKeys:
+            self.__flush_batch(batchKey)
+
+    def close(self):
+        """Flushes the buffered updates and stops the background thread"""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        if self.__thread is not None:
+            self.__thread.join()
+        self.flush()
+
+    def get_pending_count(self):
+        """Returns the number of buffered updates"""
+        with self.__condition:
+            return sum(len(batch) for batch in self.__batches.values())
+
+    def __start(self):
+        self.__thread = threading.Thread(target=self.__run,
+                                         name='GPResourceWriter')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __run(self):
+        """Sends the batches whose first update was buffered ``maxDelay``
+        seconds ago
+        """
+        while True:
+            with self.__condition:
+                if self.__closed:
+                    return
+
+                now = time.time()
+                dueKeys = [batchKey for batchKey, batchTime in
+                           self.__batchTimes.items()
+                           if now - batchTime >= self.__maxDelay]
+                if not dueKeys:
+                    timeout = None
+                    if self.__batchTimes:
+                        timeout = min(self.__batchTimes.values()) + \
+                            self.__maxDelay - now
+                    self.__condition.wait(timeout)
+                    continue
+
+            for batchKey in dueKeys:
+                self.__flush_batch(batchKey)
+
+    def __flush_batch(self, batchKey):
+        """Sends the buffered updates of ``(bundleId, languageId)``; the send
+        lock keeps the batches of a bundle and language in order
+        """
+        with self.__condition:
+            sendLock = self.__sendLocks.get(batchKey)
+        if sendLock is None:
+            return
+
+        with sendLock:
+            with self.__condition:
+                batch = self.__batches.pop(batchKey, None)
+                self.__batchTimes.pop(batchKey, None)
+            if batch:
+                self.__send(batchKey, batch)
+
+    def __send(self, batchKey, batch):
+        (bundleId, languageId) = batchKey
+        data = OrderedDict((resourceKey, entryData) for resourceKey,
+                           (entryData, _futures) in batch.items())
+        try:
+            response = self.__client.update_resource_entries(bundleId,
+                languageId, data=data)
+        except Exception as e:
+            logging.warning('Unable to update %d resource entries of bundle '
+                            '<%s> and language <%s>', len(batch), bundleId,
+                            languageId, exc_info=True)
+            for (_data, futures) in batch.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+
+        for (_data, futures) in batch.values():
+            for future in futures:
+                future.set_result(response)
@@ -0,0 +1,160 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import random
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+import requests
+
+
+class GPRetryPolicy():
+    """Decides whether, and when, ``GPClient`` retries a REST call that
+    failed with one of the ``statuses`` HTTP statuses (by default ``429``
+    and the ``5xx`` gateway and availability errors) or a connection error::
+
+        client = GPClient(acc, retryPolicy=GPRetryPolicy(maxAttempts=4))
+
+    ``methods`` maps each HTTP method that may be retried to its maximum
+    number of attempts; by default the idempotent ``GET``, ``PUT`` and
+    ``DELETE`` calls are attempted ``maxAttempts`` times and ``POST`` calls
+    only once.
+
+    The delay before attempt ``n + 1`` is a random value (full jitter)
+    between ``0`` and ``backoff * 2 ** (n - 1)`` seconds, capped at
+    ``maxBackoff``, unless the response has a ``Retry-After`` header, which
+    is honoured instead. No attempt is made once ``deadline`` seconds have
+    passed since the first one, or if its delay would exceed them.
+
+    Each attempt is a new call, signed again by ``GPClient``, and no attempt
+    is made past the deadline of the call, if it has one.
+    """
+
+    DEFAULT_METHODS = ('GET', 'PUT', 'DELETE')
+    DEFAULT_STATUSES = (429, 500, 502, 503, 504)
+
+    __RETRY_AFTER_HEADER_KEY = 'Retry-After'
+
+    __methods = None
+    __statuses = None
+    __backoff = 0.1
+    __maxBackoff = 5
+    __deadline = 10
+    __random = None
+
+    def __init__(self, maxAttempts=3, backoff=0.1, maxBackoff=5, deadline=10,
+                 methods=None, statuses=DEFAULT_STATUSES, seed=None):
+        assert maxAttempts >= 1, 'maxAttempts is less than 1: %s' % \
+            maxAttempts
+
+        if methods is None:
+            methods = dict((method, maxAttempts) for method in
+                           self.DEFAULT_METHODS)
+        self.__methods = dict((method.upper(), attempts) for method, attempts
+                              in methods.items())
+        self.__statuses = frozenset(statuses)
+        self.__backoff = backoff
+        self.__maxBackoff = maxBackoff
+        self.__deadline = deadline
+        self.__random = random.Random(seed)
+
+    def get_max_attempts(self, method):
+        """Returns the maximum number of attempts of a ``method`` call"""
+        return self.__methods.get(method.upper(), 1)
+
+    def get_deadline(self):
+        return self.__deadline
+
+    def is_retryable(self, response=None, error=None):
+        """Returns ``True`` if a call that obtained ``response``, or failed
+        with ``error``, may succeed if attempted again
+        """
+        if error is not None:
+            return isinstance(error, (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout))
+        return response is not None and \
+            response.status_code in self.__statuses
+
+    def get_delay(self, attempt, response=None):
+        """Returns the number of seconds to wait after the failed attempt
+        number ``attempt`` (starting at ``1``) that obtained ``response``
+        """
+        retryAfter = self.__get_retry_after(response)
+        if retryAfter is not None:
+            return retryAfter
+
+        backoff = min(self.__maxBackoff,
+                      self.__backoff * (2 ** (attempt - 1)))
+        return self.__random.uniform(0, backoff)
+
+    def __get_retry_after(self, response):
+        """Returns the seconds of the ``Retry-After`` header of ``response``,
+        ``None`` if it has none or it can not be parsed
+        """
+        if response is None:
+            return None
+        value = response.headers.get(self.__RETRY_AFTER_HEADER_KEY)
+        if not value:
+            return None
+
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0, mktime_tz(date) - time.time())
+
+    def call(self, method, send, deadline=None):
+        """Returns the response of ``send()``, the ``method`` call, making
+        new attempts while it fails with a retryable error; the error of the
+        last attempt is raised. ``deadline``, in seconds since the epoch, is
+        the time by which the call must complete.
+        """
+        startTime = time.time()
+        maxAttempts = self.get_max_attempts(method)
+        attempt = 1
+        while True:
+            response = None
+            error = None
+            try:
+                response = send()
+            except Exception as e:
+                error = e
+
+            if attempt >= maxAttempts or \
+                not self.is_retryable(response, error):
+                break
+
+            delay = self.get_delay(attempt, response)
+            if self.__deadline is not None and \
+                time.time() - startTime + delay > self.__deadline or \
+                deadline is not None and time.time() + delay > deadline:
+                logging.info('Not retrying the %s call, its deadline would '
+                             'be exceeded', method)
+                break
+
+            logging.info('Retrying the %s call in %.3f seconds, attempt %d '
+                         'failed with %s', method, delay, attempt,
+                         error if error is not None else
+                         response.status_code)
+            time.sleep(delay)
+            attempt += 1
+
+        if error is not None:
+            raise error
+        return response
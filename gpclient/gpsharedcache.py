@@ -0,0 +1,342 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import binascii
+import datetime
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+try:
+    from collections.abc import Mapping
+    from urllib.parse import quote, unquote
+except ImportError:
+    from collections import Mapping
+    from urllib import quote, unquote
+
+try:
+    _STRING_TYPES = basestring
+except NameError:
+    # Python 3
+    _STRING_TYPES = str
+
+from .gpsnapshotstore import replace
+
+
+class _GPSharedKeysMap(Mapping):
+    """Read-only mapping over a memory mapped hash table file.
+
+    Layout (little-endian): a header (magic, number of entries, number of
+    buckets), the buckets (offset of the entry, ``0`` if empty) and the
+    entries (hash, key length, value length, key, value). Keys and values are
+    UTF-8 encoded and looked up in place, so the key-value pairs are not
+    copied into each process.
+    """
+
+    MAGIC = b'GPMAP001'
+    HEADER = struct.Struct('<8sII')
+    BUCKET = struct.Struct('<I')
+    ENTRY = struct.Struct('<III')
+
+    # value length of a None value
+    NONE_LENGTH = 0xFFFFFFFF
+
+    def __init__(self, buffer, base=0):
+        (magic, count, buckets) = self.HEADER.unpack_from(buffer, base)
+        if magic != self.MAGIC:
+            raise ValueError('not a GP keys map')
+        self.__buffer = buffer
+        self.__base = base
+        self.__count = count
+        self.__buckets = buckets
+
+    @classmethod
+    def to_bytes(cls, keysMap):
+        """Returns the hash table file content for ``keysMap``"""
+        items = [(key.encode('utf-8'),
+                  None if value is None else value.encode('utf-8'))
+                 for key, value in keysMap.items()]
+
+        buckets = 8
+        while buckets < len(items) * 2:
+            buckets *= 2
+
+        offsets = [0] * buckets
+        entriesOffset = cls.HEADER.size + cls.BUCKET.size * buckets
+        entries = []
+        offset = entriesOffset
+        for key, value in items:
+            keyHash = zlib.crc32(key) & 0xFFFFFFFF
+            bucket = keyHash & (buckets - 1)
+            while offsets[bucket]:
+                bucket = (bucket + 1) & (buckets - 1)
+            offsets[bucket] = offset
+
+            valueLength = cls.NONE_LENGTH if value is None else len(value)
+            entry = cls.ENTRY.pack(keyHash, len(key), valueLength) + key + \
+                (value or b'')
+            entries.append(entry)
+            offset += len(entry)
+
+        return b''.join([cls.HEADER.pack(cls.MAGIC, len(items), buckets),
+                         struct.pack('<%dI' % buckets, *offsets)] + entries)
+
+    def get_bytes(self):
+        """Returns the hash table file content of this mapping"""
+        return self.__buffer[self.__base:]
+
+    def __read_entry(self, offset):
+        """Returns ``(hash, key, valueStart, valueLength)`` of the entry at
+        ``offset``; ``valueStart`` is relative to the start of the buffer
+        """
+        (keyHash, keyLength, valueLength) = self.ENTRY.unpack_from(
+            self.__buffer, self.__base + offset)
+        keyStart = self.__base + offset + self.ENTRY.size
+        return (keyHash, self.__buffer[keyStart:keyStart + keyLength],
+                keyStart + keyLength, valueLength)
+
+    def __read_value(self, valueStart, valueLength):
+        if valueLength == self.NONE_LENGTH:
+            return None
+        return self.__buffer[valueStart:valueStart +
+                             valueLength].decode('utf-8')
+
+    def __getitem__(self, key):
+        if not isinstance(key, _STRING_TYPES):
+            raise KeyError(key)
+
+        encodedKey = key.encode('utf-8')
+        keyHash = zlib.crc32(encodedKey) & 0xFFFFFFFF
+        mask = self.__buckets - 1
+        bucket = keyHash & mask
+        while True:
+            (offset,) = self.BUCKET.unpack_from(self.__buffer, self.__base +
+                self.HEADER.size + self.BUCKET.size * bucket)
+            if not offset:
+                raise KeyError(key)
+
+            (entryHash, entryKey, valueStart, valueLength) = \
+                self.__read_entry(offset)
+            if entryHash == keyHash and entryKey == encodedKey:
+                return self.__read_value(valueStart, valueLength)
+            bucket = (bucket + 1) & mask
+
+    def __iter__(self):
+        offset = self.HEADER.size + self.BUCKET.size * self.__buckets
+        for _i in range(self.__count):
+            (_hash, key, valueStart, valueLength) = self.__read_entry(offset)
+            yield key.decode('utf-8')
+            if valueLength == self.NONE_LENGTH:
+                valueLength = 0
+            offset = valueStart - self.__base + valueLength
+
+    def __len__(self):
+        return self.__count
+
+
+class GPSharedTranslationCache():
+    """A translation cache, used in place of ``GPTranslationCache``, whose
+    entries are shared by several processes, e.g. the workers of a pre-fork
+    server such as gunicorn or uWSGI::
+
+        cache = GPSharedTranslationCache('/var/run/gp-cache')
+        client = GPClient(acc, cache=cache)
+
+    Each entry is a hash table file in ``directory`` that every process maps
+    into memory, read-only, instead of holding its own copy of the key-value
+    pairs, along with the validators of the response they were obtained
+    from, so that any process can revalidate them. A refreshed entry is written to a new file that replaces the
+    previous one atomically; the ``GPTranslations`` of every process pick it
+    up when their own cached values expire, instead of contacting the GP
+    service.
+
+    Any process using the cache may refresh an entry, but the refreshing is
+    best left to a single process calling ``GPClient.refresh_cache``
+    periodically, more often than ``cacheTimeout``, so that the workers
+    never have to contact the GP service.
+    """
+
+    __SUFFIX = '.gpmap'
+    # timestamp, length of the validators that follow
+    __HEADER = struct.Struct('<dI')
+
+    __directory = None
+    __maps = None
+    __lock = None
+
+    def __init__(self, directory):
+        self.__directory = directory
+        # key -> (file identity, keysMap, timestamp, validators) of the
+        # mapped files
+        self.__maps = {}
+        self.__lock = threading.Lock()
+
+    def get_directory(self):
+        """Return the directory used by this ``GPSharedTranslationCache``"""
+        return self.__directory
+
+    def __get_path(self, key):
+        (instanceId, bundleId, languageId, fallback) = key
+        fileName = quote(languageId, safe='') + \
+            ('.fallback' if fallback else '') + self.__SUFFIX
+        return os.path.join(self.__directory, quote(instanceId, safe=''),
+                            quote(bundleId, safe=''), fileName)
+
+    def get(self, key):
+        """Returns the ``(keysMap, timestamp)`` cached for ``key``, or
+        ``None`` if it is not cached. ``keysMap`` is a read-only mapping; the
+        same one is returned until the entry is replaced.
+        """
+        entry = self.get_entry(key)
+        return None if entry is None else (entry[0], entry[1])
+
+    def get_entry(self, key):
+        """Returns the ``(keysMap, timestamp, validators)`` cached for
+        ``key``, or ``None`` if it is not cached
+        """
+        path = self.__get_path(key)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime, stat.st_size)
+
+        mapped = self.__maps.get(key)
+        if mapped is not None and mapped[0] == identity:
+            return mapped[1:]
+
+        try:
+            with open(path, 'rb') as mapFile:
+                # the mapping remains valid once the file is closed, or
+                # replaced
+                buffer = mmap.mmap(mapFile.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+            (seconds, validatorsLength) = self.__HEADER.unpack_from(buffer,
+                                                                   0)
+            mapStart = self.__HEADER.size + validatorsLength
+            validators = self.__from_bytes(
+                buffer[self.__HEADER.size:mapStart])
+            keysMap = _GPSharedKeysMap(buffer, mapStart)
+        except (IOError, OSError, ValueError, struct.error):
+            logging.warning('Unable to read the shared cache entry <%s>',
+                            path, exc_info=True)
+            return None
+
+        timestamp = datetime.datetime.fromtimestamp(seconds)
+        with self.__lock:
+            self.__maps[key] = (identity, keysMap, timestamp, validators)
+        return (keysMap, timestamp, validators)
+
+    def put(self, key, keysMap, timestamp, validators=None):
+        """Caches ``keysMap`` for ``key``; ``timestamp`` is the time at which
+        ``keysMap`` was obtained from the GP service, and ``validators`` the
+        ``(etag, lastModified, digest)`` of the response it came from
+        """
+        if isinstance(keysMap, _GPSharedKeysMap):
+            # e.g. revalidated, the hash table is written again as is
+            mapData = keysMap.get_bytes()
+        else:
+            mapData = _GPSharedKeysMap.to_bytes(keysMap)
+        validatorsData = self.__to_bytes(validators)
+        data = self.__HEADER.pack(time.mktime(timestamp.timetuple()) +
+            timestamp.microsecond / 1e6, len(validatorsData)) + \
+            validatorsData + mapData
+
+        path = self.__get_path(key)
+        directory = os.path.dirname(path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            (fd, tmpPath) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as mapFile:
+                    mapFile.write(data)
+                replace(tmpPath, path)
+            except BaseException:
+                os.remove(tmpPath)
+                raise
+        except (IOError, OSError):
+            logging.warning('Unable to write the shared cache entry <%s>',
+                            path, exc_info=True)
+
+    def __to_bytes(self, validators):
+        """Returns the stored form of ``validators``"""
+        if not validators:
+            return b''
+        (etag, lastModified, digest) = validators
+        return json.dumps([etag, lastModified,
+            binascii.hexlify(digest).decode('ascii') if digest else None]) \
+            .encode('utf-8')
+
+    def __from_bytes(self, data):
+        """Returns the validators stored as ``data``"""
+        if not data:
+            return None
+        (etag, lastModified, digest) = json.loads(data.decode('utf-8'))
+        return (etag, lastModified,
+                bytes(bytearray.fromhex(digest)) if digest else None)
+
+    def remove(self, key):
+        """Removes the entry cached for ``key``, if any"""
+        try:
+            os.remove(self.__get_path(key))
+        except OSError:
+            pass
+        with self.__lock:
+            self.__maps.pop(key, None)
+
+    def clear(self):
+        """Removes all the cached entries"""
+        for key in self.keys():
+            self.remove(key)
+
+    def keys(self):
+        """Returns the keys of the cached entries"""
+        keys = []
+        for dirPath, _dirNames, fileNames in os.walk(self.__directory):
+            relativePath = os.path.relpath(dirPath, self.__directory)
+            parts = relativePath.split(os.sep)
+            if len(parts) != 2:
+                continue
+            (instanceId, bundleId) = [unquote(part) for part in parts]
+            for fileName in fileNames:
+                if not fileName.endswith(self.__SUFFIX):
+                    continue
+                languageId = fileName[:-len(self.__SUFFIX)]
+                fallback = languageId.endswith('.fallback')
+                if fallback:
+                    languageId = languageId[:-len('.fallback')]
+                keys.append((instanceId, bundleId, unquote(languageId),
+                             fallback))
+        return keys
+
+    def get_size(self):
+        """Returns the size, in bytes, of the cached entries"""
+        size = 0
+        for key in self.keys():
+            try:
+                size += os.path.getsize(self.__get_path(key))
+            except OSError:
+                pass
+        return size
+
+    def __len__(self):
+        return len(self.keys())
@@ -0,0 +1,83 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import requests
+
+
+class _GPCall():
+    """An in-flight call made through ``GPSingleFlight``"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GPSingleFlight():
+    """Coalesces concurrent calls: while a call made with a given ``key`` is
+    in progress, callers using the same ``key`` wait for it to complete and
+    share its result (or its exception) instead of making the call again.
+
+    e.g. when many threads find the same cached language map expired at the
+    same time, only one of them downloads it from the GP service.
+    """
+
+    __lock = None
+    __calls = None
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        """Returns ``function(*args, **kwargs)``, unless a call with the same
+        ``key`` is already in progress, in which case its result is returned
+        once it completes
+        """
+        return self.do_until(None, key, function, *args, **kwargs)
+
+    def do_until(self, deadline, key, function, *args, **kwargs):
+        """Same as ``do``, but waits for a call already in progress only
+        until ``deadline``, in seconds since the epoch (``None`` waits until
+        it completes), then raises ``requests.exceptions.Timeout``
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            isLeader = call is None
+            if isLeader:
+                call = _GPCall()
+                self.__calls[key] = call
+
+        if not isLeader:
+            if deadline is None:
+                call.done.wait()
+            elif not call.done.wait(max(0, deadline - time.time())):
+                raise requests.exceptions.Timeout('deadline exceeded')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+        return call.result
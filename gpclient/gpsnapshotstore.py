@@ -0,0 +1,244 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import binascii
+import datetime
+import json
+import logging
+import os
+import tempfile
+import time
+
+try:
+    from os import replace
+except ImportError:
+    def replace(src, dst):
+        """``os.replace`` for Python 2, where ``os.rename`` replaces an
+        existing ``dst`` on POSIX systems only; elsewhere ``dst`` is removed
+        first, so the replacement is not atomic and readers may briefly find
+        no file
+        """
+        try:
+            os.rename(src, dst)
+        except OSError:
+            if not os.path.exists(dst):
+                raise
+            os.remove(dst)
+            os.rename(src, dst)
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+
+class GPSnapshotStore():
+    """Persists the key-value pairs fetched from the Globalization Pipeline
+    (GP) service to the local ``directory``, so that a new process can use
+    them immediately instead of waiting for the GP service, and can still use
+    them if the GP service can not be reached.
+
+    Each language is stored in its own compact JSON file,
+    ``{directory}/{instanceId}/{bundleId}/{languageId}.json``, along with the
+    time at which it was obtained and the validators (``ETag``,
+    ``Last-Modified``) needed to revalidate it. Files are replaced atomically
+    (on Python 2, on POSIX systems only), so several processes can share the
+    same ``directory``. A file is not written again if it holds the same
+    values, as last saved or loaded by this ``GPSnapshotStore``, e.g. when
+    they are revalidated; the time at which they were obtained is then not
+    updated, so a process loading them revalidates them sooner.
+
+    To use it, provide it to the client, e.g.
+    ``GPClient(acc, snapshotStore=GPSnapshotStore('/var/cache/gp'))``.
+    """
+
+    __TIMESTAMP_KEY = 'timestamp'
+    __ETAG_KEY = 'etag'
+    __LAST_MODIFIED_KEY = 'lastModified'
+    __DIGEST_KEY = 'digest'
+    __RESOURCE_STRINGS_KEY = 'resourceStrings'
+    __LANGUAGES_KEY = 'languages'
+
+    # file holding the avaliable languages of a bundle; language ids can not
+    # start with an underscore
+    __LANGUAGES_FILE_NAME = '_languages.json'
+
+    __directory = None
+    __saved = None
+
+    def __init__(self, directory):
+        self.__directory = directory
+        # path -> validators, or languages, of the values it holds
+        self.__saved = {}
+
+    def get_directory(self):
+        """Return the directory used by this ``GPSnapshotStore``"""
+        return self.__directory
+
+    def __get_bundle_dir(self, instanceId, bundleId):
+        return os.path.join(self.__directory, quote(instanceId, safe=''),
+                            quote(bundleId, safe=''))
+
+    def __get_path(self, key):
+        """Returns the path of the file for ``key``, i.e.
+        ``(instanceId, bundleId, languageId, fallback)``
+        """
+        (instanceId, bundleId, languageId, fallback) = key
+        fileName = quote(languageId, safe='') + \
+            ('.fallback' if fallback else '') + '.json'
+        return os.path.join(self.__get_bundle_dir(instanceId, bundleId),
+                            fileName)
+
+    def __get_languages_path(self, key):
+        """Returns the path of the file for ``key``, i.e.
+        ``(instanceId, bundleId)``
+        """
+        (instanceId, bundleId) = key
+        return os.path.join(self.__get_bundle_dir(instanceId, bundleId),
+                            self.__LANGUAGES_FILE_NAME)
+
+    def load(self, key):
+        """Returns ``(keysMap, timestamp, etag, lastModified, digest)`` stored
+        for ``key``, i.e. ``(instanceId, bundleId, languageId, fallback)``,
+        or ``None`` if there is no usable snapshot
+        """
+        snapshot = self.__read(self.__get_path(key))
+        if snapshot is None or \
+            not isinstance(snapshot.get(self.__RESOURCE_STRINGS_KEY), dict):
+            return None
+
+        digest = snapshot.get(self.__DIGEST_KEY)
+        loaded = (snapshot[self.__RESOURCE_STRINGS_KEY],
+                  self.__to_datetime(snapshot.get(self.__TIMESTAMP_KEY)),
+                  snapshot.get(self.__ETAG_KEY),
+                  snapshot.get(self.__LAST_MODIFIED_KEY),
+                  bytes(bytearray.fromhex(digest)) if digest else None)
+        if loaded[4]:
+            self.__saved[self.__get_path(key)] = loaded[2:]
+        return loaded
+
+    def save(self, key, keysMap, timestamp, etag=None, lastModified=None,
+             digest=None):
+        """Stores ``keysMap`` for ``key``; ``timestamp`` is the time at which
+        it was obtained from the GP service. Nothing is written if the stored
+        ``digest`` (the hash of the values) and validators are the same.
+        """
+        path = self.__get_path(key)
+        validators = (etag, lastModified, digest)
+        if digest and self.__saved.get(path) == validators and \
+            os.path.exists(path):
+            return
+
+        if self.__write(path, {
+            self.__TIMESTAMP_KEY: self.__to_seconds(timestamp),
+            self.__ETAG_KEY: etag,
+            self.__LAST_MODIFIED_KEY: lastModified,
+            self.__DIGEST_KEY: binascii.hexlify(digest).decode('ascii')
+                if digest else None,
+            self.__RESOURCE_STRINGS_KEY: keysMap
+        }) and digest:
+            self.__saved[path] = validators
+        else:
+            self.__saved.pop(path, None)
+
+    def load_languages(self, key):
+        """Returns ``(languages, timestamp)`` stored for ``key``, i.e.
+        ``(instanceId, bundleId)``, or ``None`` if there is no usable snapshot
+        """
+        path = self.__get_languages_path(key)
+        snapshot = self.__read(path)
+        if snapshot is None or \
+            not isinstance(snapshot.get(self.__LANGUAGES_KEY), list):
+            return None
+
+        self.__saved[path] = snapshot[self.__LANGUAGES_KEY]
+        return (snapshot[self.__LANGUAGES_KEY],
+                self.__to_datetime(snapshot.get(self.__TIMESTAMP_KEY)))
+
+    def save_languages(self, key, languages, timestamp):
+        """Stores the avaliable ``languages`` of the bundle for ``key``,
+        unless they are the same
+        """
+        path = self.__get_languages_path(key)
+        languages = list(languages)
+        if self.__saved.get(path) == languages and os.path.exists(path):
+            return
+
+        if self.__write(path, {
+            self.__TIMESTAMP_KEY: self.__to_seconds(timestamp),
+            self.__LANGUAGES_KEY: languages
+        }):
+            self.__saved[path] = languages
+        else:
+            self.__saved.pop(path, None)
+
+    def remove(self, key):
+        """Removes the snapshot stored for ``key``, if any"""
+        path = self.__get_path(key)
+        self.__saved.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def __read(self, path):
+        try:
+            with open(path, 'rb') as snapshotFile:
+                snapshot = json.loads(snapshotFile.read().decode('utf-8'))
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            logging.warning('Ignoring corrupted snapshot <%s>', path)
+            return None
+
+        return snapshot if isinstance(snapshot, dict) else None
+
+    def __write(self, path, snapshot):
+        """Writes ``snapshot`` to ``path``; returns ``True`` if it was
+        written
+        """
+        data = json.dumps(snapshot, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+        directory = os.path.dirname(path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            # write to a temporary file first so that readers never see a
+            # partially written snapshot
+            (fd, tmpPath) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as snapshotFile:
+                    snapshotFile.write(data)
+                replace(tmpPath, path)
+            except BaseException:
+                os.remove(tmpPath)
+                raise
+        except (IOError, OSError):
+            logging.warning('Unable to save snapshot <%s>', path,
+                            exc_info=True)
+            return False
+        return True
+
+    def __to_seconds(self, timestamp):
+        return time.mktime(timestamp.timetuple()) + \
+            timestamp.microsecond / 1e6
+
+    def __to_datetime(self, seconds):
+        try:
+            return datetime.datetime.fromtimestamp(seconds)
+        except (TypeError, ValueError, OverflowError, OSError):
+            # unknown age, revalidate it as soon as possible
+            return datetime.datetime.fromtimestamp(0)
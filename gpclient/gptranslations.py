@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import datetime
+import logging
 from gettext import NullTranslations
 
 class GPTranslations(NullTranslations):
@@ -24,6 +25,12 @@ class GPTranslations(NullTranslations):
     ; however, instead of using the translations in local ``mo`` files, it uses
     those provided by Globalization Pipeline (GP).
 
+    The values obtained from GP are shared with the other ``GPTranslations``
+    created by the same ``GPClient`` through the client's cache.
+
+    If the values can not be obtained from GP when the cache expires, the
+    previously obtained values continue to be used.
+
     NOTE: It is recommended that the ``GPTranslations`` constructor not be used
     directly - instead ``GPClient.translation`` or ``GPClient.gp_translation``
     should be used, which will create and return a ``GPTranslations`` instance.
@@ -36,12 +43,21 @@ class GPTranslations(NullTranslations):
     __cachedMap = {}
     __cacheMapTimestamp = None
 
-    def __init__(self, client, bundleId, languageId, cacheTimeout, fp=None):
+    __staleWhileRevalidate = False
+    __maxStaleness = None
+    __refreshListeners = None
+
+    def __init__(self, client, bundleId, languageId, cacheTimeout, fp=None,
+                 staleWhileRevalidate=False, maxStaleness=None):
         NullTranslations.__init__(self, fp=fp)
         self.__client = client
         self.__bundleId = bundleId
         self.__languageId = languageId
         self.__cacheTimeout = cacheTimeout
+        self.__staleWhileRevalidate = staleWhileRevalidate
+        self.__maxStaleness = cacheTimeout if maxStaleness is None \
+            else maxStaleness
+        self.__refreshListeners = []
 
     def gettext(self, message):
         """Contacts the GP service instance to find the translated value for
@@ -60,49 +76,203 @@ class GPTranslations(NullTranslations):
         * ``cacheTimeout > 0``, store cache value for specified number of \
             minutes
 
+        If ``staleWhileRevalidate`` is ``True``, an expired cache value is
+        still returned immediately while the cache is refreshed by a
+        background thread, unless it expired more than ``maxStaleness``
+        minutes ago (defaults to ``cacheTimeout``). Cache values loaded from
+        the client's snapshot store are always refreshed in the background.
         """
-        # cache forever or for specified time
-        if self.__cacheTimeout == -1 or self.__cacheTimeout > 0:
-            # get time passed since last cache
-            if self.__cacheMapTimestamp:
-                minutesPassed = (datetime.datetime.now() -
-                    self.__cacheMapTimestamp).total_seconds() / 60
+        cachedMap = self.__get_cached_map()
+
+        # check cache for message key
+        if cachedMap:
+            value = cachedMap.get(message)
+        else:
+            value = None
+
+        return self.__get_return_value(message, value)
 
-            # first call, or cache expired; initilize the cache
-            if not self.__cacheMapTimestamp or (self.__cacheTimeout != -1 and
-                minutesPassed >= self.__cacheTimeout):
+    def __get_cached_map(self):
+        """Returns the key-value pairs for the language, from the cache if
+        caching is enabled and the cache has not expired, from the GP service
+        otherwise.
 
-                # set sourceFallback True if there is no Translations fallback
-                sourceFallback = False if self._fallback else True
+        If ``staleWhileRevalidate`` is ``True``, an expired cache is still
+        returned while it is refreshed in the background, as long as it did
+        not expire more than ``maxStaleness`` minutes ago. The same applies,
+        regardless of its age, to a cache loaded from a snapshot.
+        """
+        # no caching, get the translated values directly from GP service
+        if not (self.__cacheTimeout == -1 or self.__cacheTimeout > 0):
+            return self.__get_keys_map()
 
-                self.__cachedMap = self.__client._GPClient__get_keys_map(
-                    self.__bundleId, self.__languageId, fallback=sourceFallback)
+        # start with the values already cached by the client, if any, and
+        # use the ones refreshed by another GPTranslations, or another
+        # process sharing the client's cache, once they expire
+        if not self.__cacheMapTimestamp or self.__is_expired():
+            self.__load_shared_cache()
+
+        # cache forever or for specified time
+        # get time passed since last cache
+        if self.__cacheMapTimestamp:
+            minutesPassed = (datetime.datetime.now() -
+                self.__cacheMapTimestamp).total_seconds() / 60
 
-                # only record the timestamp if caching is enabled
-                if self.__cacheTimeout != 0:
-                    self.__cacheMapTimestamp = datetime.datetime.now()
+        # first call, or cache expired; initilize the cache
+        if not self.__cacheMapTimestamp or (self.__cacheTimeout != -1 and
+            minutesPassed >= self.__cacheTimeout):
 
-            # check cache for message key
-            if self.__cachedMap:
-                value = self.__cachedMap.get(message)
+            if self.__cacheMapTimestamp and self.__cachedMap is not None and \
+                (self.__is_snapshot() or (self.__staleWhileRevalidate and
+                 minutesPassed < self.__cacheTimeout + self.__maxStaleness)):
+                self.__refresh_in_background()
+            elif self.__cachedMap:
+                self.__refresh_or_keep()
             else:
-                value = None
+                self.__set_cached_map(self.__get_keys_map())
 
-            return self.__get_return_value(message, value)
+        return self.__cachedMap
+
+    def __get_source_fallback(self):
+        """Returns ``True`` if source language values should be used when
+        translated values are not available
+        """
+        # set sourceFallback True if there is no Translations fallback
+        return False if self._fallback else True
+
+    def __get_keys_map(self):
+        """Gets the key-value pairs for the language from the GP service"""
+        return self.__client._GPClient__get_keys_map(
+            self.__bundleId, self.__languageId,
+            fallback=self.__get_source_fallback())
+
+    def __is_snapshot(self):
+        """Returns ``True`` if the cached map was loaded from the client's
+        snapshot store and has not been revalidated yet
+        """
+        return self.__client._GPClient__is_snapshot_keys_map(
+            self.__bundleId, self.__languageId,
+            fallback=self.__get_source_fallback())
+
+    def __refresh_or_keep(self):
+        """Refreshes the cache, keeping the previously obtained values, until
+        the cache expires again, if the GP service could not be reached
+        """
+        try:
+            cachedMap = self.__get_keys_map()
+        except Exception:
+            logging.warning('Unable to refresh cache for bundle <%s> and '
+                'language <%s>', self.__bundleId, self.__languageId,
+                exc_info=True)
+            cachedMap = None
+
+        if cachedMap is not None:
+            self.__set_cached_map(cachedMap)
         else:
-            # no caching, get the translated value directly from GP service
-            # set sourceFallback True if there is no Translations fallback
-            sourceFallback = False if self._fallback else True
-            tmpMap = self.__client._GPClient__get_keys_map(
-                self.__bundleId, self.__languageId, fallback=sourceFallback)
-
-            # check map for message key
-            if tmpMap:
-                value = tmpMap.get(message)
-            else:
-                value = None
+            logging.warning('Using the previously obtained values for '
+                'bundle <%s> and language <%s>', self.__bundleId,
+                self.__languageId)
+            self.__cacheMapTimestamp = datetime.datetime.now()
+
+    def __is_expired(self):
+        return self.__cacheTimeout != -1 and (datetime.datetime.now() -
+            self.__cacheMapTimestamp).total_seconds() / 60 >= \
+            self.__cacheTimeout
 
-            return self.__get_return_value(message, value)
+    def __load_shared_cache(self):
+        """Uses the key-value pairs cached by the client for the language,
+        if any, along with the time at which they were obtained, unless
+        they are not newer than the cached map
+        """
+        cached = self.__client._GPClient__get_cached_keys_map(
+            self.__bundleId, self.__languageId,
+            fallback=self.__get_source_fallback())
+        if cached is None:
+            return
+
+        if not self.__cacheMapTimestamp or (
+            cached[0] is not self.__cachedMap and
+            cached[1] > self.__cacheMapTimestamp):
+            (self.__cachedMap, self.__cacheMapTimestamp) = cached
+            for listener in self.__refreshListeners:
+                listener()
+
+    def __is_cached(self):
+        """Uses the key-value pairs cached by the client for the language, if
+        any; returns ``True`` if caching is enabled and the cached map has
+        not expired, i.e. it does not have to be obtained from the GP service
+        """
+        if not (self.__cacheTimeout == -1 or self.__cacheTimeout > 0):
+            return False
+
+        if not self.__cacheMapTimestamp or self.__is_expired():
+            self.__load_shared_cache()
+
+        return self.__cacheMapTimestamp is not None and \
+            not self.__is_expired()
+
+    def __refresh_in_background(self):
+        """Starts refreshing the cache in a background thread, unless the
+        client is already refreshing it, for this or another
+        ``GPTranslations``, or failed to recently. The other
+        ``GPTranslations`` pick up the refreshed values from the client's
+        cache.
+        """
+        self.__client._GPClient__refresh_in_background(self.__bundleId,
+            self.__languageId, self.__get_source_fallback(), self.__refresh)
+
+    def __refresh(self):
+        """Refreshes the cache and returns ``True``; the stale values are
+        kept, and ``False`` returned, if the GP service could not be reached
+        """
+        try:
+            cachedMap = self.__get_keys_map()
+        except Exception:
+            logging.warning('Unable to refresh cache for bundle <%s> and '
+                'language <%s>', self.__bundleId, self.__languageId,
+                exc_info=True)
+            return False
+
+        if cachedMap is None:
+            return False
+
+        self.__set_cached_map(cachedMap)
+        return True
+
+    def __set_cached_map(self, cachedMap):
+        """Replaces the cached map with ``cachedMap``, which was just
+        obtained from the GP service
+        """
+        self.__cachedMap = cachedMap
+
+        # only record the timestamp if caching is enabled
+        if self.__cacheTimeout != 0:
+            self.__cacheMapTimestamp = datetime.datetime.now()
+
+            # share the values with the other GPTranslations of the client
+            if cachedMap is not None:
+                self.__client._GPClient__put_cached_keys_map(
+                    self.__bundleId, self.__languageId,
+                    self.__get_source_fallback(), cachedMap,
+                    self.__cacheMapTimestamp)
+
+        for listener in self.__refreshListeners:
+            listener()
+
+    def __add_refresh_listener(self, listener):
+        """Calls ``listener`` every time the cached map is replaced"""
+        self.__refreshListeners.append(listener)
+
+    def __get_cache_expiry(self):
+        """Returns the time at which the cached map expires, or ``None`` if
+        it never expires
+        """
+        if self.__cacheTimeout == -1:
+            return None
+        if not self.__cacheMapTimestamp:
+            return datetime.datetime.now()
+        return self.__cacheMapTimestamp + \
+            datetime.timedelta(minutes=self.__cacheTimeout)
 
     def __get_return_value(self, messageKey, value):
         """Determines the return value; used to prevent code duplication """
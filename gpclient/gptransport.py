@@ -0,0 +1,81 @@
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class GPTransport():
+    """Sends the REST calls made by ``GPClient`` to the Globalization
+    Pipeline (GP) service. ``GPClient`` signs the calls (authentication
+    headers) and processes the responses; the transport only delivers them.
+
+    Transports must implement ``send``; ``GPRequestsTransport`` is the one
+    used by default, and ``GPFakeServer.get_transport`` provides one that
+    answers the calls in-process.
+    """
+
+    def send(self, method, url, params=None, headers=None, auth=None,
+             data=None, timeout=None):
+        """Sends the ``method`` (``GET``, ``PUT``, ``POST`` or ``DELETE``)
+        request to ``url`` and returns the ``requests.Response``.
+        ``auth`` is the ``(userId, password)`` for HTTP Basic Access
+        authentication, if it is used. ``timeout`` is the ``(connect, read)``
+        timeout in seconds, as in ``requests``; a
+        ``requests.exceptions.Timeout`` is raised when it expires.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """Releases the resources held by the transport"""
+        pass
+
+
+class GPRequestsTransport(GPTransport):
+    """Sends the REST calls through a `requests.Session
+    <https://requests.readthedocs.io/en/latest/user/advanced/#session-objects>`_
+    so that connections are kept alive and reused.
+
+    * ``poolConnections``, the number of per host connection pools to keep
+    * ``poolMaxsize``, the maximum number of connections kept per host
+    """
+
+    __session = None
+
+    def __init__(self, poolConnections=10, poolMaxsize=10):
+        self.__session = self.__create_session(poolConnections, poolMaxsize)
+
+    def __create_session(self, poolConnections, poolMaxsize):
+        """Returns a ``requests.Session`` whose connection pool is sized with
+        ``poolConnections`` and ``poolMaxsize``
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolConnections,
+                              pool_maxsize=poolMaxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get_session(self):
+        """Return the ``requests.Session`` used by this transport"""
+        return self.__session
+
+    def send(self, method, url, params=None, headers=None, auth=None,
+             data=None, timeout=None):
+        return self.__session.request(method, url, params=params,
+                                      headers=headers, auth=auth, data=data,
+                                      timeout=timeout)
+
+    def close(self):
+        self.__session.close()
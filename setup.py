@@ -19,7 +19,11 @@ setup(
     license='Apache License Version 2.0',
     keywords='client globalization pipline ibm bluemix',
     packages=['gpclient'],
-    install_requires=["requests", "babel", "dateutils"],
+    install_requires=["requests", "babel", "dateutils",
+                      "futures; python_version < '3'"],
+    extras_require={
+        'async': ["aiohttp"],
+    },
     test_suite="test",
 
     # https://pypi.python.org/pypi?%3Aaction=list_classifiers
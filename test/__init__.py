@@ -13,4 +13,15 @@
 # limitations under the License.
 
 from test import common, test_gptranslations, test_gpserviceaccount, \
-    test_gpclient
+    test_gpclient, test_gpsingleflight, test_gpcache, \
+    test_gplanguageindex, test_gpflattranslations, test_gpsnapshotstore, \
+    test_gpmocatalogs, test_gpsharedcache, \
+    test_gpfakeserver, test_gphmacsigner, test_gpiamtokenprovider, \
+    test_gpretrypolicy, test_gpcircuitbreaker, test_gpresourcewriter, \
+    test_gpbundleexporter
+
+try:
+    from test import test_gpasyncclient
+except SyntaxError:
+    # AsyncGPClient requires Python 3.5+
+    pass
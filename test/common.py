@@ -19,7 +19,7 @@ import logging
 import os
 import unittest
 
-from gpclient import GPServiceAccount, GPClient
+from gpclient import GPServiceAccount, GPClient, GPFakeServer
 
 
 def __get_reader_credentials():
@@ -89,6 +89,30 @@ except:
 bundleId1 = "gpclient-test-1"
 bundleId2 = "gpclient-test-2"
 
+# run the tests against a local fake GP service instead, e.g. on a CI box
+# without access to the GP service
+if 'True' == os.environ.get('GP_FAKE_SERVER', 'False'):
+    fakeServer = GPFakeServer(instanceId='fake-instance',
+                              userId='fake-admin', password='fake-password')
+    # the bundles described in test/README.md
+    with open('test/data/gpclient-test-1-msgs.json') as msgsFile:
+        fakeServer.add_bundle(bundleId1, 'en', {
+            'en': json.load(msgsFile),
+            'fr': {'greet': 'Salut', 'weather': 'Il neige'},
+            'es-mx': {'greet': 'Salut', 'weather': 'Il neige'}})
+    with open('test/data/gpclient-test-2-msgs.json') as msgsFile:
+        fakeServer.add_bundle(bundleId2, 'en', {
+            'en': json.load(msgsFile),
+            'fr': {'exit': u'Au revoir', 'show': u'Le Fil'}})
+    fakeServer.start()
+    url = fakeServer.get_url()
+    instanceId = fakeServer.get_instance_id()
+    adminUserId = 'fake-admin'
+    adminPassword = 'fake-password'
+    c = __get_reader_credentials()
+    userId = c['user']['id']
+    password = c['user']['password']
+
 skipIfIamTestDisabled = unittest.skipIf(
     'True' == os.environ.get('IAM_TEST_DISABLED', 'True'), 'IAM tests disabled. Set IAM_TEST_DISABLED=False to run them.')
 
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from babel.messages.pofile import read_po
+
+from gpclient import GPBundleExporter, GPClient, GPFakeServer
+from test import common
+
+
+class TestGPBundleExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = GPFakeServer()
+        self.server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello "%s"\n', 'bye': 'Bye & <see you>'},
+            'fr': {'greet': u'Bonjour «%s»\n'},
+            'de': {'greet': 'Hallo', 'bye': 'Tschüss'}})
+        self.server.add_bundle(common.bundleId2, 'en', {
+            'en': {'key': 'value'}})
+        self.client = GPClient(self.server.get_service_account(),
+                               transport=self.server.get_transport())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def export(self, format, **kwargs):
+        exporter = GPBundleExporter(self.directory, format)
+        report = exporter.export(self.client, **kwargs)
+        for item in report:
+            common.my_assert_equal(self, None, item['error'],
+                'unexpected error exporting %s' % item)
+        return (exporter, report)
+
+    #@unittest.skip("skipping")
+    def test_json(self):
+        """Verify every language of every bundle is exported as JSON"""
+        (exporter, report) = self.export(GPBundleExporter.JSON)
+
+        common.my_assert_equal(self, 4, len(report),
+            'incorrect number of languages exported')
+        path = exporter.get_path(common.bundleId1, 'fr')
+        with io.open(path, encoding='utf-8') as f:
+            common.my_assert_equal(self, {'greet': u'Bonjour «%s»\n'},
+                json.load(f), 'incorrect exported values')
+        with io.open(exporter.get_path(common.bundleId2, 'en'),
+                     encoding='utf-8') as f:
+            common.my_assert_equal(self, {'key': 'value'}, json.load(f),
+                'incorrect exported values')
+
+    #@unittest.skip("skipping")
+    def test_nothing_retained(self):
+        """Verify the exported bundles are not kept by the client"""
+        self.export(GPBundleExporter.JSON)
+
+        common.my_assert_equal(self, {}, self.client._GPClient__validators,
+            'the exported resource strings should not be kept')
+        common.my_assert_equal(self, 0, len(self.client._GPClient__cache),
+            'the exported resource strings should not be cached')
+
+    #@unittest.skip("skipping")
+    def test_po(self):
+        """Verify the po files have the source and translated values of
+        each key, and that only the requested languages are exported
+        """
+        (exporter, report) = self.export(GPBundleExporter.PO,
+            bundles=[common.bundleId1], languages=['fr'])
+
+        common.my_assert_equal(self, ['en', 'fr'],
+            sorted(item['languageId'] for item in report),
+            'incorrect languages exported')
+        self.assertFalse(os.path.exists(
+            exporter.get_path(common.bundleId1, 'de')))
+
+        with open(exporter.get_path(common.bundleId1, 'fr'), 'rb') as f:
+            catalog = read_po(f)
+        greet = catalog.get('Hello "%s"\n', context='greet')
+        common.my_assert_equal(self, u'Bonjour «%s»\n', greet.string,
+            'incorrect translated value')
+        bye = catalog.get('Bye & <see you>', context='bye')
+        common.my_assert_equal(self, '', bye.string,
+            'untranslated key is not empty')
+
+    #@unittest.skip("skipping")
+    def test_xliff(self):
+        """Verify the XLIFF files are well formed and have a trans-unit
+        for each key
+        """
+        (exporter, _report) = self.export(GPBundleExporter.XLIFF,
+            bundles=[common.bundleId1])
+
+        namespace = '{urn:oasis:names:tc:xliff:document:1.2}'
+        root = ElementTree.parse(
+            exporter.get_path(common.bundleId1, 'de')).getroot()
+        fileElement = root.find(namespace + 'file')
+        common.my_assert_equal(self, 'de',
+            fileElement.get('target-language'), 'incorrect target language')
+        units = dict((unit.get('id'), (unit.findtext(namespace + 'source'),
+                                       unit.findtext(namespace + 'target')))
+                     for unit in fileElement.iter(namespace + 'trans-unit'))
+        common.my_assert_equal(self, {
+            'bye': ('Bye & <see you>', u'Tschüss'),
+            'greet': ('Hello "%s"\n', 'Hallo')}, units,
+            'incorrect trans-units')
+
+    #@unittest.skip("skipping")
+    def test_errors(self):
+        """Verify the bundles that can not be exported are reported, and that
+        the files previously exported are kept
+        """
+        (exporter, _report) = self.export(GPBundleExporter.JSON,
+            bundles=[common.bundleId2])
+        path = exporter.get_path(common.bundleId2, 'en')
+
+        self.server.fail_next(100, status=500)
+        report = exporter.export(self.client,
+            bundles=['unknownBundle', common.bundleId2])
+        common.my_assert_equal(self, [None, None],
+            [item['path'] for item in report], 'errors were not reported')
+        with io.open(path, encoding='utf-8') as f:
+            common.my_assert_equal(self, {'key': 'value'}, json.load(f),
+                'previous export was not kept')
+        common.my_assert_equal(self, [path], [os.path.join(
+            os.path.dirname(path), name)
+            for name in os.listdir(os.path.dirname(path))],
+            'temporary files were left')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import unittest
+
+from gpclient import GPClient, GPTranslationCache, GPTranslations
+from test import common
+
+
+class TestGPTranslationCache(unittest.TestCase):
+
+    def get_key(self, languageId):
+        return (common.instanceId, common.bundleId1, languageId, True)
+
+    #@unittest.skip("skipping")
+    def test_get_put(self):
+        """Verify cached values are returned with their timestamp"""
+        cache = GPTranslationCache()
+        now = datetime.datetime.now()
+
+        self.assertIsNone(cache.get(self.get_key('fr')))
+
+        cache.put(self.get_key('fr'), {'greet': 'Salut'}, now)
+
+        common.my_assert_equal(self, ({'greet': 'Salut'}, now),
+            cache.get(self.get_key('fr')), 'incorrect cached entry')
+        common.my_assert_equal(self, ({'greet': 'Salut'}, now, None),
+            cache.get_entry(self.get_key('fr')), 'incorrect cached entry')
+
+        cache.remove(self.get_key('fr'))
+        self.assertIsNone(cache.get(self.get_key('fr')))
+        common.my_assert_equal(self, 0, cache.get_size(),
+            'size should be 0 once the cache is empty')
+
+    #@unittest.skip("skipping")
+    def test_lru_eviction(self):
+        """Verify the least recently used entries are evicted once the
+        maximum size is exceeded
+        """
+        now = datetime.datetime.now()
+        keysMap = dict(('key%d' % i, 'value%d' % i) for i in range(100))
+
+        cache = GPTranslationCache()
+        cache.put(self.get_key('fr'), keysMap, now)
+        entrySize = cache.get_size()
+
+        cache = GPTranslationCache(maxSize=entrySize * 2)
+        cache.put(self.get_key('fr'), dict(keysMap), now)
+        cache.put(self.get_key('es'), dict(keysMap), now)
+
+        # use 'fr' so that 'es' becomes the least recently used entry
+        cache.get(self.get_key('fr'))
+        cache.put(self.get_key('de'), dict(keysMap), now)
+
+        common.my_assert_equal(self, 2, len(cache),
+            'incorrect number of cached entries')
+        self.assertIsNone(cache.get(self.get_key('es')),
+            'least recently used entry was not evicted')
+        self.assertIsNotNone(cache.get(self.get_key('fr')))
+        self.assertIsNotNone(cache.get(self.get_key('de')))
+        self.assertTrue(cache.get_size() <= entrySize * 2)
+
+    #@unittest.skip("skipping")
+    def test_validators(self):
+        """Verify the validators are kept with the cached values, until they
+        are replaced or evicted
+        """
+        now = datetime.datetime.now()
+        keysMap = {'greet': 'Salut'}
+        validators = ('"etag"', None, b'digest')
+        cache = GPTranslationCache(maxSize=1)
+
+        cache.put(self.get_key('fr'), keysMap, now, validators=validators)
+        common.my_assert_equal(self, (keysMap, now, validators),
+            cache.get_entry(self.get_key('fr')), 'incorrect cached entry')
+
+        # revalidated values keep their size
+        size = cache.get_size()
+        cache.put(self.get_key('fr'), keysMap, now, validators=validators)
+        common.my_assert_equal(self, size, cache.get_size(),
+            'incorrect size')
+
+        cache.put(self.get_key('es'), {'greet': 'Hola'}, now)
+        self.assertIsNone(cache.get_entry(self.get_key('fr')),
+            'evicted entry was returned')
+        common.my_assert_equal(self, None,
+            cache.get_entry(self.get_key('es'))[2], 'incorrect validators')
+
+    #@unittest.skip("skipping")
+    def test_shared_between_translations(self):
+        """Verify new GPTranslations instances use the client's cache"""
+        acc = common.get_gpserviceaccount()
+        cache = GPTranslationCache()
+        client = GPClient(acc, cache=cache)
+
+        cache.put((acc.get_instance_id(), common.bundleId1, 'fr', True),
+            {'greet': 'Salut'}, datetime.datetime.now())
+
+        t = GPTranslations(client=client, bundleId=common.bundleId1,
+            languageId='fr', cacheTimeout=10)
+
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect translated value - should have used the shared cache')
+
+if __name__ == '__main__':
+    unittest.main()
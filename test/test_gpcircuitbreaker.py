@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import time
+import unittest
+
+import requests
+
+from gpclient import GPCircuitBreaker, GPCircuitOpenError, GPClient, \
+    GPFakeServer
+from test import common
+
+
+class TestGPCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GPFakeServer()
+        self.server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello'}, 'fr': {'greet': 'Salut'}})
+        self.breaker = GPCircuitBreaker(failureThreshold=2,
+                                        resetTimeout=0.2)
+        self.client = GPClient(self.server.get_service_account(),
+                               transport=self.server.get_transport(),
+                               circuitBreaker=self.breaker)
+        self.endpoint = 'http://gp.fake.invalid'
+
+    def expire(self, t):
+        t._GPTranslations__cacheMapTimestamp = datetime.datetime.now() - \
+            datetime.timedelta(minutes=20)
+
+    #@unittest.skip("skipping")
+    def test_open_and_recover(self):
+        """Verify the circuit opens after consecutive failures, serves the
+        last values while open, and closes after a successful probe
+        """
+        t = self.client.translation(bundleId=common.bundleId1,
+                                    languages=['fr'])
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect translated value')
+
+        self.server.fail_next(count=2, status=503)
+        self.client.get_bundles()
+        common.my_assert_equal(self, GPCircuitBreaker.CLOSED,
+            self.breaker.get_state(self.endpoint), 'circuit should be closed')
+        self.client.get_bundles()
+        common.my_assert_equal(self, GPCircuitBreaker.OPEN,
+            self.breaker.get_state(self.endpoint), 'circuit should be open')
+
+        # calls fail fast, expired translations keep their values
+        self.server.clear_requests()
+        self.assertRaises(GPCircuitOpenError, self.client.get_bundles)
+        self.expire(t)
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'the last values were not kept')
+        common.my_assert_equal(self, [], self.server.get_requests(),
+            'no call should reach the service')
+
+        # a failed probe opens the circuit again
+        time.sleep(0.2)
+        common.my_assert_equal(self, GPCircuitBreaker.HALF_OPEN,
+            self.breaker.get_state(self.endpoint),
+            'circuit should be half-open')
+        self.server.fail_next(count=1, status=None)
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          self.client.get_bundles)
+        common.my_assert_equal(self, GPCircuitBreaker.OPEN,
+            self.breaker.get_state(self.endpoint), 'circuit should be open')
+
+        time.sleep(0.2)
+        common.my_assert_equal(self, [common.bundleId1],
+            self.client.get_bundles(), 'the probe should succeed')
+        common.my_assert_equal(self, {}, self.breaker.get_states(),
+            'circuit should be closed')
+
+    #@unittest.skip("skipping")
+    def test_open_with_expired_languages(self):
+        """Verify translations are created from the cached bundle languages
+        while the circuit is open, even once they expired
+        """
+        client = GPClient(self.server.get_service_account(),
+                          transport=self.server.get_transport(),
+                          circuitBreaker=self.breaker, bundleCacheTimeout=1)
+        t = client.translation(bundleId=common.bundleId1, languages=['fr'])
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect translated value')
+
+        self.server.fail_next(count=2, status=503)
+        client.get_bundles()
+        client.get_bundles()
+        common.my_assert_equal(self, GPCircuitBreaker.OPEN,
+            self.breaker.get_state(self.endpoint), 'circuit should be open')
+
+        # expire the cached bundle languages
+        (languages, _timestamp) = \
+            client._GPClient__bundleLanguages[common.bundleId1]
+        client._GPClient__bundleLanguages[common.bundleId1] = (languages,
+            datetime.datetime.now() - datetime.timedelta(minutes=20))
+
+        t = client.translation(bundleId=common.bundleId1, languages=['fr'])
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'the cached languages and values were not used')
+
+        # without cached languages, the error is raised
+        self.assertRaises(GPCircuitOpenError, client.translation,
+                          bundleId=common.bundleId2, languages=['fr'])
+
+    #@unittest.skip("skipping")
+    def test_slow_calls(self):
+        """Verify slow responses count as failures, and client errors do
+        not
+        """
+        breaker = GPCircuitBreaker(failureThreshold=2, slowCallSeconds=0.05)
+        client = GPClient(self.server.get_service_account(),
+                          transport=self.server.get_transport(),
+                          circuitBreaker=breaker)
+
+        client.get_avaliable_languages('unknownBundle')
+        client.get_avaliable_languages('unknownBundle')
+        common.my_assert_equal(self, {}, breaker.get_states(),
+            'client errors should not open the circuit')
+
+        self.server.set_latency(0.1)
+        client.get_bundles()
+        client.get_bundles()
+        common.my_assert_equal(self, GPCircuitBreaker.OPEN,
+            breaker.get_states()[self.endpoint]['state'],
+            'slow calls should open the circuit')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,9 +15,16 @@
 # limitations under the License.
 
 
+import datetime
+import json
+import os
+import tempfile
+import time
 import unittest
 
-from gpclient import GPClient
+import requests
+
+from gpclient import GPClient, GPFakeServer
 from test import common
 
 
@@ -106,6 +113,55 @@ class TestGPClient(unittest.TestCase):
         common.my_assert_equal(self, u'Le Fil', value,
             'incorrect translated value')
     
+    #@unittest.skip("skipping")
+    def test_conditional_get(self):
+        """Verify cached language data is revalidated rather than downloaded
+        and parsed again, and downloaded again once it changed
+        """
+        server = GPFakeServer()
+        server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello'}, 'fr': {'greet': 'Salut'}})
+        client = GPClient(server.get_service_account(),
+                          transport=server.get_transport())
+        get_keys_map = client._GPClient__get_keys_map
+
+        # record the status of every response that is parsed
+        parsed = []
+        process = client._GPClient__process_gprest_response
+        def process_and_record(r=None, restType='GET'):
+            parsed.append(r.status_code)
+            return process(r, restType=restType)
+        client._GPClient__process_gprest_response = process_and_record
+
+        client.warm(bundles=[common.bundleId1], languages=['fr'],
+                    fallback=False)
+        (cachedMap, _timestamp, validators) = \
+            client._GPClient__cache.get_entry((server.get_instance_id(),
+                common.bundleId1, 'fr', False))
+        self.assertIsNotNone(validators, 'validators were not cached')
+        common.my_assert_equal(self, {}, client._GPClient__validators,
+            'validators were kept outside of the cache')
+
+        server.clear_requests()
+        del parsed[:]
+        self.assertIs(cachedMap, get_keys_map(common.bundleId1, 'fr'),
+            'the cached data was not reused')
+        (method, _path, headers) = server.get_requests(headers=True)[-1]
+        common.my_assert_equal(self, validators[0],
+            headers.get('If-None-Match'), 'the request was not conditional')
+        common.my_assert_equal(self, [], parsed,
+            'the 304 response was parsed')
+
+        # once changed, the data is downloaded again
+        client.update_resource_entries(common.bundleId1, 'fr',
+                                       data={'greet': 'Bonjour'})
+        del parsed[:]
+        common.my_assert_equal(self, 'Bonjour',
+            get_keys_map(common.bundleId1, 'fr').get('greet'),
+            'incorrect downloaded value')
+        common.my_assert_equal(self, [200], parsed,
+            'the changed data was not downloaded')
+
     #@unittest.skip("skipping")
     def test_create_bundle(self):
         """Test to create a new bundle"""
@@ -215,6 +271,27 @@ class TestGPClient(unittest.TestCase):
         common.my_assert_equal(self, expectedHeaders, headers,
             'incorrect GaaS HMAC headers')
         
+    #@unittest.skip("skipping")
+    def test_connection_pool(self):
+        """Verify the client keeps a configurable pooled session"""
+        acc = common.get_gpserviceaccount()
+        client = GPClient(acc, poolConnections=4, poolMaxsize=32)
+
+        session = client._GPClient__transport.get_session()
+        adapter = session.get_adapter('https://example.com/v2/bundles')
+
+        common.my_assert_equal(self, 4, adapter._pool_connections,
+            'incorrect number of connection pools')
+        common.my_assert_equal(self, 32, adapter._pool_maxsize,
+            'incorrect number of connections per host')
+
+        # the same session must be used for every call made by the client
+        common.my_assert_equal(self, session,
+            client._GPClient__transport.get_session(),
+            'session should not be recreated')
+
+        client.close()
+
     #@unittest.skip("skipping")
     def test_get_language_match(self):
         """Test the matching of langauge codes to supported langauges"""
@@ -326,6 +403,38 @@ class TestGPClient(unittest.TestCase):
             'reader acc can not get bundles list')
 
     
+    #@unittest.skip("skipping")
+    def test_translation_memoized(self):
+        """Verify translation() uses the cached bundle languages and the
+        memoized fallback chain
+        """
+        acc = common.get_gpserviceaccount()
+        client = GPClient(acc)
+
+        # the bundle languages are cached, no REST call is needed
+        client._GPClient__bundleLanguages[common.bundleId1] = (
+            ('en', 'fr', 'es-mx'), datetime.datetime.now())
+
+        for _i in range(3):
+            t = client.translation(bundleId=common.bundleId1,
+                languages=['fr_CA', 'es-MX'])
+            common.my_assert_equal(self, 'fr',
+                t._GPTranslations__languageId, 'incorrect first language')
+            common.my_assert_equal(self, 'es-mx',
+                t._fallback._GPTranslations__languageId,
+                'incorrect fallback language')
+
+        common.my_assert_equal(self, 1,
+            len(client._GPClient__translationPlans),
+            'fallback chain was not memoized')
+
+        # a change in the bundle languages invalidates the fallback chain
+        client._GPClient__bundleLanguages[common.bundleId1] = (
+            ('en', 'fr'), datetime.datetime.now())
+        t = client.translation(bundleId=common.bundleId1,
+            languages=['fr_CA', 'es-MX'])
+        self.assertIsNone(t._fallback, 'es-mx is no longer avaliable')
+
     #@unittest.skip("skipping")
     def test_translation_priority(self):
         """Verify that the priority option in GPClient.translation works"""
@@ -388,6 +497,254 @@ class TestGPClient(unittest.TestCase):
         tresp = client.upload_resource_entries(common.bundleId1,"en", data=data)
         common.my_assert_equal(self, "SUCCESS", tresp["status"],
             'bundle resource entries could not be uploaded')
-    
+
+    #@unittest.skip("skipping")
+    def test_warm(self):
+        """Verify every bundle language is loaded into the cache and
+        reported, including failures
+        """
+        acc = common.get_gpserviceaccount()
+        client = GPClient(acc)
+        values = {'b1': {'en': {'greet': 'Hello'}, 'fr': {'greet': 'Salut'}},
+                  'b2': {'en': {'greet': 'Hello'}, 'de': None}}
+
+        client.get_bundles = lambda: ['b1', 'b2', 'b3']
+        client.get_avaliable_languages = lambda bundleId: \
+            list(values.get(bundleId, {}))
+        client._GPClient__get_keys_map = lambda bundleId, languageId, \
+            fallback=False: values[bundleId][languageId]
+
+        report = client.warm(concurrency=4)
+
+        common.my_assert_equal(self, [('b1', 'en', False), ('b1', 'fr', False),
+            ('b2', 'de', True), ('b2', 'en', False), ('b3', None, True)],
+            sorted((item['bundleId'], item['languageId'],
+                    item['error'] is not None) for item in report),
+            'incorrect report')
+        common.my_assert_equal(self, {'greet': 'Salut'},
+            client._GPClient__get_cached_keys_map('b1', 'fr', True)[0],
+            'language should be cached')
+        self.assertIsNone(client._GPClient__get_cached_keys_map('b2', 'de',
+                                                                 True))
+
+        report = client.warm(bundles=['b1'], languages=['fr-CA'])
+        common.my_assert_equal(self, [('b1', 'fr', None)],
+            [(item['bundleId'], item['languageId'], item['error'])
+             for item in report], 'incorrect report')
+
+        # translations are created without contacting the GP service
+        client.get_avaliable_languages = None
+        client._GPClient__get_keys_map = None
+        t = client.translation(bundleId='b1', languages=['fr-CA'])
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect value')
+
+        client.close()
+
+
+class TestGPClientFakeServer(unittest.TestCase):
+    """Tests of the client operations that rely on the responses, latency
+    or failures of a fake GP service
+    """
+
+    def setUp(self):
+        self.server = GPFakeServer(seed=1)
+        self.server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello', 'weather': 'It is snowing'},
+            'fr': {'greet': 'Salut', 'weather': ''}})
+        self.client = GPClient(self.server.get_service_account(),
+                               transport=self.server.get_transport())
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    #@unittest.skip("skipping")
+    def test_timeouts(self):
+        """Verify read timeouts, and deadlines propagated through
+        translation()
+        """
+        self.server.set_latency(0.2)
+        client = GPClient(self.server.get_service_account(),
+                          transport=self.server.get_transport(),
+                          readTimeout=0.05)
+        startTime = time.time()
+        self.assertRaises(requests.exceptions.ReadTimeout, client.get_bundles)
+        self.assertLess(time.time() - startTime, 0.15)
+
+        # the bundle languages are obtained, the language values are not
+        self.server.set_latency(0.1)
+        startTime = time.time()
+        self.assertRaises(requests.exceptions.Timeout,
+            self.client.translation, bundleId=common.bundleId1,
+            languages=['fr'], deadline=0.15)
+        self.assertLess(time.time() - startTime, 0.2)
+
+        self.server.clear_requests()
+        t = self.client.translation(bundleId=common.bundleId1,
+                                    languages=['fr'], deadline=1)
+        common.my_assert_equal(self, 1, len(self.server.get_requests()),
+            'the language values were not obtained')
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect translated value')
+
+    #@unittest.skip("skipping")
+    def test_publish_bundle(self):
+        """Verify a bundle is published, source language first, with
+        progress and partial failures reported
+        """
+        resources = {'fr': {'greet': 'Salut'}, 'en': {'greet': 'Hello'},
+                     'de': {'greet': 'Hallo'}, 'es': {'greet': 'Hola'}}
+        progress = []
+        report = self.client.publish_bundle('published', resources,
+            concurrency=2, progress=lambda result, done, total:
+                progress.append((result['languageId'], done, total)))
+
+        common.my_assert_equal(self, [None] * 4,
+            [item['error'] for item in report], 'incorrect errors')
+        common.my_assert_equal(self, ('en', 1, 4), progress[0],
+            'the source language should be uploaded first')
+        common.my_assert_equal(self, [2, 3, 4],
+            sorted(item[1] for item in progress[1:]), 'incorrect progress')
+        t = self.client.translation(bundleId='published', languages=['de'])
+        common.my_assert_equal(self, 'Hallo', t.gettext('greet'),
+            'incorrect translated value')
+
+        # a failed target language does not prevent the others
+        def latency():
+            if self.server.get_requests()[-1][1].endswith('/it'):
+                self.server.fail_next(status=503)
+            return 0
+        self.server.set_latency(latency)
+        resources['it'] = {'greet': 'Ciao'}
+        report = self.client.publish_bundle('published', resources,
+                                            concurrency=1)
+        errors = dict((item['languageId'], item['error']) for item in report)
+        self.assertTrue(errors.pop('it'))
+        common.my_assert_equal(self, {'en': None, 'fr': None, 'de': None,
+            'es': None}, errors, 'incorrect errors')
+
+        # nothing is uploaded if the bundle can not be prepared
+        self.server.set_latency(0)
+        self.server.fail_next(count=2, status=503)
+        report = self.client.publish_bundle('other', resources)
+        common.my_assert_equal(self, 5,
+            len([item for item in report if item['error']]),
+            'every language should fail')
+
+    #@unittest.skip("skipping")
+    def test_chunked_upload(self):
+        """Verify entries are uploaded in chunks, replacing the existing
+        ones, and that a failed upload can be resumed
+        """
+        data = dict(('key%02d' % i, 'value %d' % i) for i in range(25))
+
+        # the second chunk fails
+        def latency():
+            if len(self.server.get_requests()) == 2:
+                self.server.fail_next(status=503)
+            return 0
+        self.server.set_latency(latency)
+        self.server.clear_requests()
+        result = self.client.upload_resource_entries_in_chunks(
+            common.bundleId1, 'en', data, chunkSize=10)
+        common.my_assert_equal(self, (3, 1, 1),
+            (result['chunks'], result['uploadedChunks'],
+             result['failedChunk']), 'incorrect result')
+        self.assertTrue(result['error'])
+
+        self.server.set_latency(0)
+        self.server.clear_requests()
+        result = self.client.upload_resource_entries_in_chunks(
+            common.bundleId1, 'en', data, chunkSize=10,
+            startChunk=result['failedChunk'])
+        common.my_assert_equal(self, (2, None),
+            (result['uploadedChunks'], result['error']), 'incorrect result')
+        common.my_assert_equal(self, ['POST', 'POST'],
+            [request[0] for request in self.server.get_requests()],
+            'the remaining chunks should be merged')
+
+        t = self.client.translation(bundleId=common.bundleId1,
+                                    languages=['en'])
+        common.my_assert_equal(self, 'value 24', t.gettext('key24'),
+            'incorrect value')
+        common.my_assert_equal(self, 'greet', t.gettext('greet'),
+            'the existing entries should be replaced')
+
+    #@unittest.skip("skipping")
+    def test_sync_bundle(self):
+        """Verify only the differences are uploaded, and keys removed only
+        when asked
+        """
+        resources = {'en': {'greet': 'Hello', 'weather': 'It is raining',
+                            'new': 'New'},
+                     'fr': {'greet': 'Salut'}}
+        self.server.clear_requests()
+        report = self.client.sync_bundle(common.bundleId1, resources)
+        counts = dict((item['languageId'], (item['added'], item['changed'],
+            item['deleted'], item['unchanged'], item['error']))
+            for item in report)
+        common.my_assert_equal(self, {'en': (1, 1, 0, 1, None),
+            'fr': (0, 0, 0, 1, None)}, counts, 'incorrect differences')
+        common.my_assert_equal(self, 1, len([request for request in
+            self.server.get_requests() if request[0] != 'GET']),
+            'only the changed language should be uploaded')
+        common.my_assert_equal(self, {}, self.client._GPClient__validators,
+            'the compared resource strings should not be kept')
+
+        # nothing left to upload; deletions are only reported
+        del resources['en']['new']
+        self.server.clear_requests()
+        with tempfile.NamedTemporaryFile('w', suffix='.json',
+                                         delete=False) as resourcesFile:
+            json.dump(resources, resourcesFile)
+        try:
+            report = self.client.sync_bundle(common.bundleId1,
+                resourcesFile.name, deleteMissing=True, dryRun=True)
+        finally:
+            os.remove(resourcesFile.name)
+        common.my_assert_equal(self, [1, 0],
+            [item['deleted'] for item in sorted(report,
+             key=lambda item: item['languageId'])], 'incorrect deletions')
+        common.my_assert_equal(self, [], [request for request in
+            self.server.get_requests() if request[0] != 'GET'],
+            'nothing should be uploaded')
+
+        report = self.client.sync_bundle(common.bundleId1, resources,
+                                         deleteMissing=True)
+        t = self.client.translation(bundleId=common.bundleId1,
+                                    languages=['en'])
+        common.my_assert_equal(self, 'new', t.gettext('new'),
+            'the removed key should be deleted')
+        common.my_assert_equal(self, 'It is raining', t.gettext('weather'),
+            'incorrect value')
+
+    #@unittest.skip("skipping")
+    def test_sync_bundle_failure(self):
+        """Verify a language that can not be obtained is reported, unless
+        it is new
+        """
+        resources = {'en': {'greet': 'Hello'}, 'de': {'greet': 'Hallo'}}
+        report = self.client.sync_bundle(common.bundleId2, resources,
+                                         dryRun=True)
+        counts = dict((item['languageId'], (item['added'], item['error']))
+                      for item in report)
+        common.my_assert_equal(self, {'en': (1, None), 'de': (1, None)},
+            counts, 'the languages of a new bundle should be empty')
+
+        self.client._GPClient__get_language_data = lambda *args: None
+        self.server.clear_requests()
+        report = self.client.sync_bundle(common.bundleId1, resources)
+        errors = dict((item['languageId'], item['error'])
+                      for item in report)
+        self.assertIn('unable to get bundle', errors['en'],
+                      'the failed language should be reported')
+        self.assertIn('not uploaded', errors['de'],
+                      'the target languages should not be uploaded')
+        common.my_assert_equal(self, [], [request for request in
+            self.server.get_requests() if request[0] == 'PUT' and
+            request[1].endswith('/en')],
+            'the failed language should not be replaced')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+import requests
+
+from gpclient import GPClient, GPFakeServer, GPIamTokenProvider
+from test import common
+
+
+class TestGPIamTokenProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GPFakeServer(latency=0.01)
+        self.server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello'}, 'fr': {'greet': 'Salut'}})
+
+    def create_provider(self, **kwargs):
+        return GPIamTokenProvider('fake-api-key',
+            url=self.server.get_iam_url(),
+            transport=self.server.get_transport(), **kwargs)
+
+    def get_exchange_count(self):
+        return len([request for request in self.server.get_requests()
+                    if request[1] == GPFakeServer.IAM_PATH])
+
+    #@unittest.skip("skipping")
+    def test_bearer_token(self):
+        """Verify the client authenticates with a cached bearer token"""
+        provider = self.create_provider()
+        client = GPClient(self.server.get_iam_service_account(),
+                          transport=self.server.get_transport(),
+                          tokenProvider=provider)
+
+        common.my_assert_equal(self, [common.bundleId1],
+            client.get_bundles(), 'incorrect bundles')
+        t = client.translation(bundleId=common.bundleId1, languages=['fr'])
+        common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+            'incorrect translated value')
+        common.my_assert_equal(self, 1, self.get_exchange_count(),
+            'the token was not reused')
+
+        # a rejected token is replaced
+        provider._GPIamTokenProvider__token = ('revoked', time.time() + 60,
+                                               time.time() + 120)
+        common.my_assert_equal(self, [], client.get_bundles(),
+            'the revoked token was accepted')
+        common.my_assert_equal(self, [common.bundleId1],
+            client.get_bundles(), 'the rejected token was reused')
+        common.my_assert_equal(self, 2, self.get_exchange_count(),
+            'incorrect number of exchanges')
+
+    #@unittest.skip("skipping")
+    def test_refresh(self):
+        """Verify concurrent callers share one exchange, and that the token
+        is refreshed in the background once most of its lifetime passed
+        """
+        provider = self.create_provider(refreshFraction=0.5)
+
+        tokens = []
+        threads = [threading.Thread(
+            target=lambda: tokens.append(provider.get_token()))
+            for _i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        common.my_assert_equal(self, 1, len(set(tokens)),
+            'concurrent callers got different tokens')
+        common.my_assert_equal(self, 1, self.get_exchange_count(),
+            'concurrent exchanges were not shared')
+
+        # past the refresh time, the current token is returned while it is
+        # refreshed
+        provider._GPIamTokenProvider__token = (tokens[0], time.time() - 1,
+                                               time.time() + 60)
+        common.my_assert_equal(self, tokens[0], provider.get_token(),
+            'the refresh was not done in the background')
+        deadline = time.time() + 5
+        while provider.get_token() == tokens[0] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertNotEqual(tokens[0], provider.get_token(),
+                            'the token was not refreshed')
+        common.my_assert_equal(self, 2, self.get_exchange_count(),
+            'incorrect number of exchanges')
+
+    #@unittest.skip("skipping")
+    def test_deadline(self):
+        """Verify a stuck IAM endpoint does not hold up calls made with a
+        deadline
+        """
+        provider = self.create_provider(readTimeout=5)
+        client = GPClient(self.server.get_iam_service_account(),
+                          transport=self.server.get_transport(),
+                          tokenProvider=provider)
+        self.server.set_latency(1)
+
+        startTime = time.time()
+        self.assertRaises(requests.exceptions.Timeout, client.get_bundles,
+                          deadline=0.1)
+        self.assertLess(time.time() - startTime, 0.5,
+            'the deadline was not honoured by the token exchange')
+
+        self.assertRaises(requests.exceptions.Timeout, provider.get_token,
+                          deadline=time.time() - 1)
+
+    #@unittest.skip("skipping")
+    def test_invalid_api_key(self):
+        """Verify a rejected API key is reported"""
+        provider = GPIamTokenProvider('invalid',
+            url=self.server.get_iam_url(),
+            transport=self.server.get_transport())
+        self.assertRaises(requests.exceptions.HTTPError, provider.get_token)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from gpclient import GPLanguageIndex
+from test import common
+
+
+class TestGPLanguageIndex(unittest.TestCase):
+
+    # supported languages in GP
+    supportedLangs = ['en', 'de', 'es', 'fr', 'it', 'ja', 'ko', 'pt-BR',
+        'zh-Hans', 'zh-Hant']
+
+    #@unittest.skip("skipping")
+    def test_match(self):
+        """Test the matching of language codes, regardless of their case"""
+        index = GPLanguageIndex(self.supportedLangs)
+
+        expectedMatches = {
+            'en_US': 'en', 'EN-us': 'en', 'fr-Fr': 'fr', 'es-419': 'es',
+            'pt-br': 'pt-BR', 'PT_BR': 'pt-BR', 'pt': None,
+            'zh-tw': 'zh-Hant', 'zh-hant-hk': 'zh-Hant', 'zh-sg': 'zh-Hans',
+            }
+
+        for langCode in expectedMatches:
+            common.my_assert_equal(self, expectedMatches[langCode],
+                index.match(langCode),
+                'incorrect language match (Input= %s)' % (langCode,))
+
+    #@unittest.skip("skipping")
+    def test_match_parent_locale(self):
+        """Test that CLDR parent locales are used when there is no match"""
+        index = GPLanguageIndex(['en-001', 'pt-PT', 'es-419'])
+
+        expectedMatches = {
+            'pt-AO': 'pt-PT', 'pt_MZ': 'pt-PT', 'en-AU': 'en-001',
+            'en-US': None, 'es-MX': 'es-419', 'pt-BR': None,
+            }
+
+        for langCode in expectedMatches:
+            common.my_assert_equal(self, expectedMatches[langCode],
+                index.match(langCode),
+                'incorrect language match (Input= %s)' % (langCode,))
+
+    #@unittest.skip("skipping")
+    def test_negotiate(self):
+        """Test negotiating with Accept-Language header values"""
+        index = GPLanguageIndex(self.supportedLangs)
+
+        expectedMatches = {
+            'fr-CA,fr;q=0.9,en;q=0.8': 'fr',
+            'ur,en;q=0.5,de;q=0.7': 'de',
+            'xx-invalid, ja-JP': 'ja',
+            'ur;q=1, *;q=0.1': None,
+            'en;q=0, it': 'it',
+            }
+
+        for acceptLanguage in expectedMatches:
+            common.my_assert_equal(self, expectedMatches[acceptLanguage],
+                index.negotiate(acceptLanguage),
+                'incorrect negotiated language (Input= %s)' % acceptLanguage)
+
+        common.my_assert_equal(self, 'zh-Hant',
+            index.negotiate(['ur', 'zh-TW']), 'incorrect negotiated language')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+from gettext import NullTranslations
+
+from gpclient import GPClient, GPFakeServer, GPMoCatalogs
+from test import common
+
+
+class BundleClient():
+    """Stands in for ``GPClient``; returns the languages in ``languages``,
+    ``sourceLanguage`` being the source language
+    """
+    _GPClient__RESPONSE_SRC_LANGUAGE_KEY = 'sourceLanguage'
+    _GPClient__RESPONSE_TARGET_LANGUAGES_KEY = 'targetLanguages'
+
+    def __init__(self, sourceLanguage, languages):
+        self.sourceLanguage = sourceLanguage
+        self.languages = languages
+
+    def _GPClient__get_bundle_data(self, bundleId):
+        return {'sourceLanguage': self.sourceLanguage,
+                'targetLanguages': sorted(languageId for languageId in
+                    self.languages if languageId != self.sourceLanguage)}
+
+    def _GPClient__get_language_data(self, bundleId, languageId,
+                                     fallback=False):
+        return dict(self.languages[languageId])
+
+
+class TestGPMoCatalogs(unittest.TestCase):
+
+    def setUp(self):
+        self.localedir = tempfile.mkdtemp()
+        self.client = BundleClient('en', {
+            'en': {'greet': 'Hello', 'weather': 'It is snowing',
+                   'exit': 'Bye'},
+            'fr': {'greet': u'Salut ça va', 'weather': '', 'exit': ''},
+            'es-mx': {'greet': 'Hola', 'weather': 'Nieva', 'exit': ''}})
+
+    def tearDown(self):
+        shutil.rmtree(self.localedir)
+
+    #@unittest.skip("skipping")
+    def test_export(self):
+        """Verify a mo file is written for every language"""
+        catalogs = GPMoCatalogs(self.localedir, 'messages')
+        paths = catalogs.export(self.client, common.bundleId1)
+
+        common.my_assert_equal(self, os.path.join(self.localedir, 'es_MX',
+            'LC_MESSAGES', 'messages.mo'), paths.get('es-mx'),
+            'incorrect mo file path')
+        for path in paths.values():
+            self.assertTrue(os.path.isfile(path), 'mo file not written')
+
+        catalogs = GPMoCatalogs(self.localedir, 'messages')
+        common.my_assert_equal(self, ['en', 'es-mx', 'fr'],
+            sorted(catalogs.get_language_ids()), 'incorrect languages')
+        common.my_assert_equal(self, 'en', catalogs.get_source_language(),
+            'incorrect source language')
+
+    #@unittest.skip("skipping")
+    def test_translation(self):
+        """Verify the exported values are used, falling back on the next
+        language, the source language and then the fallback provided
+        """
+        GPMoCatalogs(self.localedir, 'messages').export(self.client,
+            common.bundleId1)
+
+        catalogs = GPMoCatalogs(self.localedir, 'messages')
+        t = catalogs.translation(languages=['fr_CA', 'es-MX'],
+                                 fallback=NullTranslations())
+
+        # gettext returns encoded values on Python 2
+        ugettext = getattr(t, 'ugettext', t.gettext)
+        common.my_assert_equal(self, u'Salut ça va', ugettext('greet'),
+            'incorrect translated value')
+        common.my_assert_equal(self, 'Nieva', t.gettext('weather'),
+            'incorrect fallback language value')
+        common.my_assert_equal(self, 'Bye', t.gettext('exit'),
+            'incorrect source language value')
+        common.my_assert_equal(self, 'unknown', t.gettext('unknown'),
+            'incorrect value for unknown key')
+
+        # french plural rule, n > 1
+        common.my_assert_equal(self, 0, t.plural(0),
+            'incorrect plural form')
+        common.my_assert_equal(self, 1, t.plural(2),
+            'incorrect plural form')
+
+        # each chain has its own fallbacks
+        t = catalogs.translation(languages=['fr'])
+        common.my_assert_equal(self, 'It is snowing', t.gettext('weather'),
+            'incorrect source language value')
+
+    #@unittest.skip("skipping")
+    def test_client_catalogs(self):
+        """Verify the client uses the exported values first, and the GP
+        service for the keys added after the export
+        """
+        server = GPFakeServer()
+        server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello', 'exit': 'Bye'},
+            'fr': {'greet': 'Salut', 'exit': ''}})
+        server.add_bundle(common.bundleId2, 'en', {
+            'en': {'greet': 'Hello'}, 'fr': {'greet': 'Bonjour'}})
+        client = GPClient(server.get_service_account(),
+                          transport=server.get_transport())
+        catalogs = GPMoCatalogs(self.localedir, 'messages')
+        catalogs.export(client, common.bundleId1)
+        client.update_resource_entries(common.bundleId1, 'fr',
+            data={'greet': 'Salut !', 'new': 'Nouveau'})
+        client.close()
+        client = GPClient(server.get_service_account(),
+                          transport=server.get_transport(),
+                          moCatalogs=catalogs)
+        try:
+            t = client.translation(bundleId=common.bundleId1,
+                                   languages=['fr'])
+            common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+                'the exported value should be used')
+            common.my_assert_equal(self, 'Bye', t.gettext('exit'),
+                'the exported source value should be used')
+            common.my_assert_equal(self, 'Nouveau', t.gettext('new'),
+                'the value added after the export should be used')
+
+            t = client.translation(bundleId=common.bundleId2,
+                                   languages=['fr'])
+            common.my_assert_equal(self, 'Bonjour', t.gettext('greet'),
+                'the other bundles should not be affected')
+        finally:
+            client.close()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import requests
+
+from gpclient import GPClient, GPFakeServer, GPResourceWriter
+from test import common
+
+
+class TestGPResourceWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.server = GPFakeServer()
+        self.server.add_bundle(common.bundleId1, 'en', {
+            'en': dict(('key%d' % i, 'value %d' % i) for i in range(25)),
+            'fr': {}})
+        self.client = GPClient(self.server.get_service_account(),
+                               transport=self.server.get_transport())
+
+    def get_post_count(self):
+        return len([request for request in self.server.get_requests()
+                    if request[0] == 'POST'])
+
+    #@unittest.skip("skipping")
+    def test_batches(self):
+        """Verify the updates are grouped by size, coalesced, and that each
+        key gets the response of its group
+        """
+        with GPResourceWriter(self.client, maxBatchSize=10,
+                              maxDelay=60) as writer:
+            futures = [writer.update_resource_entry(common.bundleId1, 'fr',
+                'key%d' % i, data={'value': 'valeur %d' % i})
+                for i in range(25)]
+            futures.append(writer.update_resource_entry(common.bundleId1,
+                'fr', 'key24', data={'value': 'derniere valeur'}))
+            common.my_assert_equal(self, 2, self.get_post_count(),
+                'incorrect number of grouped calls')
+            common.my_assert_equal(self, 5, writer.get_pending_count(),
+                'incorrect number of buffered updates')
+
+        common.my_assert_equal(self, 3, self.get_post_count(),
+            'the writer was not flushed')
+        for future in futures:
+            common.my_assert_equal(self, 'SUCCESS',
+                future.result()['status'], 'incorrect response')
+
+        t = self.client.translation(bundleId=common.bundleId1,
+                                    languages=['fr'])
+        common.my_assert_equal(self, 'valeur 3', t.gettext('key3'),
+            'incorrect translated value')
+        common.my_assert_equal(self, 'derniere valeur', t.gettext('key24'),
+            'the last update was not kept')
+
+    #@unittest.skip("skipping")
+    def test_delay_and_failures(self):
+        """Verify the updates are sent after maxDelay, and that failures
+        are reported for each key
+        """
+        writer = GPResourceWriter(self.client, maxDelay=0.05)
+        try:
+            future = writer.update_resource_entry(common.bundleId1, 'fr',
+                'key1', data={'value': 'valeur 1'})
+            common.my_assert_equal(self, 'SUCCESS',
+                future.result(timeout=5)['status'], 'incorrect response')
+
+            self.server.fail_next(count=1, status=503)
+            future = writer.update_resource_entry(common.bundleId1, 'fr',
+                'key2', data={'value': 'valeur 2'})
+            common.my_assert_equal(self, 'ERROR',
+                future.result(timeout=5)['status'], 'incorrect response')
+
+            self.server.fail_next(count=1, status=None)
+            future = writer.update_resource_entry(common.bundleId1, 'fr',
+                'key3', data={'value': 'valeur 3'})
+            self.assertIsInstance(future.exception(timeout=5),
+                                  requests.exceptions.ConnectionError)
+        finally:
+            writer.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright IBM Corp. 2015, 2017
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from gpclient import GPClient, GPServiceAccount, GPSnapshotStore
+from test import common
+
+
+class TestGPSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = GPSnapshotStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_key(self, languageId, fallback=True):
+        return ('instance/1', common.bundleId1, languageId, fallback)
+
+    #@unittest.skip("skipping")
+    def test_save_load(self):
+        """Verify saved values are loaded with their timestamp and
+        validators
+        """
+        timestamp = datetime.datetime(2017, 5, 1, 10, 30, 15, 250000)
+
+        self.assertIsNone(self.store.load(self.get_key('fr')))
+
+        self.store.save(self.get_key('fr'), {'greet': u'Salut ça va'},
+            timestamp, etag='"1"', lastModified='Mon, 01 May 2017',
+            digest=b'\x01\xff')
+
+        common.my_assert_equal(self, ({'greet': u'Salut ça va'}, timestamp,
+            '"1"', 'Mon, 01 May 2017', b'\x01\xff'),
+            self.store.load(self.get_key('fr')), 'incorrect snapshot')
+        self.assertIsNone(self.store.load(self.get_key('fr', False)),
+            'fallback values are stored separately')
+
+        self.store.save_languages(('instance/1', common.bundleId1),
+                                  ('en', 'fr'), timestamp)
+        common.my_assert_equal(self, (['en', 'fr'], timestamp),
+            self.store.load_languages(('instance/1', common.bundleId1)),
+            'incorrect languages snapshot')
+
+        self.store.remove(self.get_key('fr'))
+        self.assertIsNone(self.store.load(self.get_key('fr')))
+
+    #@unittest.skip("skipping")
+    def test_unchanged_values(self):
+        """Verify the same values are not written again"""
+        timestamp = datetime.datetime(2017, 5, 1, 10, 30, 15)
+        later = timestamp + datetime.timedelta(minutes=10)
+        key = self.get_key('fr')
+        languagesKey = ('instance/1', common.bundleId1)
+
+        self.store.save(key, {'greet': 'Salut'}, timestamp, etag='"1"',
+                        digest=b'\x01')
+        self.store.save_languages(languagesKey, ['en', 'fr'], timestamp)
+        self.store.save(key, {'greet': 'Salut'}, later, etag='"1"',
+                        digest=b'\x01')
+        self.store.save_languages(languagesKey, ('en', 'fr'), later)
+        common.my_assert_equal(self, timestamp, self.store.load(key)[1],
+            'the unchanged values should not be written')
+        common.my_assert_equal(self, timestamp,
+            self.store.load_languages(languagesKey)[1],
+            'the unchanged languages should not be written')
+
+        # the values loaded by another process are not written either
+        store = GPSnapshotStore(self.directory)
+        store.load(key)
+        store.save(key, {'greet': 'Salut'}, later, etag='"1"',
+                   digest=b'\x01')
+        common.my_assert_equal(self, timestamp, store.load(key)[1],
+            'the loaded values should not be written')
+
+        store.save(key, {'greet': 'Salut !'}, later, etag='"2"',
+                   digest=b'\x02')
+        store.save_languages(languagesKey, ['en', 'fr', 'de'], later)
+        common.my_assert_equal(self, ({'greet': 'Salut !'}, later),
+            store.load(key)[:2], 'the changed values should be written')
+        common.my_assert_equal(self, (['en', 'fr', 'de'], later),
+            store.load_languages(languagesKey),
+            'the changed languages should be written')
+
+        # a removed snapshot is written again
+        self.store.remove(key)
+        self.store.save(key, {'greet': 'Salut !'}, later, etag='"2"',
+                        digest=b'\x02')
+        self.assertIsNotNone(self.store.load(key))
+
+    #@unittest.skip("skipping")
+    def test_corrupted_snapshot(self):
+        """Verify a corrupted snapshot is ignored"""
+        self.store.save(self.get_key('fr'), {'greet': 'Salut'},
+                        datetime.datetime.now())
+
+        for dirPath, _dirNames, fileNames in os.walk(self.directory):
+            for fileName in fileNames:
+                with open(os.path.join(dirPath, fileName), 'w') as f:
+                    f.write('{"resourceStrings": {"gre')
+
+        self.assertIsNone(self.store.load(self.get_key('fr')))
+
+    #@unittest.skip("skipping")
+    def test_cold_start_offline(self):
+        """Verify a new client uses the snapshot when the GP service can not
+        be reached, and keeps using it
+        """
+        acc = GPServiceAccount(url='http://localhost:1/translate/rest',
+            instanceId='instance1', userId='user', password='password')
+        timestamp = datetime.datetime.now() - datetime.timedelta(days=1)
+        self.store.save_languages(('instance1', common.bundleId1),
+                                  ['en', 'fr'], timestamp)
+        self.store.save(('instance1', common.bundleId1, 'fr', True),
+                        {'greet': 'Salut'}, timestamp)
+
+        client = GPClient(acc, snapshotStore=self.store)
+        try:
+            t = client.translation(bundleId=common.bundleId1,
+                                   languages=['fr'])
+            for _i in range(3):
+                common.my_assert_equal(self, 'Salut', t.gettext('greet'),
+                    'incorrect value from snapshot')
+        finally:
+            client.close()
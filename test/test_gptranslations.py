@@ -15,12 +15,42 @@
 # limitations under the License.
 
 import datetime
+import threading
+import time
 import unittest
 
-from gpclient import GPClient
+from gpclient import GPClient, GPFakeServer, GPTranslations
 from test import common
 
 
+class KeysMapClient():
+    """Stands in for ``GPClient``; returns the key-value pairs in ``values``
+    and waits for ``release`` to be set before returning them
+    """
+    def __init__(self, values):
+        self.values = values
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def _GPClient__get_keys_map(self, bundleId, languageId, fallback=False):
+        self.calls += 1
+        self.release.wait()
+        return dict(self.values)
+
+    def _GPClient__get_cached_keys_map(self, bundleId, languageId,
+                                       fallback=False):
+        return None
+
+    def _GPClient__put_cached_keys_map(self, bundleId, languageId, fallback,
+                                       keysMap, timestamp):
+        pass
+
+    def _GPClient__is_snapshot_keys_map(self, bundleId, languageId,
+                                        fallback=False):
+        return False
+
+
 class TestGPTranslations(unittest.TestCase):
 
     @classmethod
@@ -78,8 +108,11 @@ class TestGPTranslations(unittest.TestCase):
             t._GPTranslations__cachedMap, 'incorrect cache map')
 
         # modify the cachedMap and verify that the value is in fact obtained
-        # from the cache and not directly from GP
+        # from the cache and not directly from GP; the map is copied first,
+        # since the one cached by the client is revalidated, not replaced,
+        # once it expires
         modifiedTValue = tValue + 'modified' # modified translated value
+        t._GPTranslations__cachedMap = dict(t._GPTranslations__cachedMap)
         t._GPTranslations__cachedMap[key] = modifiedTValue
         value = _(key)
         common.my_assert_equal(self, modifiedTValue, value,
@@ -144,6 +177,128 @@ class TestGPTranslations(unittest.TestCase):
             'incorrect translated value - should have returned cached value' +
             ' (no cache timeout)')
 
+    # @unittest.skip("skipping")
+    def test_stale_while_revalidate(self):
+        """Test that expired values are served while they are refreshed in
+        the background, up to the maximum staleness
+        """
+        (server, client, release) = self.create_stale_client()
+        t = client.translation(bundleId=common.bundleId1, languages=['fr'])
+        _ = t.gettext
+
+        common.my_assert_equal(self, 'Salut', _('greet'),
+            'incorrect translated value')
+
+        # expire the cache; the stale value must be returned without waiting
+        # for the refresh
+        client.update_resource_entries(common.bundleId1, 'fr',
+                                       data={'greet': 'Bonjour'})
+        release.clear()
+        self.expire(client, t, minutes=11)
+        common.my_assert_equal(self, 'Salut', _('greet'),
+            'incorrect translated value - should have returned stale value')
+        common.my_assert_equal(self, 'Salut', _('greet'),
+            'incorrect translated value - should have returned stale value')
+
+        # let the single background refresh complete
+        release.set()
+        self.wait_for_refreshes(client)
+        common.my_assert_equal(self, 2, self.count_language_calls(server),
+            'only one background refresh should have been made')
+        common.my_assert_equal(self, 'Bonjour', _('greet'),
+            'incorrect translated value - should have returned refreshed value')
+
+        # past the maximum staleness the refresh must be synchronous
+        client.update_resource_entries(common.bundleId1, 'fr',
+                                       data={'greet': 'Coucou'})
+        self.expire(client, t, minutes=16)
+        common.my_assert_equal(self, 'Coucou', _('greet'),
+            'incorrect translated value - stale value is too old')
+
+    # @unittest.skip("skipping")
+    def test_single_background_refresh(self):
+        """Test that the GPTranslations created for each request refresh an
+        expired map with a single fetch, and share its failure backoff
+        """
+        (server, client, release) = self.create_stale_client()
+        client.translation(bundleId=common.bundleId1,
+                           languages=['fr']).gettext('greet')
+
+        client.update_resource_entries(common.bundleId1, 'fr',
+                                       data={'greet': 'Bonjour'})
+        release.clear()
+        self.expire(client, None, minutes=11)
+        values = [client.translation(bundleId=common.bundleId1,
+                                     languages=['fr']).gettext('greet')
+                  for _i in range(20)]
+        common.my_assert_equal(self, ['Salut'] * 20, values,
+            'incorrect translated values - should have returned stale values')
+        common.my_assert_equal(self, 1, len([thread for thread in
+            threading.enumerate() if thread.name.startswith(
+                'GPClient-refresh')]),
+            'only one background refresh should have been started')
+
+        release.set()
+        self.wait_for_refreshes(client)
+        common.my_assert_equal(self, 2, self.count_language_calls(server),
+            'only one background refresh should have been made')
+        common.my_assert_equal(self, 'Bonjour', client.translation(
+            bundleId=common.bundleId1, languages=['fr']).gettext('greet'),
+            'incorrect translated value - should have returned refreshed value')
+
+        # once a refresh failed, the other instances do not retry it
+        self.expire(client, None, minutes=11)
+        server.fail_next(1, status=500)
+        client.translation(bundleId=common.bundleId1,
+                           languages=['fr']).gettext('greet')
+        self.wait_for_refreshes(client)
+        for _i in range(20):
+            client.translation(bundleId=common.bundleId1,
+                               languages=['fr']).gettext('greet')
+        self.wait_for_refreshes(client)
+        common.my_assert_equal(self, 3, self.count_language_calls(server),
+            'the failed refresh should not have been retried')
+
+    def create_stale_client(self):
+        """Returns a ``GPFakeServer``, a client serving stale values while
+        they are refreshed, and the event the server waits for before
+        answering each call
+        """
+        server = GPFakeServer()
+        server.add_bundle(common.bundleId1, 'en', {
+            'en': {'greet': 'Hello'}, 'fr': {'greet': 'Salut'}})
+        release = threading.Event()
+        release.set()
+        server.set_latency(lambda: release.wait() and 0)
+        client = GPClient(server.get_service_account(),
+                          transport=server.get_transport(),
+                          staleWhileRevalidate=True, maxStaleness=5)
+        return (server, client, release)
+
+    def expire(self, client, t, minutes):
+        """Makes the values cached by ``client``, and ``t`` if provided,
+        ``minutes`` older
+        """
+        cache = client._GPClient__cache
+        for key in cache.keys():
+            (keysMap, timestamp, validators) = cache.get_entry(key)
+            cache.put(key, keysMap,
+                      timestamp - datetime.timedelta(minutes=minutes),
+                      validators=validators)
+        if t is not None:
+            t._GPTranslations__cacheMapTimestamp -= \
+                datetime.timedelta(minutes=minutes)
+
+    def wait_for_refreshes(self, client):
+        for _i in range(100):
+            if not client._GPClient__refreshing:
+                break
+            time.sleep(0.01)
+
+    def count_language_calls(self, server):
+        return len([request for request in server.get_requests()
+                    if request[0] == 'GET' and request[1].endswith('/fr')])
+
     def common_test_caching(self, cacheTimeout=None):
         """Shared code between the various caching tests """
         acc = common.get_gpserviceaccount()
@@ -79,8 +79,11 @@ class TestGPTranslationsIam(unittest.TestCase):
             t._GPTranslations__cachedMap, 'incorrect cache map')
 
         # modify the cachedMap and verify that the value is in fact obtained
-        # from the cache and not directly from GP
+        # from the cache and not directly from GP; the map is copied first,
+        # since the one cached by the client is revalidated, not replaced,
+        # once it expires
         modifiedTValue = tValue + 'modified' # modified translated value
+        t._GPTranslations__cachedMap = dict(t._GPTranslations__cachedMap)
         t._GPTranslations__cachedMap[key] = modifiedTValue
         value = _(key)
         common.my_assert_equal(self, modifiedTValue, value,